@@ -0,0 +1,129 @@
+"""
+Fits the text of a profile ingest into a character or token budget, e.g. to paste it into an LLM prompt.
+
+Only the rendered sections of the ingest are used, so trimming a cached profile to another budget never fetches it
+again. When the text is over budget:
+1. Long quoted blocks, such as descriptions and post contents, are truncated, more and more, until it fits.
+2. If it still does not fit, sections are kept from the most to the least important one while there is room.
+   A section that does not fit is cut after its last entry that does, and dropped if none does. Posts are
+   kept by engagement instead, those with the most reactions, comments and shares that fit.
+"""
+from ..models.profile import TEXT_SECTIONS
+from .formatter import join_posts
+from typing import Dict, List, Optional, TYPE_CHECKING
+import math
+import re
+
+if TYPE_CHECKING:
+    from .ingest import ProfileIngest
+
+# Rough number of characters per token of English text for common LLM tokenizers
+CHARS_PER_TOKEN = 4
+# Most important first, sections that are not listed come last in the order of the response
+DEFAULT_PRIORITIES = ("summary", "experience", "education", "skills", "posts", "certifications", "projects", "languages", "honors", "publications", "volunteer")
+# Successive maximum lengths of quoted blocks
+BLOCK_LIMITS = (1000, 400, 150)
+TRUNCATED = " [...]"
+# A section is only cut in the middle of its first entry if at least this many characters of it fit
+MIN_CUT_CHARS = 200
+QUOTED_BLOCK = re.compile(r'"""\n(.*?)\n"""', re.DOTALL)
+
+
+def priority_order(sections: Optional[List[str]] = None, priorities: Optional[List[str]] = None) -> List[str]:
+    """The selected sections, most important first: those in `priorities`, then by the default priorities"""
+    selected = TEXT_SECTIONS if sections is None else [name for name in TEXT_SECTIONS if name in sections]
+    ranking = list(priorities or []) + [name for name in DEFAULT_PRIORITIES if name not in (priorities or [])]
+    return sorted(selected, key=lambda name: ranking.index(name) if name in ranking else len(ranking))
+
+
+def truncate_blocks(text: str, limit: int) -> str:
+    """Truncates the quoted blocks of a rendered section to `limit` characters"""
+    def shorten(match):
+        content = match.group(1)
+        if len(content) <= limit:
+            return match.group(0)
+        return f'"""\n{content[:limit].rstrip()}{TRUNCATED}\n"""'
+    return QUOTED_BLOCK.sub(shorten, text)
+
+
+def post_engagement(post: dict) -> int:
+    """Reactions, comments and shares of a post"""
+    counts = (post.get("socialDetail") or {}).get("totalSocialActivityCounts") or {}
+    reactions = sum(reaction.get("count", 0) for reaction in counts.get("reactionTypeCounts") or [])
+    return reactions + counts.get("numComments", 0) + counts.get("numShares", 0)
+
+
+def cut_section(text: str, room: int) -> str:
+    """The section cut after its last entry that fits in `room` characters, or in the middle of its first entry"""
+    if len(text) <= room:
+        return text
+    end = text.rfind("\n\n", 0, max(room - len(TRUNCATED) - 1, 0))
+    if end > text.find("\n"):
+        return text[:end + 1] + TRUNCATED.strip() + "\n"
+    if room < MIN_CUT_CHARS:
+        return ""
+    return text[:room - len(TRUNCATED)].rstrip() + TRUNCATED
+
+
+def fit_to_budget(ingest: "ProfileIngest", max_chars: int, sections: Optional[List[str]] = None, priorities: Optional[List[str]] = None) -> dict:
+    """
+    The full name and the selected sections of the ingest, in the order of the response, trimmed to at most
+    `max_chars` characters in total, with a "budget" field reporting their size and what was trimmed.
+    The full name is always included, even if it alone is over budget.
+    """
+    order = priority_order(sections, priorities)
+    originals = {name: ingest.section(name) for name in order}
+    texts = {name: text for name, text in originals.items() if text}
+    posts = ingest.raw.posts or []
+    post_entries = ingest.post_entries() if "posts" in texts else None
+    kept_posts = list(range(len(post_entries))) if post_entries is not None else []
+
+    def size() -> int:
+        return len(ingest.full_name) + sum(len(text) for text in texts.values())
+
+    truncated = False
+    for limit in BLOCK_LIMITS:
+        if size() <= max_chars:
+            break
+        truncated = True
+        texts = {name: truncate_blocks(originals[name], limit) for name in texts}
+        if post_entries is not None:
+            post_entries = [truncate_blocks(entry, limit) for entry in post_entries]
+            texts["posts"] = join_posts(post_entries)
+
+    if size() > max_chars:
+        kept = {}
+        room = max_chars - len(ingest.full_name)
+        for name in order:
+            if name not in texts:
+                continue
+            text = texts[name]
+            if len(text) > room and name == "posts" and post_entries is not None:
+                # The most engaging posts that fit, in their order. Each one takes its length and a separator.
+                chosen = set()
+                post_room = room - len(join_posts(["\n"]))
+                for index in sorted(kept_posts, key=lambda index: post_engagement(posts[index]), reverse=True):
+                    if len(post_entries[index]) + 1 <= post_room:
+                        chosen.add(index)
+                        post_room -= len(post_entries[index]) + 1
+                kept_posts = sorted(chosen)
+                text = join_posts([post_entries[index] for index in kept_posts])
+            elif len(text) > room:
+                text = cut_section(text, room)
+            if text:
+                kept[name] = text
+                room -= len(text)
+        texts = kept
+
+    result: Dict[str, object] = {"full_name": ingest.full_name}
+    result.update((name, texts[name]) for name in TEXT_SECTIONS if name in texts)
+    chars = size()
+    result["budget"] = {
+        "max_chars": max_chars,
+        "chars": chars,
+        "approx_tokens": math.ceil(chars / CHARS_PER_TOKEN),
+        "truncated": truncated,
+        "omitted_sections": [name for name in order if originals[name] and name not in texts],
+        "dropped_posts": len(post_entries) - len(kept_posts) if post_entries is not None else 0,
+    }
+    return result
@@ -0,0 +1,360 @@
+from ..models.profile import ProfileResponse
+from .ingest import ProfileIngest
+from collections import OrderedDict
+from datetime import datetime, timedelta
+import gzip
+import hashlib
+import sqlite3
+import threading
+import zlib
+from typing import List, Optional, Tuple
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+BROTLI_QUALITY = 5
+
+
+class CacheEntry:
+    def __init__(self, ingest: ProfileIngest, ttl_minutes: int = 60, created_at: Optional[datetime] = None, expires_at: Optional[datetime] = None, stale_minutes: float = 0, size: Optional[int] = None):
+        self.ingest = ingest
+        self.created_at = created_at or datetime.now()
+        self.expires_at = expires_at or self.created_at + timedelta(minutes=ttl_minutes)
+        # Past expires_at the entry is stale: it can still be served while it is refreshed, until stale_until
+        self.stale_until = self.expires_at + timedelta(minutes=stale_minutes)
+        # Number of times the entry was read, used to find profiles worth refreshing ahead of expiry
+        self.hits = 0
+        # The full response is encoded the first time it is requested, and kept so that later cache hits
+        # can be served as bytes, without rendering, serializing or compressing again
+        self._json: Optional[bytes] = None
+        self._gzip: Optional[bytes] = None
+        self._brotli: Optional[bytes] = None
+        self._etag: Optional[str] = None
+        # Memory footprint: the JSON of the raw data and the rendered sections, unless the caller already knows it,
+        # plus the encoded response once it is created
+        self.size = size if size is not None else self._measure()
+        # Cache holding the entry and its key, told when the size of the entry changes
+        self._owner: Optional[Tuple["ProfileCache", str]] = None
+        # Sections and views with fewer posts are rendered lazily, after the entry was added
+        ingest.on_resize = self._resized
+
+    @property
+    def data(self) -> ProfileResponse:
+        return self.ingest.response()
+
+    def _encode(self):
+        if self._json is None:
+            # Measured once the response is encoded, rather than for each section rendered to encode it
+            self.ingest.on_resize = None
+            try:
+                self._json = self.data.model_dump_json().encode("utf-8")
+            finally:
+                self.ingest.on_resize = self._resized
+            self._gzip = gzip.compress(self._json, mtime=0)
+            self._brotli = brotli.compress(self._json, quality=BROTLI_QUALITY) if brotli is not None else None
+            self._etag = f'W/"{hashlib.blake2b(self._json, digest_size=16).hexdigest()}"'
+            self._resized()
+
+    def _resized(self):
+        if self._owner is not None:
+            cache, key = self._owner
+            cache._resize(key, self)
+        else:
+            self.size = self._measure()
+
+    def _measure(self) -> int:
+        size = self.ingest.raw_size() + self.ingest.rendered_size()
+        if self._json is not None:
+            size += len(self._json) + len(self._gzip) + len(self._brotli or b"")
+        return size
+
+    @property
+    def json(self) -> bytes:
+        self._encode()
+        return self._json
+
+    @property
+    def gzip(self) -> bytes:
+        self._encode()
+        return self._gzip
+
+    @property
+    def brotli(self) -> Optional[bytes]:
+        self._encode()
+        return self._brotli
+
+    @property
+    def etag(self) -> str:
+        self._encode()
+        return self._etag
+
+    def is_stale(self) -> bool:
+        return datetime.now() > self.expires_at
+
+    def is_expired(self) -> bool:
+        return datetime.now() > self.stale_until
+
+
+class SQLiteCacheStore:
+    """
+    Persists cache entries in a SQLite database so they survive restarts.
+    Payloads are stored as zlib-compressed JSON of the raw data and the sections rendered so far.
+    The database is only opened on first use.
+    """
+    def __init__(self, path: str, compression_level: int = 6):
+        self.path = path
+        self.compression_level = compression_level
+        self._conn: Optional[sqlite3.Connection] = None
+        self._lock = threading.Lock()
+
+    def _connect(self) -> sqlite3.Connection:
+        if self._conn is None:
+            self._conn = sqlite3.connect(self.path, check_same_thread=False)
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS profiles ("
+                "key TEXT PRIMARY KEY, created_at REAL NOT NULL, expires_at REAL NOT NULL, payload BLOB NOT NULL)"
+            )
+            self._conn.commit()
+        return self._conn
+
+    def load(self, key: str, stale_minutes: float = 0) -> Optional[CacheEntry]:
+        with self._lock:
+            row = self._connect().execute(
+                "SELECT created_at, expires_at, payload FROM profiles WHERE key = ?", (key,)
+            ).fetchone()
+        if row is None:
+            return None
+        created_at, expires_at, payload = row
+        data = zlib.decompress(payload)
+        return CacheEntry(ProfileIngest.from_json(data), created_at=datetime.fromtimestamp(created_at), expires_at=datetime.fromtimestamp(expires_at), stale_minutes=stale_minutes, size=len(data))
+
+    def save(self, key: str, entry: CacheEntry):
+        payload = zlib.compress(entry.ingest.to_json().encode("utf-8"), self.compression_level)
+        with self._lock:
+            conn = self._connect()
+            conn.execute(
+                "INSERT OR REPLACE INTO profiles (key, created_at, expires_at, payload) VALUES (?, ?, ?, ?)",
+                (key, entry.created_at.timestamp(), entry.expires_at.timestamp(), payload),
+            )
+            conn.commit()
+
+    def delete(self, key: str):
+        with self._lock:
+            conn = self._connect()
+            conn.execute("DELETE FROM profiles WHERE key = ?", (key,))
+            conn.commit()
+
+    def purge_expired(self, stale_minutes: float = 0) -> int:
+        """Remove all entries that expired more than `stale_minutes` ago, returns the number of entries removed"""
+        with self._lock:
+            conn = self._connect()
+            cursor = conn.execute("DELETE FROM profiles WHERE expires_at < ?", ((datetime.now() - timedelta(minutes=stale_minutes)).timestamp(),))
+            conn.commit()
+            return cursor.rowcount
+
+    def close(self):
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+
+class ProfileCache:
+    """
+    Thread-safe LRU cache of profile responses with a TTL, a maximum entry count and a byte budget.
+    Expired entries are dropped on read and by a periodic background sweep. With `stale_minutes`,
+    entries are kept that long past their TTL so that they can be served while being refreshed.
+    If a persistent store is given, entries are written through to it and loaded back lazily on a memory miss.
+    """
+    def __init__(self, ttl_minutes: int = 60, max_entries: int = 1000, max_size_mb: float = 256, sweep_interval_seconds: float = 300, store: Optional[SQLiteCacheStore] = None, stale_minutes: float = 0):
+        self.ttl_minutes = ttl_minutes
+        self.stale_minutes = stale_minutes
+        self.max_entries = max_entries
+        self.max_bytes = int(max_size_mb * 1024 * 1024)
+        self.sweep_interval_seconds = sweep_interval_seconds
+        self.store = store
+
+        self._entries: OrderedDict[str, CacheEntry] = OrderedDict()
+        self._lock = threading.Lock()
+        self._size = 0
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+        self._sweeper: Optional[threading.Thread] = None
+        self._stop_sweeper = threading.Event()
+
+    def get_entry(self, key: str, memory_only: bool = False) -> Optional[CacheEntry]:
+        """
+        Get an entry if it exists and is not expired, marking it as recently used.
+        With `memory_only`, a miss in memory returns None without reading the persistent store or counting the lookup,
+        so that the store can be read later, e.g. off the event loop.
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry.is_expired():
+                self._remove(key)
+                self.expirations += 1
+                entry = None
+            if entry is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                entry.hits += 1
+                return entry
+            if memory_only and self.store is not None:
+                return None
+            if self.store is None:
+                self.misses += 1
+                return None
+
+        entry = self.store.load(key, self.stale_minutes)
+        if entry is not None and entry.is_expired():
+            self.store.delete(key)
+            entry = None
+        with self._lock:
+            if entry is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+            entry.hits += 1
+            # An entry too large for memory is still served, straight from the store
+            self._insert(key, entry)
+            return entry
+
+    def load_from_store(self, key: str) -> Optional[CacheEntry]:
+        """
+        Load an entry from the persistent store into memory, replacing the one in memory, e.g. once another process
+        sharing the store has fetched the profile again. No lookup is counted.
+        """
+        if self.store is None:
+            return None
+        entry = self.store.load(key, self.stale_minutes)
+        if entry is None or entry.is_expired():
+            return None
+        with self._lock:
+            self._insert(key, entry)
+        return entry
+
+    def peek(self, key: str) -> Optional[CacheEntry]:
+        """Get an in-memory entry even if it expired, without counting a lookup or marking it as used"""
+        with self._lock:
+            return self._entries.get(key)
+
+    def new_entry(self, ingest: ProfileIngest) -> CacheEntry:
+        """Create an entry with this cache's TTL, to be added later with put_entry"""
+        return CacheEntry(ingest, self.ttl_minutes, stale_minutes=self.stale_minutes)
+
+    def put_entry(self, key: str, entry: CacheEntry) -> bool:
+        """Add an entry, evicting least recently used entries to stay within limits. Returns False if the entry is too large to cache."""
+        with self._lock:
+            if not self._insert(key, entry):
+                return False
+        if self.store is not None:
+            self.store.save(key, entry)
+        return True
+
+    def _insert(self, key: str, entry: CacheEntry) -> bool:
+        """Add an entry in memory, replacing the one under its key. Returns False, leaving it out, if it alone is over the byte budget."""
+        if key in self._entries:
+            self._remove(key)
+        if entry.size > self.max_bytes:
+            return False
+        self._entries[key] = entry
+        self._size += entry.size
+        entry._owner = (self, key)
+        self._evict()
+        return True
+
+    def _evict(self):
+        # Entries evicted from memory are kept in the persistent store until they expire
+        while len(self._entries) > self.max_entries or self._size > self.max_bytes:
+            oldest_key = next(iter(self._entries))
+            self._remove(oldest_key)
+            self.evictions += 1
+
+    def _remove(self, key: str):
+        entry = self._entries.pop(key)
+        self._size -= entry.size
+        entry._owner = None
+
+    def _resize(self, key: str, entry: CacheEntry):
+        """
+        Measure an entry again once its response was encoded or more of it was rendered, evicting entries to stay within the byte budget.
+        An entry grown over the whole budget is dropped on its own, rather than evicting every other entry first.
+        """
+        with self._lock:
+            size = entry._measure()
+            if self._entries.get(key) is not entry:
+                entry.size = size
+                return
+            self._size += size - entry.size
+            entry.size = size
+            if size > self.max_bytes:
+                self._remove(key)
+                self.evictions += 1
+            else:
+                self._evict()
+
+    def sweep(self) -> int:
+        """Remove all expired entries, returns the number of entries removed"""
+        with self._lock:
+            expired_keys = [key for key, entry in self._entries.items() if entry.is_expired()]
+            for key in expired_keys:
+                self._remove(key)
+            self.expirations += len(expired_keys)
+        if self.store is not None:
+            self.store.purge_expired(self.stale_minutes)
+        return len(expired_keys)
+
+    def _sweep_loop(self):
+        while not self._stop_sweeper.wait(self.sweep_interval_seconds):
+            removed = self.sweep()
+            if removed:
+                print(f"Swept {removed} expired cache entries")
+
+    def start_sweeper(self):
+        """Start the background thread that periodically removes expired entries"""
+        if self._sweeper is None and self.sweep_interval_seconds > 0:
+            self._stop_sweeper.clear()
+            self._sweeper = threading.Thread(target=self._sweep_loop, name="profile-cache-sweeper", daemon=True)
+            self._sweeper.start()
+
+    def stop_sweeper(self):
+        self._stop_sweeper.set()
+        if self._sweeper is not None:
+            self._sweeper.join()
+            self._sweeper = None
+
+    def hot_keys(self, min_hits: int, expiring_within_minutes: float) -> List[str]:
+        """Keys of entries read at least `min_hits` times that become stale within the given time, most used first"""
+        deadline = datetime.now() + timedelta(minutes=expiring_within_minutes)
+        with self._lock:
+            hot = [(entry.hits, key) for key, entry in self._entries.items() if entry.hits >= min_hits and entry.expires_at <= deadline]
+        return [key for _, key in sorted(hot, reverse=True)]
+
+    def __contains__(self, key: str) -> bool:
+        with self._lock:
+            return key in self._entries
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "size_bytes": self._size,
+                "max_entries": self.max_entries,
+                "max_size_bytes": self.max_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_ratio": self.hits / lookups if lookups else 0.0,
+                "evictions": self.evictions,
+                "expirations": self.expirations,
+            }
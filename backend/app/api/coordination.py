@@ -0,0 +1,313 @@
+"""
+Coordination between several processes serving the same LinkedIn accounts, e.g. uvicorn workers or replicas.
+
+A backend shares four things between the processes:
+- the profile cache, so that a profile fetched by one process is served by all of them,
+- a registry of the queued and running fetches, so that queue positions, estimates and the queue limit cover every process,
+- locks, so that a profile is fetched by one process at a time and an account serves one fetch at a time,
+- the records of the jobs of the job API, so that a job can be polled on any process.
+
+Locks and registry entries expire after `lock_ttl_seconds` unless the process holding them keeps them alive with
+`heartbeat`, so that a process that goes away does not hold up the others.
+"""
+from .cache import CacheEntry, SQLiteCacheStore
+from .ingest import ProfileIngest
+from abc import ABC, abstractmethod
+from datetime import datetime
+import json
+import os
+import socket
+import sqlite3
+import threading
+import time
+import uuid
+import zlib
+from typing import Dict, List, Optional, Set
+
+try:
+    import redis
+except ImportError:
+    redis = None
+
+
+class CoordinationBackend(ABC):
+    """Bookkeeping of the locks and registry entries of this process, the storage is up to the subclasses"""
+    def __init__(self, lock_ttl_seconds: float = 30):
+        self.lock_ttl_seconds = lock_ttl_seconds
+        # Identifies this process as the holder of locks and registry entries
+        self.owner = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+        # Store of the shared profile cache, used by ProfileCache
+        self.cache_store = None
+        self._locks: Set[str] = set()
+        self._entries: Dict[str, dict] = {}
+
+    def acquire(self, name: str) -> bool:
+        """Take a lock without waiting, returns False if another process holds it. Taking a lock again extends it."""
+        if self._try_lock(name, time.time() + self.lock_ttl_seconds):
+            self._locks.add(name)
+            return True
+        return False
+
+    def release(self, name: str):
+        """Release a lock if this process holds it"""
+        if name in self._locks:
+            self._locks.discard(name)
+            self._unlock(name)
+
+    def queue_put(self, public_id: str, **fields):
+        """Add or update this process's registry entry of a fetch: its priority, client, enqueued_at and started_at"""
+        entry = self._entries.setdefault(public_id, {"public_id": public_id, "owner": self.owner})
+        entry.update(fields)
+        self._write_entry(entry, time.time() + self.lock_ttl_seconds)
+
+    def queue_remove(self, public_id: str):
+        if self._entries.pop(public_id, None) is not None:
+            self._delete_entry(public_id)
+
+    @abstractmethod
+    def queue_entries(self) -> List[dict]:
+        """The registry entries of every process that are still alive"""
+
+    @abstractmethod
+    def job_put(self, job_id: str, record: dict, expires_at: float):
+        """Store the record of a job, replacing the previous one, so that every process can report the job until `expires_at`"""
+
+    @abstractmethod
+    def job_get(self, job_id: str) -> Optional[dict]:
+        """The record of a job stored by any process, None if there is none or it expired"""
+
+    def heartbeat(self):
+        """Extend the locks and registry entries of this process"""
+        expires_at = time.time() + self.lock_ttl_seconds
+        for name in list(self._locks):
+            if not self._try_lock(name, expires_at):
+                # Not extended in time, another process took it over
+                print(f"Lost coordination lock {name}")
+                self._locks.discard(name)
+        for entry in self._entries.values():
+            self._write_entry(entry, expires_at)
+
+    def close(self):
+        """Release everything this process holds"""
+        for name in list(self._locks):
+            self.release(name)
+        for public_id in list(self._entries):
+            self.queue_remove(public_id)
+
+    @abstractmethod
+    def _try_lock(self, name: str, expires_at: float) -> bool:
+        pass
+
+    @abstractmethod
+    def _unlock(self, name: str):
+        pass
+
+    @abstractmethod
+    def _write_entry(self, entry: dict, expires_at: float):
+        pass
+
+    @abstractmethod
+    def _delete_entry(self, public_id: str):
+        pass
+
+
+class SQLiteCoordinationBackend(CoordinationBackend):
+    """
+    Coordinates the processes of a single machine through a SQLite database, relying on SQLite's file locking.
+    The profile cache is stored in the same database.
+    """
+    def __init__(self, path: str, lock_ttl_seconds: float = 30, compression_level: int = 6):
+        super().__init__(lock_ttl_seconds)
+        self.path = path
+        self.cache_store = SQLiteCacheStore(path, compression_level=compression_level)
+        self._conn: Optional[sqlite3.Connection] = None
+        self._lock = threading.Lock()
+
+    def _connect(self) -> sqlite3.Connection:
+        if self._conn is None:
+            # Autocommit, every statement is atomic on its own
+            self._conn = sqlite3.connect(self.path, timeout=10, isolation_level=None, check_same_thread=False)
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("CREATE TABLE IF NOT EXISTS locks (name TEXT PRIMARY KEY, owner TEXT NOT NULL, expires_at REAL NOT NULL)")
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS queue ("
+                "public_id TEXT PRIMARY KEY, owner TEXT NOT NULL, expires_at REAL NOT NULL, entry TEXT NOT NULL)"
+            )
+            self._conn.execute("CREATE TABLE IF NOT EXISTS jobs (job_id TEXT PRIMARY KEY, expires_at REAL NOT NULL, record TEXT NOT NULL)")
+        return self._conn
+
+    def _try_lock(self, name: str, expires_at: float) -> bool:
+        with self._lock:
+            cursor = self._connect().execute(
+                "INSERT INTO locks (name, owner, expires_at) VALUES (?, ?, ?) "
+                "ON CONFLICT(name) DO UPDATE SET owner = excluded.owner, expires_at = excluded.expires_at "
+                "WHERE locks.owner = excluded.owner OR locks.expires_at < ?",
+                (name, self.owner, expires_at, time.time()),
+            )
+            return cursor.rowcount == 1
+
+    def _unlock(self, name: str):
+        with self._lock:
+            self._connect().execute("DELETE FROM locks WHERE name = ? AND owner = ?", (name, self.owner))
+
+    def _write_entry(self, entry: dict, expires_at: float):
+        with self._lock:
+            self._connect().execute(
+                "INSERT OR REPLACE INTO queue (public_id, owner, expires_at, entry) VALUES (?, ?, ?, ?)",
+                (entry["public_id"], self.owner, expires_at, json.dumps(entry)),
+            )
+
+    def _delete_entry(self, public_id: str):
+        with self._lock:
+            self._connect().execute("DELETE FROM queue WHERE public_id = ? AND owner = ?", (public_id, self.owner))
+
+    def queue_entries(self) -> List[dict]:
+        with self._lock:
+            conn = self._connect()
+            conn.execute("DELETE FROM queue WHERE expires_at < ?", (time.time(),))
+            rows = conn.execute("SELECT entry FROM queue").fetchall()
+        return [json.loads(entry) for entry, in rows]
+
+    def job_put(self, job_id: str, record: dict, expires_at: float):
+        with self._lock:
+            conn = self._connect()
+            conn.execute("DELETE FROM jobs WHERE expires_at < ?", (time.time(),))
+            conn.execute("INSERT OR REPLACE INTO jobs (job_id, expires_at, record) VALUES (?, ?, ?)", (job_id, expires_at, json.dumps(record)))
+
+    def job_get(self, job_id: str) -> Optional[dict]:
+        with self._lock:
+            row = self._connect().execute("SELECT record FROM jobs WHERE job_id = ? AND expires_at >= ?", (job_id, time.time())).fetchone()
+        return json.loads(row[0]) if row is not None else None
+
+    def close(self):
+        super().close()
+        self.cache_store.close()
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+
+class RedisCacheStore:
+    """
+    Stores cache entries in Redis, with the same interface as SQLiteCacheStore.
+    Redis removes each entry itself once it is past its stale period.
+    """
+    def __init__(self, client, key_prefix: str = "", compression_level: int = 6):
+        self.client = client
+        self.key_prefix = key_prefix
+        self.compression_level = compression_level
+
+    def _key(self, key: str) -> str:
+        return f"{self.key_prefix}profile:{key}"
+
+    def load(self, key: str, stale_minutes: float = 0) -> Optional[CacheEntry]:
+        created_at, expires_at, payload = self.client.hmget(self._key(key), "created_at", "expires_at", "payload")
+        if payload is None:
+            return None
+        data = zlib.decompress(payload)
+        return CacheEntry(ProfileIngest.from_json(data), created_at=datetime.fromtimestamp(float(created_at)), expires_at=datetime.fromtimestamp(float(expires_at)), stale_minutes=stale_minutes, size=len(data))
+
+    def save(self, key: str, entry: CacheEntry):
+        payload = zlib.compress(entry.ingest.to_json().encode("utf-8"), self.compression_level)
+        pipe = self.client.pipeline()
+        pipe.hset(self._key(key), mapping={
+            "created_at": entry.created_at.timestamp(),
+            "expires_at": entry.expires_at.timestamp(),
+            "payload": payload,
+        })
+        pipe.pexpireat(self._key(key), int(entry.stale_until.timestamp() * 1000))
+        pipe.execute()
+
+    def delete(self, key: str):
+        self.client.delete(self._key(key))
+
+    def purge_expired(self, stale_minutes: float = 0) -> int:
+        return 0
+
+    def close(self):
+        pass
+
+
+class RedisCoordinationBackend(CoordinationBackend):
+    """
+    Coordinates processes on any number of machines through Redis, or a server speaking its protocol.
+    `client` is a redis.Redis instance (or a stand-in such as fakeredis in tests) created without decode_responses.
+    """
+    def __init__(self, client, key_prefix: str = "linkedingest:", lock_ttl_seconds: float = 30, compression_level: int = 6):
+        super().__init__(lock_ttl_seconds)
+        self.client = client
+        self.key_prefix = key_prefix
+        self.cache_store = RedisCacheStore(client, key_prefix, compression_level)
+        self._queue_key = f"{key_prefix}queue"
+
+    @classmethod
+    def from_url(cls, url: str, **kwargs) -> "RedisCoordinationBackend":
+        if redis is None:
+            raise Exception("The redis package is required for the redis coordination backend")
+        return cls(redis.Redis.from_url(url), **kwargs)
+
+    def _lock_key(self, name: str) -> str:
+        return f"{self.key_prefix}lock:{name}"
+
+    def _try_lock(self, name: str, expires_at: float) -> bool:
+        key = self._lock_key(name)
+        expires_at_ms = int(expires_at * 1000)
+        if self.client.set(key, self.owner, nx=True, pxat=expires_at_ms):
+            return True
+        # Extend the lock if this process already holds it, unless it changes hands in the meantime
+        with self.client.pipeline() as pipe:
+            try:
+                pipe.watch(key)
+                if pipe.get(key) != self.owner.encode():
+                    return False
+                pipe.multi()
+                pipe.pexpireat(key, expires_at_ms)
+                pipe.execute()
+                return True
+            except redis.WatchError:
+                return False
+
+    def _unlock(self, name: str):
+        key = self._lock_key(name)
+        with self.client.pipeline() as pipe:
+            try:
+                pipe.watch(key)
+                if pipe.get(key) == self.owner.encode():
+                    pipe.multi()
+                    pipe.delete(key)
+                    pipe.execute()
+            except redis.WatchError:
+                pass
+
+    def _write_entry(self, entry: dict, expires_at: float):
+        self.client.hset(self._queue_key, entry["public_id"], json.dumps({**entry, "expires_at": expires_at}))
+
+    def _delete_entry(self, public_id: str):
+        value = self.client.hget(self._queue_key, public_id)
+        if value is not None and json.loads(value)["owner"] == self.owner:
+            self.client.hdel(self._queue_key, public_id)
+
+    def queue_entries(self) -> List[dict]:
+        now = time.time()
+        entries, expired = [], []
+        for public_id, value in self.client.hgetall(self._queue_key).items():
+            entry = json.loads(value)
+            if entry.pop("expires_at") < now:
+                expired.append(public_id)
+            else:
+                entries.append(entry)
+        if expired:
+            self.client.hdel(self._queue_key, *expired)
+        return entries
+
+    def job_put(self, job_id: str, record: dict, expires_at: float):
+        self.client.set(f"{self.key_prefix}job:{job_id}", json.dumps(record), pxat=int(expires_at * 1000))
+
+    def job_get(self, job_id: str) -> Optional[dict]:
+        value = self.client.get(f"{self.key_prefix}job:{job_id}")
+        return json.loads(value) if value is not None else None
+
+    def close(self):
+        super().close()
+        self.client.close()
@@ -0,0 +1,355 @@
+"""
+Renders raw LinkedIn profile and posts data into the text sections of a profile ingest.
+
+Every section is built from a list of parts that is joined once at the end, so rendering
+stays linear in the size of the profile even for users with hundreds of posts.
+
+Each text section has a renderer registered in SECTION_RENDERERS, so that sections can be
+rendered one at a time, only when they are needed (see ingest.py).
+"""
+from datetime import datetime
+from typing import Callable, Dict, List, Optional
+
+# Header line of each text section, keyed by ProfileResponse field name. The summary has none, it starts with the name.
+SECTION_HEADERS = {
+    "experience": "# EXPERIENCES\n",
+    "education": "# EDUCATION\n",
+    "projects": "# PROJECTS\n",
+    "honors": "# HONORS\n",
+    "skills": "# SKILLS\n",
+    "languages": "# LANGUAGES\n",
+    "certifications": "# LICENSES AND CERTIFICATIONS\n",
+    "publications": "# PUBLICATIONS\n",
+    "volunteer": "# VOLUNTEER\n",
+    "posts": "# POSTS\n",
+}
+
+
+def is_ongoing(experience: dict) -> bool:
+    if experience.get("timePeriod", False) == False:
+        return True
+    if experience["timePeriod"].get("endDate", False) == False:
+        return True
+    end_date = experience["timePeriod"]["endDate"]
+    end_year = end_date["year"]
+    end_month = end_date.get("month", 12)  # Default to December if month is not provided
+    if datetime(end_year, end_month, 1) < datetime.now():
+        return False
+    else:
+        return True
+
+def format_date(date: dict, precision: str = "day") -> str:
+    """
+    Formats a date object from LinkedIn API into a string in yyyy-mm-dd format.
+    "year" is a required field in the date object.
+    "month" and "day" are optional fields, they are omitted if not provided (i.e. yyyy-mm or yyyy).
+    """
+    year = date["year"]
+    month = date.get("month", None)
+    day = date.get("day", None)
+    if precision == "year":
+        return f"{year}"
+    elif precision == "month":
+        return f"{year}-{month:02d}" if month else f"{year}"
+    elif precision == "day":
+        return f"{year}-{month:02d}-{day:02d}" if month and day else f"{year}-{month:02d}" if month else f"{year}"
+    else:
+        raise ValueError("Invalid precision value. Must be 'year', 'month', or 'day'.")
+
+def format_duration(timePeriod: dict, startPropName: str = "startDate", endPropName: str = "endDate", prefix: str = "DURATION: ", suffix: str = "\n") -> str:
+    """
+    Formats a timePeriod object from LinkedIn API into a string in the format "DURATION: yyyy-mm to yyyy-mm" or "DURATION: yyyy-mm to Present".
+    """
+    start_date = timePeriod.get(startPropName, None)
+    end_date = timePeriod.get(endPropName, None)
+    # call format_date
+    start_str = format_date(start_date, "month") if start_date else "Unknown"
+    end_str = format_date(end_date, "month") if end_date else "Present"
+    return f"{prefix}{start_str} to {end_str}{suffix}"
+
+def _status(item: dict) -> str:
+    return "[Current]\n" if is_ongoing(item) else "[Previous]\n"
+
+def _join_entries(header: str, entries: List[str]) -> str:
+    """
+    Joins the entries of a section under its header.
+    Every entry ends with a newline and entries are separated by a blank line.
+    """
+    return header + "\n".join(entries)[:-1]
+
+
+def render_full_name(profile: dict) -> str:
+    parts = [profile["firstName"]]
+    if profile.get("middleName", False):
+        parts.append(profile["middleName"])
+    parts.append(profile["lastName"])
+    return " ".join(parts)
+
+def render_summary(profile: dict, full_name: str) -> str:
+    parts = [f"PROFILE OF: {full_name}\n"]
+    if profile.get("headline", "--") != "--":
+        parts.append(f"HEADLINE: {profile["headline"]}\n")
+    parts.append(f"LOCATION: {f"{profile["geoLocationName"]}, " if profile.get("geoLocationName", False) else ""}{profile.get("geoCountryName", "")}\n")
+    if profile.get("summary", False):
+        parts.append(f'\n# ABOUT\n"""\n{profile["summary"]}\n"""\n')
+    return "".join(parts)[:-1] # remove the last newline character
+
+def render_experience(profile: dict) -> str:
+    if not profile.get("experience", False):
+        return ""
+    entries = []
+    for experience in profile["experience"]:
+        parts = [_status(experience), f"{experience['title']}"]
+        if experience.get("companyName", False):
+            parts.append(f" at {experience['companyName']}")
+        parts.append("\n")
+        if experience.get("timePeriod", False):
+            parts.append(format_duration(experience["timePeriod"]))
+        if experience.get("description", False):
+            parts.append(f'DESCRIPTION:\n"""\n{experience["description"]}\n"""\n')
+        entries.append("".join(parts))
+    return _join_entries(SECTION_HEADERS["experience"], entries)
+
+def render_education(profile: dict) -> str:
+    if not profile.get("education", False):
+        return ""
+    entries = []
+    for education in profile["education"]:
+        parts = [_status(education), f"INSTITUTION: {education['schoolName']}\n"]
+        if education.get("degreeName", False):
+            parts.append(f"DEGREE: {education['degreeName']}\n")
+        if education.get("fieldOfStudy", False):
+            parts.append(f"FIELD OF STUDY: {education['fieldOfStudy']}\n")
+        if education.get("timePeriod", False):
+            parts.append(format_duration(education["timePeriod"]))
+        if education.get("grade", False):
+            parts.append(f"GRADE: {education['grade']}\n")
+        if education.get("activities", False):
+            parts.append(f'ACTIVITIES AND SOCIETIES:\n"""\n{education['activities']}\n"""\n')
+        if education.get("description", False):
+            parts.append(f'DESCRIPTION:\n"""\n{education["description"]}\n"""\n')
+        entries.append("".join(parts))
+    return _join_entries(SECTION_HEADERS["education"], entries)
+
+def render_projects(profile: dict, full_name: str) -> str:
+    if not profile.get("projects", False):
+        return ""
+    entries = []
+    for project in profile["projects"]:
+        parts = [_status(project), f"NAME: {project["title"]}\n"]
+        num_members = len(project.get("members", [True])) # Min number of members is 1
+        parts.append(f"MEMBERS: {full_name}")
+        if num_members > 1:
+            parts.append(f" and {num_members - 1} other(s)")
+        parts.append("\n")
+        if project.get("timePeriod", False):
+            parts.append(format_duration(project["timePeriod"]))
+        if project.get("description", False):
+            parts.append(f'DESCRIPTION:\n"""\n{project["description"]}\n"""\n')
+        entries.append("".join(parts))
+    return _join_entries(SECTION_HEADERS["projects"], entries)
+
+def render_honors(profile: dict) -> str:
+    if not profile.get("honors", False):
+        return ""
+    entries = []
+    for honor in profile["honors"]:
+        parts = [f"NAME: {honor['title']}\n"]
+        if honor.get("issuer", False):
+            parts.append(f"ISSUED BY: {honor['issuer']}\n")
+        if honor.get("issueDate", False):
+            parts.append(f"ISSUE DATE: {format_date(honor['issueDate'])}\n")
+        if honor.get("description", False):
+            parts.append(f'DESCRIPTION:\n"""\n{honor["description"]}\n"""\n')
+        entries.append("".join(parts))
+    return _join_entries(SECTION_HEADERS["honors"], entries)
+
+def render_skills(profile: dict) -> str:
+    if not profile.get("skills", False):
+        return ""
+    return SECTION_HEADERS["skills"] + ", ".join([skill["name"] for skill in profile["skills"]])
+
+def render_languages(profile: dict) -> str:
+    if not profile.get("languages", False):
+        return ""
+    languages = []
+    for language in profile["languages"]:
+        if language.get("proficiency", False):
+            languages.append(f"{language['name']} ({language['proficiency']})")
+        else:
+            languages.append(language['name'])
+    return SECTION_HEADERS["languages"] + ", ".join(languages)
+
+def render_certifications(profile: dict) -> str:
+    if not profile.get("certifications", False):
+        return ""
+    entries = []
+    for certification in profile["certifications"]:
+        parts = [f"NAME: {certification['name']}\n"]
+        if certification.get("authority", False):
+            parts.append(f"ISSUED BY: {certification['authority']}\n")
+        if certification.get("timePeriod", False):
+            parts.append(f"ISSUE DATE: {format_date(certification["timePeriod"]["startDate"])}\n")
+        if certification.get("description", False):
+            parts.append(f'DESCRIPTION:\n"""\n{certification["description"]}\n"""\n')
+        entries.append("".join(parts))
+    return _join_entries(SECTION_HEADERS["certifications"], entries)
+
+def render_publications(profile: dict, full_name: str) -> str:
+    if not profile.get("publications", False):
+        return ""
+    entries = []
+    for publication in profile["publications"]:
+        parts = [f"TITLE: {publication['name']}\n"]
+        if publication.get("authors", False):
+            num_authors = len(publication.get("authors", [True]))
+            parts.append(f"AUTHORS: {full_name}{f' and {num_authors - 1} other(s)' if num_authors > 1 else ''}\n")
+        if publication.get("date", False):
+            parts.append(f"PUBLICATION DATE: {format_date(publication['date'])}\n")
+        if publication.get("description", False):
+            parts.append(f'DESCRIPTION:\n"""\n{publication["description"]}\n"""\n')
+        entries.append("".join(parts))
+    return _join_entries(SECTION_HEADERS["publications"], entries)
+
+def render_volunteer(profile: dict) -> str:
+    if not profile.get("volunteer", False):
+        return ""
+    entries = []
+    for volunteer in profile["volunteer"]:
+        parts = [_status(volunteer), f"{volunteer['role']} at {volunteer['companyName']}\n"]
+        if volunteer.get("cause", False):
+            parts.append(f"CAUSE: {volunteer['cause']}\n")
+        if volunteer.get("timePeriod", False):
+            parts.append(format_duration(volunteer["timePeriod"]))
+        if volunteer.get("description", False):
+            parts.append(f'DESCRIPTION:\n"""\n{volunteer["description"]}\n"""\n')
+        entries.append("".join(parts))
+    return _join_entries(SECTION_HEADERS["volunteer"], entries)
+
+def render_post(post: dict, member_urn: str) -> str:
+    # Here:
+    #   "post" is a post that the user has created themselves;
+    #   "repost" is a post that the user has reposted from another user without any additional commentary;
+    #   "reshare" is a post that the user has reposted from another user with additional commentary;
+    # If the post is a "repost", the LinkedIn API directly gives us the original data in the post object. Everything is linked to the original post.
+    # If the post is a "reshare", he LinkedIn API gives us the original post data in the "resharedUpdate" field.
+    # This is not yet confirmed to be the general case, but it seems to be true for the posts tested so far.
+    post_type = "post"
+    orig_content = ""
+    orig_author = None
+    orig_author_name = None
+    orig_author_headline = None
+    orig_company_name = None
+    if post["actor"]["urn"] != member_urn:
+        post_type = "repost"
+        if post["actor"]["image"]["attributes"][0].get("miniProfile", False):
+            orig_author = post["actor"]["image"]["attributes"][0]["miniProfile"]
+            orig_author_name = orig_author["firstName"] + " " + orig_author["lastName"]
+            orig_author_headline = orig_author.get("occupation", None)
+        elif post["actor"]["image"]["attributes"][0].get("miniCompany", False):
+            orig_company_name = post["actor"]["image"]["attributes"][0]["miniCompany"].get("name", None)
+    elif post.get("resharedUpdate", False):
+        post_type = "reshare"
+        try:
+            orig_content = post["resharedUpdate"]["commentary"]["text"]["text"]
+        except KeyError:
+            orig_content = None
+        if post["resharedUpdate"]["actor"]["image"]["attributes"][0].get("miniProfile", False):
+            orig_author = post["resharedUpdate"]["actor"]["image"]["attributes"][0]["miniProfile"]
+            orig_author_name = orig_author["firstName"] + " " + orig_author["lastName"]
+            orig_author_headline = orig_author.get("occupation", None)
+        elif post["resharedUpdate"]["actor"]["image"]["attributes"][0].get("miniCompany", False):
+            orig_company_name = post["resharedUpdate"]["actor"]["image"]["attributes"][0]["miniCompany"].get("name", None)
+
+    num_comments = post["socialDetail"]["totalSocialActivityCounts"]["numComments"]
+    num_shares = post["socialDetail"]["totalSocialActivityCounts"]["numShares"]
+    reactions = post["socialDetail"]["totalSocialActivityCounts"]["reactionTypeCounts"]
+    reaction_str = ", ".join([f"{reaction['count']} ({reaction['reactionType']})" for reaction in reactions])
+    post_content = None
+    try:
+        post_content = post["commentary"]["text"]["text"]
+    except KeyError:
+        post_content = None
+
+    parts = []
+    attribution_prefix = "COMPANY" if orig_company_name else "AUTHOR"
+    if post_type == "post":
+        parts.append("[Posted]\n")
+    if post_type == "reshare":
+        parts.append("[Reshared a post]\n")
+        parts.append(f"RESHARED FROM:\n- {attribution_prefix}: {orig_author_name if orig_author_name else orig_company_name}\n")
+        if orig_author_headline:
+            parts.append(f"- HEADLINE: {orig_author_headline}\n")
+    if post_type == "repost":
+        parts.append("[Reposted a post]\n")
+        parts.append(f"REPOSTED FROM:\n- {attribution_prefix}: {orig_author_name if orig_author_name else orig_company_name}\n")
+        if orig_author_headline:
+            parts.append(f"- HEADLINE: {orig_author_headline}\n")
+    parts.append(f"REACTIONS: {reaction_str}\n")
+    parts.append(f"COMMENTS: {num_comments}\n")
+    parts.append(f"SHARES: {num_shares}\n")
+    if post_type == "reshare" and orig_content:
+        parts.append(f'ORIGINAL CONTENT:\n"""\n{orig_content}\n"""\n')
+
+    if post_content:
+        content_prefix = "CONTENT:" if post_type == "post" else "ORIGINAL CONTENT:" if post_type == "repost" else "RESHARE COMMENTARY:"
+        parts.append(f'{content_prefix}\n"""\n{post_content}\n"""\n')
+    return "".join(parts)
+
+def post_urn(post: dict) -> Optional[str]:
+    """Identifier of a raw post, used to recognize posts that were already fetched"""
+    return post.get("updateMetadata", {}).get("urn") or post.get("entityUrn")
+
+def render_post_entries(posts: list, profile: dict) -> List[str]:
+    """Every post rendered on its own, to be put together with join_posts"""
+    member_urn = profile["member_urn"]
+    return [render_post(post, member_urn) for post in posts]
+
+def join_posts(entries: List[str]) -> str:
+    """The posts section made of already rendered posts"""
+    if not entries:
+        return ""
+    return _join_entries(SECTION_HEADERS["posts"], entries)
+
+def render_posts(posts: Optional[list], profile: dict) -> str:
+    if not posts:
+        return ""
+    return join_posts(render_post_entries(posts, profile))
+
+def render_profile(profile: dict) -> Dict[str, str]:
+    """Renders every profile section except posts, keyed by ProfileResponse field name"""
+    full_name = render_full_name(profile)
+    return {
+        "full_name": full_name,
+        "summary": render_summary(profile, full_name),
+        "experience": render_experience(profile),
+        "education": render_education(profile),
+        "projects": render_projects(profile, full_name),
+        "honors": render_honors(profile),
+        "skills": render_skills(profile),
+        "languages": render_languages(profile),
+        "certifications": render_certifications(profile),
+        "publications": render_publications(profile, full_name),
+        "volunteer": render_volunteer(profile),
+    }
+
+
+# Renderers of the text sections of a ProfileResponse, keyed by field name.
+# A renderer takes the raw profile and the raw posts (None if they could not be fetched).
+SectionRenderer = Callable[[dict, Optional[list]], str]
+SECTION_RENDERERS: Dict[str, SectionRenderer] = {}
+
+def register_section(name: str, renderer: SectionRenderer):
+    SECTION_RENDERERS[name] = renderer
+
+register_section("summary", lambda profile, posts: render_summary(profile, render_full_name(profile)))
+register_section("experience", lambda profile, posts: render_experience(profile))
+register_section("education", lambda profile, posts: render_education(profile))
+register_section("honors", lambda profile, posts: render_honors(profile))
+register_section("certifications", lambda profile, posts: render_certifications(profile))
+register_section("projects", lambda profile, posts: render_projects(profile, render_full_name(profile)))
+register_section("publications", lambda profile, posts: render_publications(profile, render_full_name(profile)))
+register_section("volunteer", lambda profile, posts: render_volunteer(profile))
+register_section("skills", lambda profile, posts: render_skills(profile))
+register_section("languages", lambda profile, posts: render_languages(profile))
+register_section("posts", lambda profile, posts: render_posts(posts, profile))
@@ -0,0 +1,173 @@
+"""
+A profile ingest whose text sections are rendered on demand.
+
+Sections are rendered the first time they are needed and kept on the ingest, so a client that
+asks for a few sections only pays for those. A section that fails to render is replaced with
+an error notice instead of failing the whole ingest.
+"""
+from ..models.profile import ProfileResponse, RawData, TEXT_SECTIONS
+from .formatter import SECTION_HEADERS, SECTION_RENDERERS, render_full_name, render_post_entries
+from collections import OrderedDict
+from typing import Callable, Dict, Iterable, List, Optional, TYPE_CHECKING
+import json
+import time
+
+if TYPE_CHECKING:
+    from .metrics import AgentMetrics
+
+# Views with fewer posts kept per ingest, the post counts that clients ask for most
+MAX_POST_VIEWS = 4
+
+
+class ProfileIngest:
+    def __init__(self, raw: RawData, full_name: str, sections: Optional[Dict[str, str]] = None, metrics: Optional["AgentMetrics"] = None, posts_depth: Optional[int] = None):
+        self.raw = raw
+        self.full_name = full_name
+        # Number of most recent posts that were asked for when the posts were fetched, None if unknown
+        self.posts_depth = posts_depth
+        # Rendered sections, keyed by ProfileResponse field name
+        self.sections: Dict[str, str] = dict(sections or {})
+        # Sections that failed to render, with the reason
+        self.errors: Dict[str, str] = {}
+        self.metrics = metrics
+        self._response: Optional[ProfileResponse] = None
+        # Views of the ingest with fewer posts, by post count, the least recently used first
+        self._post_views: OrderedDict[int, "ProfileIngest"] = OrderedDict()
+        # Called when the ingest grows, once a section is rendered or a view is created, e.g. by the cache entry holding it
+        self.on_resize: Optional[Callable[[], None]] = None
+        # Posts rendered one by one, to trim the posts section to a budget
+        self._post_entries: Optional[List[str]] = None
+        # Length of the JSON of the raw data, measured the first time it is serialized
+        self._raw_size: Optional[int] = None
+
+    @classmethod
+    def from_raw(cls, raw: RawData, metrics: Optional["AgentMetrics"] = None) -> "ProfileIngest":
+        """Raises if the profile has no name, the one part of an ingest that cannot be left out"""
+        return cls(raw, render_full_name(raw.profile), metrics=metrics)
+
+    @classmethod
+    def from_json(cls, payload: bytes) -> "ProfileIngest":
+        """Loads the output of to_json, or the JSON of a full ProfileResponse"""
+        data = json.loads(payload)
+        raw = RawData(**data.pop("raw"))
+        full_name = data.pop("full_name")
+        posts_depth = data.pop("posts_depth", None)
+        return cls(raw, full_name, {name: text for name, text in data.items() if name in SECTION_RENDERERS}, posts_depth=posts_depth)
+
+    def to_json(self) -> str:
+        """The raw data, the sections rendered so far and the post depth"""
+        parts = self._json_parts({"full_name", "raw", *self.sections})
+        parts.append(f'"posts_depth":{json.dumps(self.posts_depth)}')
+        return "{" + ",".join(parts) + "}"
+
+    def raw_size(self) -> int:
+        """Length of the JSON of the raw data, serialized at most once to measure it"""
+        if self._raw_size is None:
+            self._raw_size = len(self.raw.model_dump_json())
+        return self._raw_size
+
+    def has_posts(self, count: int) -> bool:
+        """Whether the ingest holds the `count` most recent posts, or all of them if there are fewer"""
+        if self.raw.posts is None or self.posts_depth is None:
+            # Posts that failed to fetch, or were fetched before their depth was recorded, are not fetched again
+            return True
+        return self.posts_depth >= count or len(self.raw.posts) < self.posts_depth
+
+    def with_post_count(self, count: int) -> "ProfileIngest":
+        """The ingest limited to its `count` most recent posts, sharing the sections that do not depend on posts"""
+        if self.raw.posts is None or len(self.raw.posts) <= count:
+            return self
+        view = self._post_views.get(count)
+        if view is not None:
+            self._post_views.move_to_end(count)
+            return view
+        view = ProfileIngest(
+            RawData(profile=self.raw.profile, posts=self.raw.posts[:count]),
+            self.full_name,
+            {name: text for name, text in self.sections.items() if name != "posts"},
+            self.metrics,
+            posts_depth=count,
+        )
+        view.on_resize = self._resized
+        self._post_views[count] = view
+        if len(self._post_views) > MAX_POST_VIEWS:
+            self._post_views.popitem(last=False)
+        self._resized()
+        return view
+
+    def rendered_size(self) -> int:
+        """Length of the rendered sections, including those of the views that are not shared with this ingest"""
+        size = sum(len(text) for text in self.sections.values())
+        for view in list(self._post_views.values()):
+            size += sum(len(text) for name, text in view.sections.items() if self.sections.get(name) is not text)
+        return size
+
+    def _resized(self):
+        if self.on_resize is not None:
+            self.on_resize()
+
+    def section(self, name: str) -> str:
+        text = self.sections.get(name)
+        if text is None:
+            text = self.sections[name] = self._render(name)
+            self._resized()
+        return text
+
+    def render(self, names: Iterable[str]):
+        """Render the given sections ahead of time, e.g. on an executor thread while the posts are fetched"""
+        for name in names:
+            self.section(name)
+
+    def post_entries(self) -> Optional[List[str]]:
+        """The posts rendered one by one, None if there are none or they fail to render"""
+        if self._post_entries is None and self.raw.posts:
+            try:
+                self._post_entries = render_post_entries(self.raw.posts, self.raw.profile)
+            except Exception as e:
+                print(f"Failed to process posts: {repr(e)}")
+        return self._post_entries
+
+    def _render(self, name: str) -> str:
+        start = time.perf_counter()
+        try:
+            return SECTION_RENDERERS[name](self.raw.profile, self.raw.posts)
+        except Exception as e:
+            print(f"Failed to process {name}: {repr(e)}")
+            self.errors[name] = repr(e)
+            if self.metrics is not None:
+                self.metrics.section_errors.inc(section=name)
+            return f"{SECTION_HEADERS.get(name, '')}Failed to process {name} data\n"
+        finally:
+            if self.metrics is not None:
+                self.metrics.render_seconds.observe(time.perf_counter() - start, section=name)
+
+    def response(self) -> ProfileResponse:
+        """The full response, rendering every section that was not rendered yet"""
+        if self._response is None:
+            self._response = ProfileResponse(
+                full_name=self.full_name,
+                raw=self.raw,
+                **{name: self.section(name) for name in TEXT_SECTIONS},
+            )
+        return self._response
+
+    def response_json(self, fields: Optional[Iterable[str]] = None) -> str:
+        """JSON of the response restricted to `fields`, in the order of the response model. Only the selected sections are rendered."""
+        if fields is None:
+            return self.response().model_dump_json()
+        return "{" + ",".join(self._json_parts(set(fields))) + "}"
+
+    def _json_parts(self, fields: set) -> List[str]:
+        parts = []
+        for name in ProfileResponse.model_fields:
+            if name not in fields:
+                continue
+            if name == "raw":
+                value = self.raw.model_dump_json()
+                self._raw_size = len(value)
+            elif name == "full_name":
+                value = json.dumps(self.full_name, ensure_ascii=False)
+            else:
+                value = json.dumps(self.section(name), ensure_ascii=False)
+            parts.append(f'"{name}":{value}')
+        return parts
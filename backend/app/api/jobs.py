@@ -0,0 +1,149 @@
+from ..models.profile import ProfileResponse
+from .linkedin import FetchException, QueueFullException
+from typing import Optional, Dict, TYPE_CHECKING
+from datetime import datetime, timedelta
+import asyncio
+import uuid
+
+if TYPE_CHECKING:
+    from .linkedin import LinkedInAgent
+
+
+class Job:
+    """A profile ingest submitted through the job API"""
+    def __init__(self, profile_id: str, post_count: int = 10):
+        self.id = uuid.uuid4().hex
+        self.profile_id = profile_id
+        self.post_count = post_count
+        self.created_at = datetime.now()
+        self.finished_at: Optional[datetime] = None
+        self.task: Optional[asyncio.Task] = None
+        self.result: Optional[ProfileResponse] = None
+        self.error: Optional[Exception] = None
+
+    def _on_done(self, task: asyncio.Task):
+        if self.finished_at is not None:
+            return
+        self.finished_at = datetime.now()
+        if task.cancelled():
+            self.error = Exception("Job was cancelled")
+        elif task.exception() is not None:
+            self.error = task.exception()
+        else:
+            self.result = task.result()
+
+    @property
+    def done(self) -> bool:
+        # The done callback only runs on the next loop iteration, e.g. a cache hit finishes before it
+        if self.finished_at is None and self.task is not None and self.task.done():
+            self._on_done(self.task)
+        return self.finished_at is not None
+
+    def record(self) -> dict:
+        """What the other processes need to report the job, see JobManager.get. The result is read from the shared cache."""
+        return {
+            "profile_id": self.profile_id,
+            "post_count": self.post_count,
+            "created_at": self.created_at.timestamp(),
+            "finished_at": self.finished_at.timestamp() if self.finished_at is not None else None,
+            "error": {"type": type(self.error).__name__, "message": str(self.error)} if self.error is not None else None,
+        }
+
+
+class JobManager:
+    """
+    Runs profile ingests in the background so that clients can submit a profile and poll for
+    its result instead of holding a connection open while it waits in the queue.
+    Finished jobs are forgotten after `ttl_minutes`. With a coordination backend, jobs are also recorded there,
+    so that a job can be polled on any process, not only on the one running it.
+    """
+    def __init__(self, agent: "LinkedInAgent", ttl_minutes: int = 60):
+        self.agent = agent
+        self.ttl_minutes = ttl_minutes
+        self._jobs: Dict[str, Job] = {}
+
+    async def submit(self, profile_id: str, client: str = "", post_count: Optional[int] = None) -> Job:
+        """Starts a job. Raises QueueFullException, without keeping the job, if its fetch cannot be queued."""
+        self._prune()
+        job = Job(profile_id, post_count or self.agent.POSTS_COUNT)
+        queued = asyncio.Event()
+        job.task = asyncio.ensure_future(self.agent.get_ingest(profile_id, client=client, post_count=job.post_count, queued=queued))
+        job.task.add_done_callback(job._on_done)
+        self._jobs[job.id] = job
+        # Wait for the ingest to reach the cache or the queue, so that the job's queue position is known when it is reported
+        waiter = asyncio.ensure_future(queued.wait())
+        try:
+            await asyncio.wait([job.task, waiter], return_when=asyncio.FIRST_COMPLETED)
+        finally:
+            waiter.cancel()
+        if job.done and isinstance(job.error, QueueFullException):
+            del self._jobs[job.id]
+            raise job.error
+        self._share(job)
+        # Runs after the done callback of the job, which was added first
+        job.task.add_done_callback(lambda task: self._share(job))
+        return job
+
+    async def get(self, job_id: str) -> Optional[Job]:
+        """A job of this process, or with a coordination backend, a job of another process as it was last recorded"""
+        job = self._jobs.get(job_id)
+        if job is not None:
+            return job
+        record = await self.agent.get_shared_job(job_id)
+        if record is None:
+            return None
+        job = Job(record["profile_id"], record["post_count"])
+        job.id = job_id
+        job.created_at = datetime.fromtimestamp(record["created_at"])
+        if record["finished_at"] is not None:
+            job.finished_at = datetime.fromtimestamp(record["finished_at"])
+            error = record["error"]
+            if error is not None:
+                job.error = FetchException(error["message"]) if error["type"] == FetchException.__name__ else Exception(error["message"])
+            else:
+                job.result = await self.agent.get_shared_result(job.profile_id, job.post_count)
+                if job.result is None:
+                    job.error = Exception("The profile of this job is no longer cached, submit the job again")
+        return job
+
+    def _share(self, job: Job):
+        self.agent.share_job(job.id, job.record(), self.ttl_minutes * 60)
+
+    async def describe(self, job: Job) -> dict:
+        """
+        Current state of a job: "queued", "running", "done" or "failed".
+        A running job can have a partial result, the profile without its posts.
+        """
+        request = await self.agent.get_request_status(job.profile_id) if not job.done else None
+        # The job may have finished while its request was looked up
+        done = job.done
+        description = {
+            "job_id": job.id,
+            "profile_id": job.profile_id,
+            "created_at": job.created_at,
+            "finished_at": job.finished_at,
+            "queue_position": None,
+            "estimated_completion_timestamp": None,
+            "result": job.result,
+            "partial": False,
+            "error": job.error,
+        }
+        if done:
+            description["status"] = "failed" if job.error is not None else "done"
+            return description
+        position = request["queue_position"]
+        description["status"] = "running" if position == 0 else "queued"
+        if position == 0:
+            # The profile may already be available without its posts
+            partial = self.agent.get_partial_ingest(job.profile_id)
+            if partial is not None:
+                description["result"] = partial
+                description["partial"] = True
+        description["queue_position"] = position
+        description["estimated_completion_timestamp"] = request["estimated_completion_timestamp"]
+        return description
+
+    def _prune(self):
+        expiry = datetime.now() - timedelta(minutes=self.ttl_minutes)
+        for job_id in [job_id for job_id, job in self._jobs.items() if job.done and job.finished_at < expiry]:
+            del self._jobs[job_id]
@@ -1,165 +1,704 @@
-from ..models.profile import ProfileResponse, RawData
+from ..models.profile import ProfileResponse, RawData, TEXT_SECTIONS
+from .cache import CacheEntry, ProfileCache, SQLiteCacheStore
+from .timings import FetchTimer, PhaseTimings
+from .metrics import AgentMetrics
+from .scheduler import FetchScheduler, PRIORITY_INTERACTIVE, PRIORITY_BACKGROUND, PRIORITY_NAMES
+from .formatter import post_urn
+# Re-exported: the date helpers were defined in this module before rendering moved to the formatter
+from .formatter import is_ongoing, format_date, format_duration  # noqa: F401
+from .ingest import ProfileIngest
+from .coordination import CoordinationBackend, SQLiteCoordinationBackend, RedisCoordinationBackend
+from .recording import RecordingLinkedin, ReplayLinkedin, ResponseRecorder
+from .posts import PostsPager, MAX_PAGE_SIZE
 from linkedin_api import Linkedin
-from linkedin_api.client import ChallengeException
+from linkedin_api.client import ChallengeException, UnauthorizedException
 from linkedin_api.cookie_repository import LinkedinSessionExpired
 import dotenv
 import os
-from datetime import datetime, timedelta
 import time
 import random
 import asyncio
-import threading
-from typing import Optional, List, Dict, Tuple
+import heapq
+import math
+import functools
+import signal
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional, List, Dict, Tuple, AsyncIterator
 import yaml
 
+CONFIG_PATH = os.path.join(os.path.dirname(__file__), "../../config.yaml")
+# Settings read from config.yaml: their dotted key and the default used when the key is missing
+CONFIG_SETTINGS = {
+    "CACHE_ENABLED": ("cache.enabled", True),
+    "CACHE_TTL_MINUTES": ("cache.ttl_minutes", 60),
+    "CACHE_MAX_ENTRIES": ("cache.max_entries", 1000),
+    "CACHE_MAX_SIZE_MB": ("cache.max_size_mb", 256),
+    "CACHE_SWEEP_INTERVAL_SECONDS": ("cache.sweep_interval_seconds", 300),
+    "CACHE_STALE_MINUTES": ("cache.stale_while_revalidate_minutes", 0),
+    "REFRESH_AHEAD_ENABLED": ("cache.refresh_ahead.enabled", False),
+    "REFRESH_AHEAD_MIN_HITS": ("cache.refresh_ahead.min_hits", 3),
+    "REFRESH_AHEAD_BEFORE_MINUTES": ("cache.refresh_ahead.before_expiry_minutes", 10),
+    "REFRESH_AHEAD_INTERVAL_SECONDS": ("cache.refresh_ahead.interval_seconds", 60),
+    "CACHE_PERSISTENT_ENABLED": ("cache.persistent.enabled", False),
+    "CACHE_PERSISTENT_PATH": ("cache.persistent.path", "profile_cache.sqlite3"),
+    "CACHE_COMPRESSION_LEVEL": ("cache.persistent.compression_level", 6),
+    "DELAY_ON": ("anti_rate_limiting.delay", True),
+    "MIN_DELAY": ("anti_rate_limiting.min_delay", 5),
+    "MAX_DELAY": ("anti_rate_limiting.max_delay", 15),
+    "NOISE_ON": ("anti_rate_limiting.noise", True),
+    "NOISE_PROBABILITY": ("anti_rate_limiting.noise_probability", 0.3),
+    "FETCH_PLAN": ("fetch.plan", "sequential"),
+    "POSTS_COUNT": ("posts.count", 10),
+    "POSTS_MAX_COUNT": ("posts.max_count", 100),
+    "POSTS_PAGE_SIZE": ("posts.page_size", 10),
+    "EXECUTOR_MAX_WORKERS": ("executor.max_workers", 4),
+    "BATCH_MAX_PROFILES": ("batch.max_profiles", 50),
+    "JOBS_TTL_MINUTES": ("jobs.ttl_minutes", 60),
+    "QUEUE_TIMING_WINDOW": ("queue.timing_window", 50),
+    "QUEUE_MAX_LENGTH": ("queue.max_length", 100),
+    "QUEUE_RESERVED_FOR_INTERACTIVE": ("queue.reserved_for_interactive", 20),
+    "METRICS_ENABLED": ("metrics.enabled", True),
+    "LOGIN_RETRY_INITIAL_SECONDS": ("login.retry_initial_seconds", 5),
+    "LOGIN_RETRY_MAX_SECONDS": ("login.retry_max_seconds", 300),
+    "LOGIN_MAX_ATTEMPTS": ("login.max_attempts", 5),
+    "RELOAD_WATCH_INTERVAL_SECONDS": ("reload.watch_interval_seconds", 10),
+    "COORDINATION_BACKEND": ("coordination.backend", "none"),
+    "COORDINATION_SQLITE_PATH": ("coordination.sqlite_path", "coordination.sqlite3"),
+    "COORDINATION_REDIS_URL": ("coordination.redis_url", "redis://localhost:6379/0"),
+    "COORDINATION_KEY_PREFIX": ("coordination.key_prefix", "linkedingest:"),
+    "COORDINATION_LOCK_TTL_SECONDS": ("coordination.lock_ttl_seconds", 30),
+    "COORDINATION_POLL_INTERVAL_SECONDS": ("coordination.poll_interval_seconds", 0.5),
+    "RECORDING_MODE": ("recording.mode", "none"),
+    "RECORDING_PATH": ("recording.path", "recordings/linkedin.jsonl"),
+    "RECORDING_LATENCY_SCALE": ("recording.latency_scale", 1.0),
+    "RECORDING_REPLAY_ACCOUNTS": ("recording.replay_accounts", 1),
+}
+# Settings that are only read at construction time, a reload warns that they need a restart
+RESTART_SETTINGS = (
+    "CACHE_SWEEP_INTERVAL_SECONDS",
+    "CACHE_PERSISTENT_ENABLED",
+    "CACHE_PERSISTENT_PATH",
+    "CACHE_COMPRESSION_LEVEL",
+    "EXECUTOR_MAX_WORKERS",
+    "JOBS_TTL_MINUTES",
+    "QUEUE_TIMING_WINDOW",
+    "METRICS_ENABLED",
+    "COORDINATION_BACKEND",
+    "COORDINATION_SQLITE_PATH",
+    "COORDINATION_REDIS_URL",
+    "COORDINATION_KEY_PREFIX",
+    "COORDINATION_LOCK_TTL_SECONDS",
+    "RECORDING_MODE",
+    "RECORDING_PATH",
+    "RECORDING_LATENCY_SCALE",
+    "RECORDING_REPLAY_ACCOUNTS",
+)
+
 class FetchException(Exception):
     pass
 class ParseException(Exception):
     pass
+class QueueFullException(Exception):
+    def __init__(self, retry_after: int):
+        super().__init__(f"The queue is full, retry in {retry_after} seconds")
+        self.retry_after = retry_after
 
-def is_ongoing(experience: dict) -> bool:
-    if experience.get("timePeriod", False) == False:
-        return True
-    if experience["timePeriod"].get("endDate", False) == False:
-        return True
-    end_date = experience["timePeriod"]["endDate"]
-    end_year = end_date["year"]
-    end_month = end_date.get("month", 12)  # Default to December if month is not provided
-    if datetime(end_year, end_month, 1) < datetime.now():
-        return False
-    else:
-        return True
-
-def format_date(date: dict, precision: str = "day") -> str:
-    """
-    Formats a date object from LinkedIn API into a string in yyyy-mm-dd format.
-    "year" is a required field in the date object.
-    "month" and "day" are optional fields, they are omitted if not provided (i.e. yyyy-mm or yyyy).
+def load_credentials() -> List[Dict[str, str]]:
     """
-    year = date["year"]
-    month = date.get("month", None)
-    day = date.get("day", None)
-    if precision == "year":
-        return f"{year}"
-    elif precision == "month":
-        return f"{year}-{month:02d}" if month else f"{year}"
-    elif precision == "day":
-        return f"{year}-{month:02d}-{day:02d}" if month and day else f"{year}-{month:02d}" if month else f"{year}"
-    else:
-        raise ValueError("Invalid precision value. Must be 'year', 'month', or 'day'.")
-
-def format_duration(timePeriod: dict, startPropName: str = "startDate", endPropName: str = "endDate", prefix: str = "DURATION: ", suffix: str = "\n") -> str:
+    Reads LinkedIn credential sets from the environment.
+    The first account is LINKEDIN_AGENT_USERNAME/LINKEDIN_AGENT_PASSWORD, additional accounts
+    are LINKEDIN_AGENT_USERNAME_2/LINKEDIN_AGENT_PASSWORD_2, LINKEDIN_AGENT_USERNAME_3/..., and so on.
+    The .env file is read again on every call without being loaded into the environment, so that
+    changed or removed credentials are picked up. Variables set in the environment take precedence.
     """
-    Formats a timePeriod object from LinkedIn API into a string in the format "DURATION: yyyy-mm to yyyy-mm" or "DURATION: yyyy-mm to Present".
-    """
-    start_date = timePeriod.get(startPropName, None)
-    end_date = timePeriod.get(endPropName, None)
-    # call format_date
-    start_str = format_date(start_date, "month") if start_date else "Unknown"
-    end_str = format_date(end_date, "month") if end_date else "Present"
-    return f"{prefix}{start_str} to {end_str}{suffix}"
+    environment = {**dotenv.dotenv_values(dotenv.find_dotenv()), **os.environ}
+    credentials = []
+    index = 1
+    while True:
+        suffix = "" if index == 1 else f"_{index}"
+        username = environment.get(f"LINKEDIN_AGENT_USERNAME{suffix}")
+        password = environment.get(f"LINKEDIN_AGENT_PASSWORD{suffix}")
+        if not (username and password):
+            break
+        credentials.append({"username": username, "password": password})
+        index += 1
+    return credentials
 
 
-class LinkedInAgent:
-    def __init__(self):
-        # get env variables of linkedin credentials
-        dotenv.load_dotenv()
-        credentials = {
-            "username": os.getenv("LINKEDIN_AGENT_USERNAME"),
-            "password": os.getenv("LINKEDIN_AGENT_PASSWORD"),
+class LinkedInAccount:
+    """A LinkedIn client that is served by its own worker once it is logged in"""
+    def __init__(self, name: str, linkedin: Optional[Linkedin] = None, credential: Optional[Dict[str, str]] = None):
+        self.name = name
+        self.linkedin = linkedin
+        # Username and password to log in with, None for an already constructed client
+        self.credential = credential
+        self.active = linkedin is not None
+        self.busy = False
+        self.disabled_reason: Optional[str] = None if self.active else "not logged in yet"
+        self.fetch_count = 0
+        # "pending", "logging_in", "waiting_retry", "logged_in", "failed" or "removed"
+        self.login_state = "logged_in" if self.active else "pending"
+        self.login_attempts = 0
+        self.login_task: Optional[asyncio.Task] = None
+
+    @property
+    def logging_in(self) -> bool:
+        """Whether the account may still become active without the credentials being changed"""
+        return self.login_state in ("pending", "logging_in", "waiting_retry")
+
+    def disable(self, reason: str):
+        self.active = False
+        self.disabled_reason = reason
+
+    def status(self) -> dict:
+        return {
+            "name": self.name,
+            "active": self.active,
+            "busy": self.busy,
+            "disabled_reason": self.disabled_reason,
+            "fetch_count": self.fetch_count,
+            "login_state": self.login_state,
+            "login_attempts": self.login_attempts,
         }
-        
-        if credentials["username"] and credentials["password"]:
-            try:
-                self.linkedin = Linkedin(credentials["username"], credentials["password"], debug=True)
-            except ChallengeException as e:
-                self.linkedin = None
-                raise e
-            except Exception as e:
-                self.linkedin = None
-                raise e
+
+
+class FetchRequest:
+    """A profile fetch waiting in, or being served from, the agent's queue"""
+    def __init__(self, public_id: str, future: asyncio.Future, priority: int = PRIORITY_INTERACTIVE, client: str = "", post_count: int = 10, post_page_size: int = 10):
+        self.public_id = public_id
+        self.future = future
+        self.priority = priority
+        # Number of most recent posts to fetch, and how many to fetch per LinkedIn request
+        self.post_count = post_count
+        self.post_page_size = post_page_size
+        # Who asked for the fetch (its IP address), clients take turns within a priority class
+        self.client = client
+        self.enqueued_at = time.time()
+        self.started_at: Optional[float] = None
+        self.account: Optional[LinkedInAccount] = None
+        # With the "overlap" fetch plan, the profile without its posts while the posts are still being fetched
+        self.partial: Optional[ProfileIngest] = None
+
+
+class LinkedInAgent:
+    def __init__(self, credentials: Optional[List[Dict[str, str]]] = None, clients: Optional[List[Linkedin]] = None, coordination: Optional[CoordinationBackend] = None):
+        """
+        Serves requests with one worker per account, for every credential set (read from the environment
+        by default). Nothing is logged in here so that the app can start serving cached profiles right away:
+        the accounts log in in the background once `start` is called. Already constructed clients can be
+        passed through `clients` instead, e.g. a fake client in tests.
+        With a coordination backend (configured, or passed through `coordination`), several processes share
+        the cache and the queue and never fetch the same profile or use the same account at the same time.
+        With recording.mode set to "record", the responses of LinkedIn are saved, and with "replay", they are
+        served from the recording by simulated accounts instead of logging in (see recording.py).
+        """
+        self._config_loaded = False
+        self.load_config()
+
+        # Relative paths are resolved against the backend directory, where config.yaml lives
+        recording_path = os.path.join(os.path.dirname(__file__), "../..", self.RECORDING_PATH)
+        self._recorder: Optional[ResponseRecorder] = None
+        if self.RECORDING_MODE == "record":
+            self._recorder = ResponseRecorder(recording_path)
+        elif self.RECORDING_MODE == "replay" and clients is None:
+            clients = [ReplayLinkedin.from_file(recording_path, latency_scale=self.RECORDING_LATENCY_SCALE) for _ in range(self.RECORDING_REPLAY_ACCOUNTS)]
+            print(f"Replaying LinkedIn responses from {self.RECORDING_PATH}")
+        elif self.RECORDING_MODE not in ("none", "record", "replay"):
+            raise ValueError(f"Unknown recording mode: {self.RECORDING_MODE}")
+
+        self.accounts: List[LinkedInAccount] = []
+        # Credentials read from the environment are read again by `reload`
+        self._credentials_from_environment = clients is None and credentials is None
+        if clients is not None:
+            for index, client in enumerate(clients):
+                self.accounts.append(LinkedInAccount(f"account-{index + 1}", client))
         else:
-            raise Exception("LinkedIn credentials not provided")
-        print("LinkedIn agent initialized")
+            if credentials is None:
+                credentials = load_credentials()
+            if not credentials:
+                print("LinkedIn credentials not provided, only cached profiles can be served")
+            for index, credential in enumerate(credentials):
+                self.accounts.append(LinkedInAccount(f"account-{index + 1}", credential=credential))
+        print(f"LinkedIn agent initialized with {len(self.accounts)} account(s)")
+
+        # linkedin_api is synchronous, so its calls are run on a bounded thread pool
+        # instead of blocking the event loop while a fetch is in flight.
+        # Every account worker needs a thread of its own to actually run in parallel, see _grow_executor.
+        self._executor_size = max(self.EXECUTOR_MAX_WORKERS, len(self.accounts))
+        self._executor = ThreadPoolExecutor(max_workers=self._executor_size, thread_name_prefix="linkedin-agent")
 
+        # Pending fetches by priority, picked up by whichever account worker is free.
+        # Workers are started lazily because there is no running event loop at construction time,
+        # and for accounts that log in later, once they are logged in.
+        self._scheduler = FetchScheduler(max_length=self.QUEUE_MAX_LENGTH)
+        self._workers: Dict[str, asyncio.Task] = {}
+        self._refresher: Optional[asyncio.Task] = None
+        self._watcher: Optional[asyncio.Task] = None
+        # Modification times of the files read by `reload`, when they were last read
+        self._watched_mtimes = self._read_watched_mtimes()
+        # Requests being fetched, keyed by public_id
+        self._running: Dict[str, FetchRequest] = {}
+        # Measured durations of recent fetches, used to estimate waiting times
+        self._timings = PhaseTimings(window=self.QUEUE_TIMING_WINDOW)
+
+        self._coordination = coordination
+        if self._coordination is None and self.COORDINATION_BACKEND == "sqlite":
+            # Relative paths are resolved against the backend directory, where config.yaml lives
+            self._coordination = SQLiteCoordinationBackend(
+                os.path.join(os.path.dirname(__file__), "../..", self.COORDINATION_SQLITE_PATH),
+                lock_ttl_seconds=self.COORDINATION_LOCK_TTL_SECONDS,
+                compression_level=self.CACHE_COMPRESSION_LEVEL,
+            )
+        elif self._coordination is None and self.COORDINATION_BACKEND == "redis":
+            self._coordination = RedisCoordinationBackend.from_url(
+                self.COORDINATION_REDIS_URL,
+                key_prefix=self.COORDINATION_KEY_PREFIX,
+                lock_ttl_seconds=self.COORDINATION_LOCK_TTL_SECONDS,
+                compression_level=self.CACHE_COMPRESSION_LEVEL,
+            )
+        elif self._coordination is None and self.COORDINATION_BACKEND != "none":
+            raise ValueError(f"Unknown coordination backend: {self.COORDINATION_BACKEND}")
+        # Keeps the locks and queue entries of this process alive
+        self._heartbeat: Optional[asyncio.Task] = None
+        # Calls to the cache store and the coordination backend wait on a database or the network, so they are run
+        # off the event loop, on a single thread so that the updates of the shared registry are made in order
+        self._storage_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="linkedin-agent-storage")
+
+        cache_store = None
+        if self._coordination is not None:
+            # The cache is shared through the coordination backend
+            cache_store = self._coordination.cache_store
+        elif self.CACHE_PERSISTENT_ENABLED:
+            # Relative paths are resolved against the backend directory, where config.yaml lives
+            cache_path = os.path.join(os.path.dirname(__file__), "../..", self.CACHE_PERSISTENT_PATH)
+            cache_store = SQLiteCacheStore(cache_path, compression_level=self.CACHE_COMPRESSION_LEVEL)
+        self._cache = ProfileCache(
+            ttl_minutes=self.CACHE_TTL_MINUTES,
+            max_entries=self.CACHE_MAX_ENTRIES,
+            max_size_mb=self.CACHE_MAX_SIZE_MB,
+            sweep_interval_seconds=self.CACHE_SWEEP_INTERVAL_SECONDS,
+            store=cache_store,
+            stale_minutes=self.CACHE_STALE_MINUTES,
+        )
+        if self.CACHE_ENABLED:
+            self._cache.start_sweeper()
+
+        self.metrics = AgentMetrics(enabled=self.METRICS_ENABLED)
+        self.metrics.add_agent_gauges(self)
+
+        # Fetches currently in flight, keyed by public_id, so that concurrent
+        # requests for the same profile share a single LinkedIn fetch
+        self._inflight: Dict[str, asyncio.Task] = {}
+
+    def load_config(self):
+        """
+        Reads config.yaml into the agent's settings, keys missing from the file keep their default values.
+        If the file cannot be read, a reload keeps the current settings and the first load falls back to the defaults.
+        """
         try:
-            with open(os.path.join(os.path.dirname(__file__), "../../config.yaml"), "r") as f:
+            with open(CONFIG_PATH, "r") as f:
                 config = yaml.safe_load(f)
-                self.CACHE_ENABLED = config["cache"]["enabled"]
-                self.CACHE_TTL_MINUTES = config["cache"]["ttl_minutes"]
-                self.DELAY_ON = config["anti_rate_limiting"]["delay"]
-                self.MIN_DELAY = config["anti_rate_limiting"]["min_delay"]
-                self.MAX_DELAY = config["anti_rate_limiting"]["max_delay"]
-                self.NOISE_ON = config["anti_rate_limiting"]["noise"]
-                self.NOISE_PROBABILITY = config["anti_rate_limiting"]["noise_probability"]
+            if not isinstance(config, dict):
+                raise ValueError("config.yaml is not a mapping of sections")
         except Exception as e:
+            if self._config_loaded:
+                print(f"Failed to reload config, keeping the current settings.\n {repr(e)}")
+                return
             print(f"Failed to load config, falling back to default values.\n {repr(e)}")
-            self.CACHE_ENABLED = True
-            self.CACHE_TTL_MINUTES = 60
-            self.DELAY_ON = True
-            self.MIN_DELAY = 5
-            self.MAX_DELAY = 15
-            self.NOISE_ON = True
-            self.NOISE_PROBABILITY = 0.3
-        
-        self._lock = asyncio.Lock()
-        self._waiting_requests_count = 0
-        self._counter_lock = threading.Lock()
-
-        self._cache: Dict[str, CacheEntry] = {}
-        self._cache_lock = threading.Lock()
+            config = {}
+        for name, (path, default) in CONFIG_SETTINGS.items():
+            value = config
+            for key in path.split("."):
+                value = value.get(key, default) if isinstance(value, dict) else default
+            setattr(self, name, value)
+        self._config_loaded = True
     
-    def _set_counter(self, value: int):
-        with self._counter_lock:
-            self._waiting_requests_count = value
-        
-    def get_queue_status(self) -> dict:
-        # Overestimate the wait time (in seconds)
+    async def get_queue_position(self, public_id: str) -> Optional[int]:
+        """
+        Returns 0 if the profile is being fetched, n if it is the n-th request waiting in the queue,
+        or None if no fetch for it is pending.
+        """
+        return self._queue_position(public_id, await self._queue_snapshot())
+
+    @staticmethod
+    def _queue_position(public_id: str, snapshot: Tuple[Dict[str, float], List[str]]) -> Optional[int]:
+        running, queued = snapshot
+        if public_id in running:
+            return 0
+        if public_id in queued:
+            return queued.index(public_id) + 1
+        return None
+
+    async def _queue_snapshot(self) -> Tuple[Dict[str, float], List[str]]:
+        """
+        The start times of the running fetches by public_id, and the queued public_ids in the order they will be served.
+        With a coordination backend, the fetches of every process are included, queued ones ordered by priority and age.
+        """
+        if self._coordination is None:
+            running = {public_id: request.started_at for public_id, request in self._running.items()}
+            return running, [request.public_id for request in self._scheduler.ordered()]
+        entries = await self._run_storage(self._coordination.queue_entries)
+        running = {entry["public_id"]: entry["started_at"] for entry in entries if entry["started_at"] is not None}
+        queued = sorted((entry for entry in entries if entry["started_at"] is None), key=lambda entry: (entry["priority"], entry["enqueued_at"]))
+        return running, [entry["public_id"] for entry in queued]
+
+    def expected_fetch_seconds(self) -> float:
+        """Mean duration of recent fetches, or an overestimate from the config before any fetch was measured"""
+        measured = self._timings.expected_fetch_seconds()
+        if measured is not None:
+            return measured
         singleWaitTime = 4
         if self.DELAY_ON:
             singleWaitTime += self.MAX_DELAY
         if self.NOISE_ON:
             singleWaitTime += (2 + self.MAX_DELAY) * 0.5 * 2
+        return singleWaitTime
+
+    def _estimate_completions(self, snapshot: Tuple[Dict[str, float], List[str]]) -> Tuple[Dict[str, float], List[float], float]:
+        """
+        Simulates the queue of a snapshot being served by the active accounts with the expected fetch duration.
+        Returns the estimated completion times of running requests (by public_id), of queued requests
+        (in the order they will be served), and of a new request joining the back of the queue now.
+        """
+        now = time.time()
+        expected = self.expected_fetch_seconds()
+        running_started, queued_ids = snapshot
+        running = {
+            public_id: max(started_at + expected, now)
+            for public_id, started_at in running_started.items()
+        }
+        # Time at which each active account becomes free
+        active_accounts = max(len(self.get_active_accounts()), 1)
+        free_at = sorted(running.values())[:active_accounts]
+        free_at += [now] * (active_accounts - len(free_at))
+        heapq.heapify(free_at)
+        queued = []
+        for _ in queued_ids:
+            completion = heapq.heappop(free_at) + expected
+            queued.append(completion)
+            heapq.heappush(free_at, completion)
+        return running, queued, heapq.heappop(free_at) + expected
+
+    async def get_request_status(self, public_id: str) -> dict:
+        """The queue position of the fetch of a profile and its estimated completion timestamp, see get_queue_status"""
+        snapshot = await self._queue_snapshot()
+        return self._request_status(public_id, snapshot, self._estimate_completions(snapshot))
+
+    def _request_status(self, public_id: str, snapshot: Tuple[Dict[str, float], List[str]], completions: Tuple[Dict[str, float], List[float], float]) -> dict:
+        running, queued, _ = completions
+        position = self._queue_position(public_id, snapshot)
+        if position is None:
+            completion = None
+        elif position == 0:
+            completion = running[public_id]
+        else:
+            completion = queued[position - 1]
+        return {
+            "profile_id": public_id,
+            "queue_position": position,
+            "estimated_completion_timestamp": math.ceil(completion) if completion is not None else None,
+        }
+
+    def retry_after_seconds(self) -> int:
+        """Rough time until an account is free to take another request, for clients turned away by a full queue"""
+        return max(1, math.ceil(self.expected_fetch_seconds() / max(len(self.get_active_accounts()), 1)))
+
+    async def get_queue_status(self, public_id: Optional[str] = None) -> dict:
+        """
+        Reports the queue with estimated completion times based on measured fetch durations.
+        If public_id is given, also reports the position and estimated completion time of its request.
+        """
+        snapshot = await self._queue_snapshot()
+        completions = self._estimate_completions(snapshot)
+        running, queued, new_request = completions
+        requests = [{"position": 0, "estimated_completion_timestamp": math.ceil(completion)} for completion in running.values()]
+        requests += [
+            {"position": position, "estimated_completion_timestamp": math.ceil(completion)}
+            for position, completion in enumerate(queued, start=1)
+        ]
+        status = {
+            "waiting_requests_count": len(queued) + len(running),
+            "queued_requests_count": len(queued),
+            "max_queue_length": self._scheduler.max_length,
+            "running_requests_count": len(running),
+            "active_accounts": len(self.get_active_accounts()),
+            "estimated_completion_timestamp": math.ceil(new_request),
+            "expected_fetch_seconds": self.expected_fetch_seconds(),
+            "phase_timings": self._timings.summary(),
+            "requests": requests,
+        }
+        if public_id is not None:
+            status["request"] = self._request_status(public_id, snapshot, completions)
+        return status
+
+    def share_job(self, job_id: str, record: dict, ttl_seconds: float):
+        """With a coordination backend, store the record of a job of the job API for `ttl_seconds`, so that every process can report it"""
+        if self._coordination is not None:
+            self._run_storage_later(self._coordination.job_put, job_id, record, time.time() + ttl_seconds)
+
+    async def get_shared_job(self, job_id: str) -> Optional[dict]:
+        """The record of a job that any process stored with share_job, None if there is none or there is no coordination backend"""
+        if self._coordination is None:
+            return None
+        return await self._run_storage(self._coordination.job_get, job_id)
+
+    async def get_shared_result(self, public_id: str, post_count: int) -> Optional[ProfileResponse]:
+        """
+        The profile with its `post_count` most recent posts as it was last stored in the shared cache, even if stale,
+        e.g. the result of a job of another process. None if it is no longer cached.
+        """
+        entry = self._cache.peek(public_id)
+        if entry is None or not entry.ingest.has_posts(post_count):
+            entry = await self._run_storage(self._cache.load_from_store, public_id)
+        if entry is None or not entry.ingest.has_posts(post_count):
+            return None
+        return entry.ingest.with_post_count(post_count).response()
+
+    def get_active_accounts(self) -> List[LinkedInAccount]:
+        return [account for account in self.accounts if account.active]
+
+    def get_accounts_status(self) -> List[dict]:
+        return [account.status() for account in self.accounts]
+
+    def is_logging_in(self) -> bool:
+        """Whether an account may still become active, so that fetches are queued for it"""
+        return any(account.logging_in for account in self.accounts)
 
+    def get_readiness(self) -> dict:
+        """
+        "ok" once an account is logged in, "starting" while none is yet but some are still logging in,
+        and "unavailable" when no account is left to log in. Cached profiles are served in every state.
+        """
+        active_accounts = len(self.get_active_accounts())
+        if active_accounts:
+            status, detail = "ok", None
+        elif self.is_logging_in():
+            status, detail = "starting", "Logging in to LinkedIn."
+        elif not self.accounts:
+            status, detail = "unavailable", "LinkedIn credentials not provided."
+        else:
+            status, detail = "unavailable", "No LinkedIn account is logged in."
         return {
-            "waiting_requests_count": self._waiting_requests_count,
-            "estimated_completion_timestamp": int(time.time()) + (self._waiting_requests_count + 1) * singleWaitTime
+            "status": status,
+            "detail": detail,
+            "active_accounts": active_accounts,
+            "accounts": self.get_accounts_status(),
         }
+
+    def start(self):
+        """
+        Logs the accounts in in the background, which otherwise happens on first use, and reloads the config
+        and credentials on SIGHUP and when their files change. Must be called from the running event loop, and returns right away.
+        """
+        self._ensure_workers()
+        try:
+            asyncio.get_running_loop().add_signal_handler(signal.SIGHUP, self.reload)
+        except (AttributeError, NotImplementedError, RuntimeError):
+            # There is no SIGHUP on Windows, and signal handlers can only be set from the main thread
+            pass
+        if self._watcher is None:
+            self._watcher = asyncio.ensure_future(self._watch_loop())
+
+    def reload(self):
+        """
+        Reads config.yaml again and applies it, then logs in the accounts whose credentials were added
+        or changed in the environment and takes removed ones out of rotation. Must be called from the running event loop.
+        """
+        print("Reloading the config and credentials")
+        self._watched_mtimes = self._read_watched_mtimes()
+        previous = {name: getattr(self, name) for name in RESTART_SETTINGS}
+        self.load_config()
+        changed = [name for name, value in previous.items() if getattr(self, name) != value]
+        if changed:
+            print(f"Changes to {', '.join(changed)} take effect after a restart")
+        self._scheduler.max_length = self.QUEUE_MAX_LENGTH
+        # Entries that are already cached keep their expiry
+        self._cache.ttl_minutes = self.CACHE_TTL_MINUTES
+        self._cache.stale_minutes = self.CACHE_STALE_MINUTES
+        self._cache.max_entries = self.CACHE_MAX_ENTRIES
+        self._cache.max_bytes = int(self.CACHE_MAX_SIZE_MB * 1024 * 1024)
+        if self._credentials_from_environment:
+            self._update_accounts(load_credentials())
+        self._ensure_workers()
+
+    def _update_accounts(self, credentials: List[Dict[str, str]]):
+        accounts = {account.credential["username"]: account for account in self.accounts if account.credential is not None}
+        for credential in credentials:
+            account = accounts.pop(credential["username"], None)
+            if account is None:
+                account = LinkedInAccount(f"account-{len(self.accounts) + 1}", credential=credential)
+                self.accounts.append(account)
+                print(f"Added LinkedIn {account.name}")
+                self._start_login(account)
+            elif account.credential != credential or not (account.active or account.logging_in):
+                # Accounts out of rotation get another chance, e.g. once their login challenge was resolved
+                account.credential = credential
+                account.disable("logging in again")
+                self._start_login(account)
+        for account in accounts.values():
+            if account.login_state != "removed":
+                print(f"Taking LinkedIn {account.name} out of rotation: removed from the credentials")
+                if account.login_task is not None:
+                    account.login_task.cancel()
+                account.disable("removed from the credentials")
+                account.login_state = "removed"
+        self._grow_executor()
+        self._fail_pending_if_unavailable()
+
+    def _grow_executor(self):
+        """Replace the executor with a larger one once accounts were added, so that every account still has a thread of its own"""
+        size = max(self.EXECUTOR_MAX_WORKERS, len([account for account in self.accounts if account.login_state != "removed"]))
+        if size <= self._executor_size:
+            return
+        print(f"Growing the executor from {self._executor_size} to {size} threads")
+        previous = self._executor
+        self._executor_size = size
+        self._executor = ThreadPoolExecutor(max_workers=size, thread_name_prefix="linkedin-agent")
+        # Calls already submitted to the previous executor still run there
+        previous.shutdown(wait=False)
+
+    def _start_login(self, account: LinkedInAccount):
+        if account.login_task is not None:
+            account.login_task.cancel()
+        account.login_state = "pending"
+        account.login_attempts = 0
+        account.login_task = asyncio.ensure_future(self._login(account))
+
+    async def _login(self, account: LinkedInAccount):
+        """Log an account in, retrying with exponential backoff while LinkedIn cannot be reached"""
+        delay = self.LOGIN_RETRY_INITIAL_SECONDS
+        while True:
+            account.login_state = "logging_in"
+            account.login_attempts += 1
+            try:
+                linkedin = await self._new_client(account)
+            except (ChallengeException, UnauthorizedException) as e:
+                # Retrying cannot help until the challenge is resolved or the credentials are fixed and reloaded
+                self._login_failed(account, e)
+                return
+            except Exception as e:
+                if self.LOGIN_MAX_ATTEMPTS and account.login_attempts >= self.LOGIN_MAX_ATTEMPTS:
+                    self._login_failed(account, e)
+                    return
+                # Jittered so that several accounts failing together do not retry in lockstep
+                retry_in = min(delay, self.LOGIN_RETRY_MAX_SECONDS) * random.uniform(0.8, 1.2)
+                print(f"Failed to log in LinkedIn {account.name}, retrying in {retry_in:.0f} seconds: {repr(e)}")
+                account.login_state = "waiting_retry"
+                account.disabled_reason = f"login failed, retrying: {repr(e)}"
+                await asyncio.sleep(retry_in)
+                delay *= 2
+                continue
+            if self._recorder is not None:
+                linkedin = RecordingLinkedin(linkedin, self._recorder)
+            account.linkedin = linkedin
+            account.active = True
+            account.disabled_reason = None
+            account.login_state = "logged_in"
+            print(f"Logged in LinkedIn {account.name}")
+            self._ensure_workers()
+            return
+
+    async def _new_client(self, account: LinkedInAccount) -> Linkedin:
+        """
+        Logs a client in with the credentials of an account. With a coordination backend, the login holds the lease of
+        the account like a fetch does, so that the processes sharing an account log in one at a time. On the same machine,
+        the later ones then reuse the session cookies that linkedin_api saved for the first one instead of logging in again.
+        """
+        if self._coordination is not None:
+            await self._lease_account(account)
+        try:
+            return await asyncio.get_running_loop().run_in_executor(
+                self._executor,
+                functools.partial(Linkedin, account.credential["username"], account.credential["password"], debug=True),
+            )
+        finally:
+            if self._coordination is not None:
+                self._run_storage_later(self._coordination.release, self._account_lock(account))
+
+    def _login_failed(self, account: LinkedInAccount, e: Exception):
+        print(f"Failed to log in LinkedIn {account.name}: {repr(e)}")
+        self.metrics.errors.inc(type=type(e).__name__)
+        account.disable(f"login failed: {repr(e)}")
+        account.login_state = "failed"
+        self._fail_pending_if_unavailable()
+
+    def _read_watched_mtimes(self) -> Dict[str, Optional[float]]:
+        """Modification times of config.yaml and of the .env file, if the credentials come from the environment"""
+        paths = [CONFIG_PATH]
+        if self._credentials_from_environment:
+            paths.append(dotenv.find_dotenv())
+        mtimes = {}
+        for path in paths:
+            try:
+                mtimes[path] = os.path.getmtime(path)
+            except OSError:
+                mtimes[path] = None
+        return mtimes
+
+    async def _watch_loop(self):
+        while True:
+            # A watch interval of 0 only reloads on SIGHUP, the loop keeps running in case a reload changes it
+            await asyncio.sleep(self.RELOAD_WATCH_INTERVAL_SECONDS or 10)
+            if self.RELOAD_WATCH_INTERVAL_SECONDS and self._read_watched_mtimes() != self._watched_mtimes:
+                self.reload()
     
-    def _get_from_cache(self, profile_id: str) -> Optional[ProfileResponse]:
+    async def _get_from_cache(self, profile_id: str) -> Optional[CacheEntry]:
         """Get profile from cache if it exists and is not expired"""
-        with self._cache_lock:
-            if profile_id in self._cache:
-                entry = self._cache[profile_id]
-                if not entry.is_expired():
-                    print(f"Cache hit for profile {profile_id}")
-                    return entry.data
-                else:
-                    # Remove expired entry
-                    print(f"Removing expired cache entry for profile {profile_id}")
-                    del self._cache[profile_id]
-            return None
+        entry = self._cache.get_entry(profile_id, memory_only=True)
+        if entry is None and self._cache.store is not None:
+            entry = await self._run_storage(self._cache.get_entry, profile_id)
+        if entry:
+            print(f"Cache hit for profile {profile_id}")
+        return entry
 
-    def _add_to_cache(self, profile_id: str, data: ProfileResponse):
+    async def _add_to_cache(self, profile_id: str, entry: CacheEntry):
         """Add profile data to cache"""
-        with self._cache_lock:
-            self._cache[profile_id] = CacheEntry(data, self.CACHE_TTL_MINUTES)
+        if self._cache.store is not None:
+            added = await self._run_storage(self._cache.put_entry, profile_id, entry)
+        else:
+            added = self._cache.put_entry(profile_id, entry)
+        if added:
             print(f"Added profile {profile_id} to cache")
+        else:
+            print(f"Profile {profile_id} is too large to be cached")
+
+    def get_cache_stats(self) -> dict:
+        return self._cache.stats()
+
+    async def _run_blocking(self, func, *args, **kwargs):
+        """Run a blocking LinkedIn API call on the agent's executor"""
+        loop = asyncio.get_running_loop()
+        with self.metrics.timer(self.metrics.linkedin_call_seconds, method=getattr(func, "__name__", "unknown")):
+            return await loop.run_in_executor(self._executor, functools.partial(func, *args, **kwargs))
+
+    async def _run_storage(self, func, *args, **kwargs):
+        """Run a call to the cache store or the coordination backend on the storage thread"""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._storage_executor, functools.partial(func, *args, **kwargs))
+
+    def _run_storage_later(self, func, *args, **kwargs):
+        """Like _run_storage without waiting for the call, which is still made after the calls submitted before it"""
+        def call():
+            try:
+                func(*args, **kwargs)
+            except Exception as e:
+                print(f"Coordination call {getattr(func, '__name__', func)} failed: {repr(e)}")
+        self._storage_executor.submit(call)
 
     async def _random_delay(self):
         """Add random delay between requests"""
         delay = random.uniform(self.MIN_DELAY, self.MAX_DELAY)
         await asyncio.sleep(delay)
 
-    async def _make_noise(self) -> None:
+    async def _make_noise(self, account: LinkedInAccount) -> None:
         """
         Randomly perform noise requests to appear more human-like
         """
         if random.random() < self.NOISE_PROBABILITY:
             noise_funcs = [
-                (self.linkedin.get_current_profile_views, {}),
-                (self.linkedin.get_invitations, {"start": 0, "limit": 3}),
-                (self.linkedin.get_feed_posts, {"limit": 10, "exclude_promoted_posts": True}),
+                (account.linkedin.get_current_profile_views, {}),
+                (account.linkedin.get_invitations, {"start": 0, "limit": 3}),
+                (account.linkedin.get_feed_posts, {"limit": 10, "exclude_promoted_posts": True}),
             ]
             
             # Pick a noise functions randomly
@@ -167,345 +706,454 @@ class LinkedInAgent:
             for func, kwargs in selected_funcs:
                 try:
                     await self._random_delay()
-                    func(**kwargs)
+                    await self._run_blocking(func, **kwargs)
                 except Exception as e:
                     print(f"Noise request failed (this is fine): {str(e)}")
     
-    def get_profile(self, public_id: str):
-        if self.linkedin is None:
+    def get_profile(self, public_id: str, account: LinkedInAccount):
+        if account.linkedin is None:
             raise Exception("LinkedIn agent not initialized")
-        data = self.linkedin.get_profile(public_id)
+        data = account.linkedin.get_profile(public_id)
         if data:
             return data
         else:
             raise Exception("LinkedIn profile not found")
     
-    def get_profile_posts(self, public_id: str):
-        if self.linkedin is None:
+    def get_profile_posts(self, public_id: str, account: LinkedInAccount, urn_id: Optional[str] = None, post_count: int = 10):
+        if account.linkedin is None:
             raise Exception("LinkedIn agent not initialized")
-        data = self.linkedin.get_profile_posts(public_id)
+        # Without urn_id, linkedin_api looks the profile up again to find it
+        data = account.linkedin.get_profile_posts(public_id, urn_id=urn_id, post_count=post_count)
         if data:
             return data
         else:
             raise Exception("Failed to get profile posts")
     
-    async def get_ingest(self, public_id: str) -> ProfileResponse:
+    def get_profile_posts_page(self, account: LinkedInAccount, urn_id: str, start: int, count: int, pagination_token: Optional[str] = None) -> Tuple[list, Optional[str]]:
+        """Fetches one page of a profile's posts and the token of the next page, see PostsPager"""
+        if account.linkedin is None:
+            raise Exception("LinkedIn agent not initialized")
+        return PostsPager(account.linkedin).page(urn_id, start, count, pagination_token)
+
+    async def get_ingest(self, public_id: str, priority: int = PRIORITY_INTERACTIVE, client: str = "", post_count: Optional[int] = None, post_page_size: Optional[int] = None, queued: Optional[asyncio.Event] = None) -> ProfileResponse:
         """
         This method is the main entry point for getting a LinkedIn profile.
+        Fetches are served by `priority` (see scheduler.py), taking turns between clients of the same priority.
+        The profile comes with its `post_count` most recent posts (posts.count in the config by default).
+        Raises QueueFullException if the profile has to be fetched but the queue is full.
+        `queued` is set once the fetch of the profile is queued, so that its queue position is known.
+        """
+        post_count = post_count or self.POSTS_COUNT
+        entry = await self.get_ingest_entry(public_id, priority, client, post_count, post_page_size, queued)
+        return entry.ingest.with_post_count(post_count).response()
+
+    async def get_ingest_entry(self, public_id: str, priority: int = PRIORITY_INTERACTIVE, client: str = "", post_count: Optional[int] = None, post_page_size: Optional[int] = None, queued: Optional[asyncio.Event] = None) -> CacheEntry:
+        """
+        Like get_ingest, but returns the cache entry holding the profile along with its encoded response bodies.
+        The entry may hold more than `post_count` posts, see ProfileIngest.with_post_count.
         """
+        post_count = post_count or self.POSTS_COUNT
+        self._ensure_workers()
         # Skip the queue if the data is already in cache because it does not involve LinkedIn API calls
         if self.CACHE_ENABLED:
-            cached_data = self._get_from_cache(public_id)
-            if cached_data:
-                return cached_data
+            cached_entry = await self._get_from_cache(public_id)
+            if cached_entry and cached_entry.ingest.has_posts(post_count):
+                if cached_entry.is_stale():
+                    # Serve the stale profile right away and let the refresh wait for its turn in the queue
+                    self.metrics.stale_hits.inc()
+                    self._refresh(public_id, "stale")
+                return cached_entry
+
+        while True:
+            task = self._inflight.get(public_id)
+            if task is None:
+                task = self._start_fetch(public_id, priority, client, post_count, post_page_size, queued)
+            else:
+                print(f"Joining in-flight fetch for profile {public_id}")
+                self._scheduler.promote(public_id, priority)
+                request = self._scheduler.lookup(public_id)
+                if request is not None:
+                    request.post_count = max(request.post_count, post_count)
+                    self._publish(request)
+                if queued is not None:
+                    queued.set()
+            # Shield the shared fetch so that one caller disconnecting does not cancel it for the others
+            entry = await asyncio.shield(task)
+            # A fetch that was already running may have been asked for fewer posts
+            if entry.ingest.has_posts(post_count):
+                return entry
+
+    def get_partial_ingest(self, public_id: str) -> Optional[ProfileResponse]:
+        """The profile without its posts, if it is being fetched with the "overlap" plan and the posts are not in yet"""
+        request = self._running.get(public_id)
+        if request is None or request.partial is None:
+            return None
+        return request.partial.response()
+
+    async def get_ingest_batch(self, public_ids: List[str], priority: int = PRIORITY_INTERACTIVE, client: str = "", post_count: Optional[int] = None) -> AsyncIterator[Tuple[str, Optional[ProfileIngest], Optional[Exception]]]:
+        """
+        Gets several profiles at once, yielding (public_id, ingest, exception) for each profile as soon as it is ready.
+        Sections of the ingests are only rendered when they are read.
+        Cached profiles come back first, and a slow profile does not hold back the ones queued after it.
+        """
+        # Remove duplicates while keeping the order
+        public_ids = list(dict.fromkeys(public_ids))
+        tasks = [asyncio.ensure_future(self._get_ingest_result(public_id, priority, client, post_count)) for public_id in public_ids]
+        try:
+            for done in asyncio.as_completed(tasks):
+                yield await done
+        finally:
+            # The shared fetches keep running and still fill the cache if the consumer goes away
+            for task in tasks:
+                task.cancel()
+
+    async def _get_ingest_result(self, public_id: str, priority: int, client: str, post_count: Optional[int]) -> Tuple[str, Optional[ProfileIngest], Optional[Exception]]:
+        post_count = post_count or self.POSTS_COUNT
+        try:
+            entry = await self.get_ingest_entry(public_id, priority, client, post_count)
+            return public_id, entry.ingest.with_post_count(post_count), None
+        except Exception as e:
+            return public_id, None, e
+
+    def _start_fetch(self, public_id: str, priority: int = PRIORITY_INTERACTIVE, client: str = "", post_count: Optional[int] = None, post_page_size: Optional[int] = None, queued: Optional[asyncio.Event] = None) -> asyncio.Future:
+        post_count = post_count or self.POSTS_COUNT
+        post_page_size = post_page_size or self.POSTS_PAGE_SIZE
+        if self._coordination is None:
+            # The request is queued before the first await so that its queue position is known right away
+            request = self._enqueue(public_id, priority, client, post_count, post_page_size)
+            task = asyncio.ensure_future(self._fetch_and_cache(request))
+            if queued is not None:
+                queued.set()
+        else:
+            task = asyncio.ensure_future(self._fetch_coordinated(public_id, priority, client, post_count, post_page_size, queued))
+        self._inflight[public_id] = task
+        task.add_done_callback(functools.partial(self._on_fetch_done, public_id))
+        return task
+
+    def _refresh(self, public_id: str, reason: str) -> bool:
+        """
+        Fetch a cached profile again in the background. The fetch goes through the queue with the lowest
+        priority and the same delays and noise. Returns False if it was already being fetched or could not be queued.
+        """
+        if public_id in self._inflight:
+            return False
+        # Keep as many posts as the cached profile has, the newest ones are fetched incrementally
+        previous = self._cache.peek(public_id)
+        post_count = max(self.POSTS_COUNT, previous.ingest.posts_depth or 0) if previous is not None else self.POSTS_COUNT
+        try:
+            self._start_fetch(public_id, PRIORITY_BACKGROUND, post_count=post_count)
+        except (FetchException, QueueFullException) as e:
+            print(f"Could not refresh profile {public_id}: {repr(e)}")
+            return False
+        print(f"Refreshing profile {public_id} in the background ({reason})")
+        self.metrics.refreshes.inc(reason=reason)
+        return True
+
+    async def _refresh_ahead_loop(self):
+        """Refresh frequently requested profiles before they expire, one at a time and only while no other fetch is pending"""
+        while True:
+            await asyncio.sleep(self.REFRESH_AHEAD_INTERVAL_SECONDS)
+            # Checked on every turn since a reload can turn it off
+            if not (self.CACHE_ENABLED and self.REFRESH_AHEAD_ENABLED) or self._scheduler or self._running:
+                continue
+            for public_id in self._cache.hot_keys(self.REFRESH_AHEAD_MIN_HITS, self.REFRESH_AHEAD_BEFORE_MINUTES):
+                if self._refresh(public_id, "ahead"):
+                    break
+
+    async def _fetch_coordinated(self, public_id: str, priority: int, client: str, post_count: int, post_page_size: int, queued: Optional[asyncio.Event] = None) -> CacheEntry:
+        """
+        Fetches a profile under its lock in the coordination backend, unless another process stored it in the shared cache.
+        While another process holds the lock, waits for that process to release it, then serves the profile it stored,
+        or fetches it if that process did not store it, e.g. because its fetch failed or it went away.
+        `queued` is set once the fetch is queued, or waits for the fetch of another process.
+        """
+        lock = f"fetch:{public_id}"
+        try:
+            if not await self._run_storage(self._coordination.acquire, lock):
+                print(f"Profile {public_id} is being fetched by another process")
+                if queued is not None:
+                    queued.set()
+                while not await self._run_storage(self._coordination.acquire, lock):
+                    await asyncio.sleep(self.COORDINATION_POLL_INTERVAL_SECONDS)
+            # Another process may have stored the profile since it was looked up
+            shared = await self._get_shared_entry(public_id, post_count)
+            if shared is not None:
+                return shared
+            # The limit of the queue applies to the fetches queued by every process
+            _, queued_ids = await self._queue_snapshot()
+            request = self._enqueue(public_id, priority, client, post_count, post_page_size, queue_length=len(queued_ids))
+        finally:
+            if queued is not None:
+                queued.set()
+        return await self._fetch_and_cache(request)
+
+    async def _get_shared_entry(self, public_id: str, post_count: int) -> Optional[CacheEntry]:
+        """A fresh entry with enough posts that another process stored in the shared cache"""
+        if not self.CACHE_ENABLED:
+            return None
+        entry = await self._run_storage(self._cache.load_from_store, public_id)
+        if entry is None or entry.is_stale() or not entry.ingest.has_posts(post_count):
+            return None
+        return entry
+
+    def _publish(self, request: FetchRequest):
+        """Record a queued or running request in the registry shared with the other processes"""
+        if self._coordination is not None:
+            self._run_storage_later(
+                self._coordination.queue_put,
+                request.public_id,
+                priority=request.priority,
+                client=request.client,
+                enqueued_at=request.enqueued_at,
+                started_at=request.started_at,
+            )
+
+    def _on_fetch_done(self, public_id: str, task: asyncio.Task):
+        if self._inflight.get(public_id) is task:
+            del self._inflight[public_id]
+            if self._coordination is not None:
+                self._run_storage_later(self._coordination.queue_remove, public_id)
+                self._run_storage_later(self._coordination.release, f"fetch:{public_id}")
+        # Mark the exception as retrieved in case every caller has gone away
+        if not task.cancelled():
+            task.exception()
+
+    def _enqueue(self, public_id: str, priority: int = PRIORITY_INTERACTIVE, client: str = "", post_count: int = 10, post_page_size: int = 10, queue_length: Optional[int] = None) -> FetchRequest:
+        self._ensure_workers()
+        if not self.get_active_accounts() and not self.is_logging_in():
+            raise FetchException("no active LinkedIn accounts")
+        if self._queue_full(priority, queue_length):
+            self.metrics.rejected.inc(priority=PRIORITY_NAMES[priority])
+            raise QueueFullException(self.retry_after_seconds())
+        request = FetchRequest(public_id, asyncio.get_running_loop().create_future(), priority, client, post_count, post_page_size)
+        self._scheduler.put(request)
+        self._publish(request)
+        return request
+
+    def _queue_full(self, priority: int, queue_length: Optional[int] = None) -> bool:
+        """
+        Whether no more fetches of the given priority can be queued, also counting `queue_length` queued fetches if given,
+        e.g. those of every process. The last QUEUE_RESERVED_FOR_INTERACTIVE places are kept for interactive requests,
+        so that batches and background refreshes cannot fill the queue.
+        """
+        max_length = self._scheduler.max_length
+        if max_length <= 0:
+            return False
+        if priority != PRIORITY_INTERACTIVE:
+            max_length -= self.QUEUE_RESERVED_FOR_INTERACTIVE
+        return max(len(self._scheduler), queue_length or 0) >= max_length
+
+    async def _fetch_and_cache(self, request: FetchRequest) -> CacheEntry:
+        ingest = await request.future
+        entry = self._cache.new_entry(ingest)
+        if self.CACHE_ENABLED:
+            await self._add_to_cache(request.public_id, entry)
+        return entry
 
-        self._set_counter(self._waiting_requests_count + 1)
-        async with self._lock:
+    def _ensure_workers(self):
+        """
+        Start logging in the accounts that were not logged in yet, a worker for every active account that
+        does not have one, and the refresh-ahead task once it is enabled
+        """
+        for account in self.accounts:
+            if account.login_state == "pending" and account.login_task is None:
+                self._start_login(account)
+        for account in self.get_active_accounts():
+            worker = self._workers.get(account.name)
+            if worker is None or worker.done():
+                self._workers[account.name] = asyncio.ensure_future(self._worker(account))
+        if self._refresher is None and self.CACHE_ENABLED and self.REFRESH_AHEAD_ENABLED:
+            self._refresher = asyncio.ensure_future(self._refresh_ahead_loop())
+        if self._heartbeat is None and self._coordination is not None:
+            self._heartbeat = asyncio.ensure_future(self._heartbeat_loop())
+
+    async def _heartbeat_loop(self):
+        while True:
+            await asyncio.sleep(self._coordination.lock_ttl_seconds / 3)
+            try:
+                await self._run_storage(self._coordination.heartbeat)
+            except Exception as e:
+                print(f"Coordination heartbeat failed: {repr(e)}")
+
+    async def _lease_account(self, account: LinkedInAccount):
+        """Wait until no other process is fetching with the same LinkedIn account"""
+        while not await self._run_storage(self._coordination.acquire, self._account_lock(account)):
+            await asyncio.sleep(self.COORDINATION_POLL_INTERVAL_SECONDS)
+
+    def _account_lock(self, account: LinkedInAccount) -> str:
+        return f"account:{account.credential['username'] if account.credential else account.name}"
+
+    async def _worker(self, account: LinkedInAccount):
+        """Serve queued fetches with a single account until it is taken out of rotation"""
+        while account.active:
+            request = await self._scheduler.get()
+            if request.future.done():
+                continue
+            if not account.active:
+                # Taken out of rotation while waiting, e.g. by a reload, so another account serves the request
+                self._scheduler.put(request)
+                self._fail_pending_if_unavailable()
+                break
+            account.busy = True
+            if self._coordination is not None:
+                await self._lease_account(account)
+            request.started_at = time.time()
+            request.account = account
+            self.metrics.queue_wait_seconds.observe(request.started_at - request.enqueued_at)
+            self._running[request.public_id] = request
+            self._publish(request)
             try:
-                profile_response = await self._get_ingest(public_id)
-                if self.CACHE_ENABLED:
-                    self._add_to_cache(public_id, profile_response)
-                self._set_counter(self._waiting_requests_count - 1)
-                return profile_response
+                result = await self._get_ingest(request.public_id, account, request)
+            except (ChallengeException, LinkedinSessionExpired) as e:
+                self.metrics.errors.inc(type=type(e).__name__)
+                print(f"Taking LinkedIn {account.name} out of rotation: {repr(e)}")
+                account.disable(repr(e))
+                # Hand the request back so that another account can pick it up
+                request.started_at = None
+                self._scheduler.put(request)
+                self._publish(request)
+                self._fail_pending_if_unavailable()
             except Exception as e:
-                self._set_counter(self._waiting_requests_count - 1)
-                raise e
+                self.metrics.errors.inc(type=type(e).__name__)
+                if not request.future.done():
+                    request.future.set_exception(e)
+            else:
+                account.fetch_count += 1
+                if not request.future.done():
+                    request.future.set_result(result)
+            finally:
+                account.busy = False
+                if self._coordination is not None:
+                    self._run_storage_later(self._coordination.release, self._account_lock(account))
+                if self._running.get(request.public_id) is request:
+                    del self._running[request.public_id]
+
+    def _fail_pending_if_unavailable(self):
+        """Fail every queued fetch once no account is left to serve it, and none is left to log in"""
+        if self.get_active_accounts() or self.is_logging_in():
+            return
+        for request in self._scheduler.clear():
+            if not request.future.done():
+                request.future.set_exception(FetchException("no active LinkedIn accounts"))
 
-    async def _get_ingest(self, public_id: str) -> ProfileResponse:
-        print(f"Started fetching LinkedIn profile for {public_id} (is {self._waiting_requests_count-1}th in queue)")
+    async def _get_ingest(self, public_id: str, account: LinkedInAccount, request: Optional[FetchRequest] = None) -> ProfileIngest:
+        """
+        Fetches a profile following the configured fetch plan:
+        - "sequential": delay, profile, noise, posts, noise
+        - "overlap": the same, but the profile is published without its posts on `request.partial` once it is in,
+          and its sections are rendered on the executor while the posts are fetched, instead of when they are first read.
+        Both plans make the same requests in the same order with the same delays, one at a time per account.
+        """
+        print(f"Started fetching LinkedIn profile for {public_id} with {account.name} ({len(self._scheduler)} other request(s) in queue)")
+        timer = FetchTimer()
         raw_profile_data = None
         if self.DELAY_ON:
-            await self._random_delay()
+            with timer.measure("delay"):
+                await self._random_delay()
         try:
-            raw_profile_data = self.get_profile(public_id)
+            with timer.measure("profile"):
+                raw_profile_data = await self._run_blocking(self.get_profile, public_id, account)
             print("Got profile data.")
+        except (ChallengeException, LinkedinSessionExpired):
+            raise
         except Exception as e:
             print(repr(e))
             raise FetchException("profile")
-        
+
         if self.NOISE_ON:
-            await self._make_noise()
-        raw_posts_data = None
+            with timer.measure("noise"):
+                await self._make_noise(account)
+
+        if self.FETCH_PLAN == "overlap":
+            partial = self._new_ingest(RawData(profile=raw_profile_data, posts=None))
+            if request is not None:
+                request.partial = partial
+            # Only the work that does not call LinkedIn overlaps the posts fetch, the account makes one request at a time
+            loop = asyncio.get_running_loop()
+            render = loop.run_in_executor(self._executor, partial.render, [name for name in TEXT_SECTIONS if name != "posts"])
+            try:
+                raw_posts_data = await self._fetch_posts(public_id, raw_profile_data, account, timer, request)
+            finally:
+                # Only the rendering left once the posts are in adds to the fetch
+                with timer.measure("render"):
+                    await render
+        else:
+            raw_posts_data = await self._fetch_posts(public_id, raw_profile_data, account, timer, request)
+            partial = None
+
+        if self.NOISE_ON:
+            with timer.measure("noise"):
+                await self._make_noise(account)
+
+        # Sections are rendered lazily when they are first requested, see ProfileIngest
+        with timer.measure("render"):
+            ingest = self._new_ingest(RawData(profile=raw_profile_data, posts=raw_posts_data))
+            ingest.posts_depth = request.post_count if request is not None else self.POSTS_COUNT
+            if partial is not None:
+                # Sections already rendered for the partial result do not depend on the posts
+                ingest.sections.update((name, text) for name, text in partial.sections.items() if name != "posts")
+        timer.finish()
+        self._timings.record(timer)
+        for phase, seconds in timer.phases.items():
+            self.metrics.fetch_phase_seconds.observe(seconds, phase=phase)
+        return ingest
+
+    async def _fetch_posts(self, public_id: str, raw_profile_data: dict, account: LinkedInAccount, timer: FetchTimer, request: Optional[FetchRequest] = None) -> Optional[list]:
+        post_count = request.post_count if request is not None else self.POSTS_COUNT
+        page_size = request.post_page_size if request is not None else self.POSTS_PAGE_SIZE
+        # The profile URN is already known from the profile, which saves linkedin_api from fetching the profile again
+        urn_id = raw_profile_data.get("profile_urn", "").rsplit(":", 1)[-1] or None
         try:
-            raw_posts_data = self.get_profile_posts(public_id)
+            with timer.measure("posts"):
+                if urn_id is not None and PostsPager.supports(account.linkedin):
+                    raw_posts_data = await self._fetch_posts_pages(public_id, urn_id, account, post_count, page_size)
+                else:
+                    # Clients without linkedin_api's raw requests (e.g. test doubles) fetch all posts in one go
+                    raw_posts_data = await self._run_blocking(self.get_profile_posts, public_id, account, urn_id=urn_id, post_count=post_count)
+                    raw_posts_data = raw_posts_data[:post_count]
+            if not raw_posts_data:
+                raise Exception("Failed to get profile posts")
             print("Got posts data.")
+            return raw_posts_data
+        except (ChallengeException, LinkedinSessionExpired):
+            raise
         except Exception as e:
             print(repr(e))
             # Posts are not critical, so we can continue without them
-            raw_posts_data = None
-        
-        if self.NOISE_ON:
-            await self._make_noise()
-        
-        profile_data = {}
-        profile_data["raw"] = RawData(profile=raw_profile_data, posts=raw_posts_data)
-        
+            return None
+
+    async def _fetch_posts_pages(self, public_id: str, urn_id: str, account: LinkedInAccount, post_count: int, page_size: int) -> list:
+        """
+        Fetches the `post_count` most recent posts page by page. If the cached profile already holds at least
+        that many posts, only the posts newer than the cached ones are fetched and the rest are reused.
+        """
+        page_size = max(1, min(page_size, MAX_PAGE_SIZE))
+        previous = self._cache.peek(public_id)
+        known_posts = []
+        if previous is not None and previous.ingest.raw.posts and (previous.ingest.posts_depth or 0) >= post_count:
+            known_posts = previous.ingest.raw.posts
+        known_urns = {post_urn(post) for post in known_posts} - {None}
+
+        posts = []
+        start = 0
+        pagination_token = None
+        while len(posts) < post_count:
+            page, pagination_token = await self._run_blocking(self.get_profile_posts_page, account, urn_id, start, page_size, pagination_token)
+            for post in page:
+                if post_urn(post) in known_urns:
+                    print(f"Reusing {len(known_posts)} cached post(s) after {len(posts)} new post(s) for {public_id}")
+                    new_urns = {post_urn(new_post) for new_post in posts}
+                    posts += [known_post for known_post in known_posts if post_urn(known_post) not in new_urns]
+                    return posts[:post_count]
+                posts.append(post)
+            if not page or not pagination_token:
+                break
+            start += page_size
+        return posts[:post_count]
+
+    def _new_ingest(self, raw: RawData) -> ProfileIngest:
         try:
-            profile_data["full_name"] = raw_profile_data["firstName"] + " "
-            if raw_profile_data.get("middleName", False):
-                profile_data["full_name"] += raw_profile_data["middleName"] + " "
-            profile_data["full_name"] += raw_profile_data["lastName"]
-
-            # Summary
-            profile_data["summary"] = f"PROFILE OF: {profile_data["full_name"]}\n"
-            if raw_profile_data.get("headline", "--") != "--":
-                profile_data["summary"] += f"HEADLINE: {raw_profile_data["headline"]}\n"
-            profile_data["summary"] += f"LOCATION: {f"{raw_profile_data["geoLocationName"]}, " if raw_profile_data.get("geoLocationName", False) else ""}{raw_profile_data.get("geoCountryName", "")}\n"
-            if raw_profile_data.get("summary", False):
-                profile_data["summary"] += f'\n# ABOUT\n"""\n{raw_profile_data["summary"]}\n"""\n'
-            profile_data["summary"] = profile_data["summary"][:-1] # remove the last newline character
-
-            # Experience
-            profile_data["experience"] = ""
-            if raw_profile_data.get("experience", False):
-                profile_data["experience"] = "# EXPERIENCES\n"
-                for experience in raw_profile_data["experience"]:
-                    if is_ongoing(experience):
-                        profile_data["experience"] += "[Current]\n"
-                    else:
-                        profile_data["experience"] += "[Previous]\n"
-                    profile_data["experience"] += f"{experience['title']}"
-                    if experience.get("companyName", False):
-                        profile_data["experience"] += f" at {experience['companyName']}"
-                    profile_data["experience"] += "\n"
-                    if experience.get("timePeriod", False):
-                        profile_data["experience"] += format_duration(experience["timePeriod"])
-                    
-                    if experience.get("description", False):
-                        profile_data["experience"] += f'DESCRIPTION:\n"""\n{experience["description"]}\n"""\n'
-                    profile_data["experience"] += "\n"
-                profile_data["experience"] = profile_data["experience"][:-2]
-
-            # Education
-            profile_data["education"] = ""
-            if raw_profile_data.get("education", False):
-                profile_data["education"] = "# EDUCATION\n"
-                for education in raw_profile_data["education"]:
-                    if is_ongoing(education):
-                        profile_data["education"] += "[Current]\n"
-                    else:
-                        profile_data["education"] += "[Previous]\n"
-                    
-                    profile_data["education"] += f"INSTITUTION: {education['schoolName']}\n"
-                    if education.get("degreeName", False):
-                        profile_data["education"] += f"DEGREE: {education['degreeName']}\n"
-                    if education.get("fieldOfStudy", False):
-                        profile_data["education"] += f"FIELD OF STUDY: {education['fieldOfStudy']}\n"
-                    
-                    if education.get("timePeriod", False):
-                        profile_data["education"] += format_duration(education["timePeriod"])
-
-                    if education.get("grade", False):
-                        profile_data["education"] += f"GRADE: {education['grade']}\n"
-                    if education.get("activities", False):
-                        profile_data["education"] += f'ACTIVITIES AND SOCIETIES:\n"""\n{education['activities']}\n"""\n'
-                    if education.get("description", False):
-                        profile_data["education"] += f'DESCRIPTION:\n"""\n{education["description"]}\n"""\n'
-                    
-                    profile_data["education"] += "\n"
-                profile_data["education"] = profile_data["education"][:-2]
-            
-            # Projects
-            profile_data["projects"] = ""
-            if raw_profile_data.get("projects", False):
-                profile_data["projects"] = "# PROJECTS\n"
-                for project in raw_profile_data["projects"]:
-                    if is_ongoing(project):
-                        profile_data["projects"] += "[Current]\n"
-                    else:
-                        profile_data["projects"] += "[Previous]\n"
-
-                    profile_data["projects"] += f"NAME: {project["title"]}\n"
-                    num_members = len(project.get("members", [True])) # Min number of members is 1
-                    profile_data["projects"] += f"MEMBERS: {profile_data["full_name"]}"
-                    if num_members > 1:
-                        profile_data["projects"] += f" and {num_members - 1} other(s)"
-                    profile_data["projects"] += "\n"
-
-                    if project.get("timePeriod", False):
-                        profile_data["projects"] += format_duration(project["timePeriod"])
-                    
-                    if project.get("description", False):
-                        profile_data["projects"] += f'DESCRIPTION:\n"""\n{project["description"]}\n"""\n'
-                    profile_data["projects"] += "\n"
-                profile_data["projects"] = profile_data["projects"][:-2]
-
-            # Honors
-            profile_data["honors"] = ""
-            if raw_profile_data.get("honors", False):
-                profile_data["honors"] = "# HONORS\n"
-                for honor in raw_profile_data["honors"]:
-                    profile_data["honors"] += f"NAME: {honor['title']}\n"
-                    if honor.get("issuer", False):
-                        profile_data["honors"] += f"ISSUED BY: {honor['issuer']}\n"
-                    if honor.get("issueDate", False):
-                        profile_data["honors"] += f"ISSUE DATE: {format_date(honor['issueDate'])}\n"
-                    
-                    if honor.get("description", False):
-                        profile_data["honors"] += f'DESCRIPTION:\n"""\n{honor["description"]}\n"""\n'
-                    profile_data["honors"] += "\n"
-                profile_data["honors"] = profile_data["honors"][:-2]
-            
-            # Skills
-            profile_data["skills"] = ""
-            if raw_profile_data.get("skills", False):
-                profile_data["skills"] = "# SKILLS\n"
-                skills_list = [skill["name"] for skill in raw_profile_data["skills"]]
-                profile_data["skills"] += ", ".join(skills_list)
-            
-            # Languages
-            profile_data["languages"] = ""
-            if raw_profile_data.get("languages", False):
-                profile_data["languages"] = "# LANGUAGES\n"
-                for language in raw_profile_data["languages"]:
-                    profile_data["languages"] += language['name']
-                    if language.get("proficiency", False):
-                        profile_data["languages"] += f" ({language['proficiency']})"
-                    profile_data["languages"] += ", "
-                
-                profile_data["languages"] = profile_data["languages"][:-2]
-            
-            # Certifications
-            profile_data["certifications"] = ""
-            if raw_profile_data.get("certifications", False):
-                profile_data["certifications"] = "# LICENSES AND CERTIFICATIONS\n"
-                for certification in raw_profile_data["certifications"]:
-                    profile_data["certifications"] += f"NAME: {certification['name']}\n"
-                    if certification.get("authority", False):
-                        profile_data["certifications"] += f"ISSUED BY: {certification['authority']}\n"
-                    if certification.get("timePeriod", False):
-                        profile_data["certifications"] += f"ISSUE DATE: {format_date(certification["timePeriod"]["startDate"])}\n"
-                    if certification.get("description", False):
-                        profile_data["certifications"] += f'DESCRIPTION:\n"""\n{certification["description"]}\n"""\n'
-                    profile_data["certifications"] += "\n"
-                profile_data["certifications"] = profile_data["certifications"][:-2]
-
-            # Publications
-            profile_data["publications"] = ""
-            if raw_profile_data.get("publications", False):
-                profile_data["publications"] = "# PUBLICATIONS\n"
-                for publication in raw_profile_data["publications"]:
-                    profile_data["publications"] += f"TITLE: {publication['name']}\n"
-                    if publication.get("authors", False):
-                        num_authors = len(publication.get("authors", [True]))
-                        profile_data["publications"] += f"AUTHORS: {profile_data['full_name']}{f' and {num_authors - 1} other(s)' if num_authors > 1 else ''}\n"
-                    
-                    if publication.get("date", False):
-                        profile_data["publications"] += f"PUBLICATION DATE: {format_date(publication['date'])}\n"
-                    if publication.get("description", False):
-                        profile_data["publications"] += f'DESCRIPTION:\n"""\n{publication["description"]}\n"""\n'
-                    profile_data["publications"] += "\n"
-                profile_data["publications"] = profile_data["publications"][:-2]
-
-            # Volunteer
-            profile_data["volunteer"] = ""
-            if raw_profile_data.get("volunteer", False):
-                profile_data["volunteer"] = "# VOLUNTEER\n"
-                for volunteer in raw_profile_data["volunteer"]:
-                    if is_ongoing(volunteer):
-                        profile_data["volunteer"] += "[Current]\n"
-                    else:
-                        profile_data["volunteer"] += "[Previous]\n"
-                    
-                    profile_data["volunteer"] += f"{volunteer['role']} at {volunteer['companyName']}\n"
-                    if volunteer.get("cause", False):
-                        profile_data["volunteer"] += f"CAUSE: {volunteer['cause']}\n"
-                    if volunteer.get("timePeriod", False):
-                        profile_data["volunteer"] += format_duration(volunteer["timePeriod"])
-                    if volunteer.get("description", False):
-                        profile_data["volunteer"] += f'DESCRIPTION:\n"""\n{volunteer["description"]}\n"""\n'
-                    profile_data["volunteer"] += "\n"
-                profile_data["volunteer"] = profile_data["volunteer"][:-2]
-        
+            return ProfileIngest.from_raw(raw, metrics=self.metrics)
         except Exception as e:
             print(e)
             raise ParseException(f"Error while processing LinkedIn profile: {str(e)}")
-        
-        # Posts
-        profile_data["posts"] = ""
-        try:
-            if raw_posts_data:
-                profile_data["posts"] = "# POSTS\n"
-                for post in raw_posts_data:
-                    # Here:
-                    #   "post" is a post that the user has created themselves;
-                    #   "repost" is a post that the user has reposted from another user without any additional commentary;
-                    #   "reshare" is a post that the user has reposted from another user with additional commentary;
-                    # If the post is a "repost", the LinkedIn API directly gives us the original data in the post object. Everything is linked to the original post.
-                    # If the post is a "reshare", he LinkedIn API gives us the original post data in the "resharedUpdate" field.
-                    # This is not yet confirmed to be the general case, but it seems to be true for the posts tested so far.
-                    post_type = "post"
-                    orig_content = ""
-                    orig_author = None
-                    orig_author_name = None
-                    orig_author_headline = None
-                    orig_company_name = None
-                    if post["actor"]["urn"] != raw_profile_data["member_urn"]:
-                        post_type = "repost"
-                        if post["actor"]["image"]["attributes"][0].get("miniProfile", False):
-                            orig_author = post["actor"]["image"]["attributes"][0]["miniProfile"]
-                            orig_author_name = orig_author["firstName"] + " " + orig_author["lastName"]
-                            orig_author_headline = orig_author.get("occupation", None)
-                        elif post["actor"]["image"]["attributes"][0].get("miniCompany", False):
-                            orig_company_name = post["actor"]["image"]["attributes"][0]["miniCompany"].get("name", None)
-                    elif post.get("resharedUpdate", False):
-                        post_type = "reshare"
-                        try:
-                            orig_content = post["resharedUpdate"]["commentary"]["text"]["text"]
-                        except KeyError:
-                            orig_content = None
-                        if post["resharedUpdate"]["actor"]["image"]["attributes"][0].get("miniProfile", False):
-                            orig_author = post["resharedUpdate"]["actor"]["image"]["attributes"][0]["miniProfile"]
-                            orig_author_name = orig_author["firstName"] + " " + orig_author["lastName"]
-                            orig_author_headline = orig_author.get("occupation", None)
-                        elif post["resharedUpdate"]["actor"]["image"]["attributes"][0].get("miniCompany", False):
-                            orig_company_name = post["resharedUpdate"]["actor"]["image"]["attributes"][0]["miniCompany"].get("name", None)
-                    
-                    num_comments = post["socialDetail"]["totalSocialActivityCounts"]["numComments"]
-                    num_shares = post["socialDetail"]["totalSocialActivityCounts"]["numShares"]
-                    reactions = post["socialDetail"]["totalSocialActivityCounts"]["reactionTypeCounts"]
-                    reaction_str = ", ".join([f"{reaction['count']} ({reaction['reactionType']})" for reaction in reactions])
-                    post_content = None
-                    try:
-                        post_content = post["commentary"]["text"]["text"]
-                    except KeyError:
-                        post_content = None
-                    
-                    attribution_prefix = "COMPANY" if orig_company_name else "AUTHOR"
-                    if post_type == "post":
-                        profile_data["posts"] += "[Posted]\n"
-                    if post_type == "reshare":
-                        profile_data["posts"] += "[Reshared a post]\n"
-                        profile_data["posts"] += f"RESHARED FROM:\n- {attribution_prefix}: {orig_author_name if orig_author_name else orig_company_name}\n"
-                        if orig_author_headline:
-                            profile_data["posts"] += f"- HEADLINE: {orig_author_headline}\n"
-                    if post_type == "repost":
-                        profile_data["posts"] += "[Reposted a post]\n"
-                        profile_data["posts"] += f"REPOSTED FROM:\n- {attribution_prefix}: {orig_author_name if orig_author_name else orig_company_name}\n"
-                        if orig_author_headline:
-                            profile_data["posts"] += f"- HEADLINE: {orig_author_headline}\n"
-                    profile_data["posts"] += f"REACTIONS: {reaction_str}\n"
-                    profile_data["posts"] += f"COMMENTS: {num_comments}\n"
-                    profile_data["posts"] += f"SHARES: {num_shares}\n"
-                    if post_type == "reshare" and orig_content:
-                        profile_data["posts"] += f'ORIGINAL CONTENT:\n"""\n{orig_content}\n"""\n'
-                    
-                    if post_content:
-                        content_prefix = "CONTENT:" if post_type == "post" else "ORIGINAL CONTENT:" if post_type == "repost" else "RESHARE COMMENTARY:"
-                        profile_data["posts"] += f'{content_prefix}\n"""\n{post_content}\n"""\n'
-                    profile_data["posts"] += "\n"
-                profile_data["posts"] = profile_data["posts"][:-2]
-        except Exception as e:
-            print(f"Failed to process posts: {e}")
-            profile_data["posts"] = "# POSTS\nFailed to process posts data\n"
-        
-        return ProfileResponse(**profile_data)
-
-class CacheEntry:
-    def __init__(self, data: ProfileResponse, ttl_minutes: int = 60):
-        self.data = data
-        self.created_at = datetime.now()
-        self.expires_at = self.created_at + timedelta(minutes=ttl_minutes)
-
-    def is_expired(self) -> bool:
-        return datetime.now() > self.expires_at
@@ -0,0 +1,223 @@
+"""
+Minimal metrics in the Prometheus text exposition format, without depending on prometheus_client.
+
+Instruments are registered on a MetricsRegistry. When the registry is disabled, recording is a
+no-op and `timer()` returns a shared do-nothing context manager, so instrumented hot paths cost
+next to nothing.
+"""
+from abc import ABC, abstractmethod
+from typing import Callable, Dict, Iterable, List, Tuple
+import bisect
+import threading
+import time
+
+LabelValues = Tuple[str, ...]
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+
+def _format_labels(labelnames: Iterable[str], values: Iterable[str], extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(labelnames, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if not float(value).is_integer() else str(int(value))
+
+
+class _Metric(ABC):
+    type = ""
+
+    def __init__(self, registry: "MetricsRegistry", name: str, documentation: str, labelnames: Tuple[str, ...] = ()):
+        self.registry = registry
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = labelnames
+        self._lock = threading.Lock()
+
+    def _label_values(self, labels: Dict[str, str]) -> LabelValues:
+        return tuple(str(labels.get(name, "")) for name in self.labelnames)
+
+    def collect(self) -> List[str]:
+        return [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.type}"] + self._samples()
+
+    @abstractmethod
+    def _samples(self) -> List[str]:
+        pass
+
+
+class Counter(_Metric):
+    type = "counter"
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._values: Dict[LabelValues, float] = {}
+
+    def inc(self, amount: float = 1, **labels):
+        if not self.registry.enabled:
+            return
+        key = self._label_values(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def _samples(self) -> List[str]:
+        with self._lock:
+            return [f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(value)}" for key, value in self._values.items()]
+
+
+class Histogram(_Metric):
+    type = "histogram"
+
+    def __init__(self, *args, buckets: Tuple[float, ...] = DEFAULT_BUCKETS, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.buckets = tuple(sorted(buckets))
+        # Per label set: [count per bucket (non-cumulative, with a final +Inf bucket), sum]
+        self._values: Dict[LabelValues, list] = {}
+
+    def observe(self, value: float, **labels):
+        if not self.registry.enabled:
+            return
+        key = self._label_values(labels)
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            counts = self._values.get(key)
+            if counts is None:
+                counts = self._values[key] = [[0] * (len(self.buckets) + 1), 0.0]
+            counts[0][index] += 1
+            counts[1] += value
+
+    def _samples(self) -> List[str]:
+        lines = []
+        with self._lock:
+            for key, (counts, total) in self._values.items():
+                cumulative = 0
+                for bound, count in zip(self.buckets + (float("inf"),), counts):
+                    cumulative += count
+                    le = f'le="{_format_value(bound)}"'
+                    lines.append(f"{self.name}_bucket{_format_labels(self.labelnames, key, le)} {cumulative}")
+                lines.append(f"{self.name}_sum{_format_labels(self.labelnames, key)} {_format_value(total)}")
+                lines.append(f"{self.name}_count{_format_labels(self.labelnames, key)} {cumulative}")
+        return lines
+
+
+class Gauge(_Metric):
+    """A gauge whose value is read from a callback when metrics are collected"""
+    type = "gauge"
+
+    def __init__(self, *args, callback: Callable[[], float], **kwargs):
+        super().__init__(*args, **kwargs)
+        self.callback = callback
+
+    def _samples(self) -> List[str]:
+        value = self.callback()
+        if isinstance(value, dict):
+            return [f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(item)}" for key, item in value.items()]
+        return [f"{self.name} {_format_value(value)}"]
+
+
+class CallbackCounter(Gauge):
+    """A counter whose value is read from a callback, for totals that are already kept elsewhere"""
+    type = "counter"
+
+
+class _Timer:
+    __slots__ = ("histogram", "labels", "start")
+
+    def __init__(self, histogram: Histogram, labels: Dict[str, str]):
+        self.histogram = histogram
+        self.labels = labels
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.histogram.observe(time.perf_counter() - self.start, **self.labels)
+        return False
+
+
+class _NullTimer:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        return False
+
+_NULL_TIMER = _NullTimer()
+
+
+class MetricsRegistry:
+    def __init__(self, enabled: bool = True, prefix: str = "linkedingest_"):
+        self.enabled = enabled
+        self.prefix = prefix
+        self._metrics: List[_Metric] = []
+
+    def _register(self, metric: _Metric) -> _Metric:
+        self._metrics.append(metric)
+        return metric
+
+    def counter(self, name: str, documentation: str, labelnames: Tuple[str, ...] = ()) -> Counter:
+        return self._register(Counter(self, self.prefix + name, documentation, labelnames))
+
+    def histogram(self, name: str, documentation: str, labelnames: Tuple[str, ...] = (), buckets: Tuple[float, ...] = DEFAULT_BUCKETS) -> Histogram:
+        return self._register(Histogram(self, self.prefix + name, documentation, labelnames, buckets=buckets))
+
+    def gauge(self, name: str, documentation: str, callback: Callable[[], float], labelnames: Tuple[str, ...] = ()) -> Gauge:
+        return self._register(Gauge(self, self.prefix + name, documentation, labelnames, callback=callback))
+
+    def callback_counter(self, name: str, documentation: str, callback: Callable[[], float], labelnames: Tuple[str, ...] = ()) -> CallbackCounter:
+        return self._register(CallbackCounter(self, self.prefix + name, documentation, labelnames, callback=callback))
+
+    def timer(self, histogram: Histogram, **labels):
+        """Context manager that observes the duration of its block in the histogram"""
+        if not self.enabled:
+            return _NULL_TIMER
+        return _Timer(histogram, labels)
+
+    def render(self) -> str:
+        lines = []
+        for metric in self._metrics:
+            lines.extend(metric.collect())
+        return "\n".join(lines) + "\n"
+
+
+class AgentMetrics(MetricsRegistry):
+    """The metrics reported by LinkedInAgent"""
+    def __init__(self, enabled: bool = True):
+        super().__init__(enabled)
+        self.queue_wait_seconds = self.histogram(
+            "queue_wait_seconds", "Time a fetch waited in the queue before an account picked it up")
+        self.linkedin_call_seconds = self.histogram(
+            "linkedin_call_seconds", "Latency of LinkedIn API calls", ("method",))
+        self.fetch_phase_seconds = self.histogram(
+            "fetch_phase_seconds", "Time spent in each phase of a fetch", ("phase",))
+        self.render_seconds = self.histogram(
+            "render_seconds", "Time spent rendering a section of a profile ingest", ("section",), buckets=(0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0))
+        self.errors = self.counter(
+            "errors_total", "Failed fetches by exception type", ("type",))
+        self.section_errors = self.counter(
+            "section_errors_total", "Profile sections that failed to render", ("section",))
+        self.rejected = self.counter(
+            "rejected_total", "Fetches turned away because the queue was full, by priority", ("priority",))
+        self.stale_hits = self.counter(
+            "cache_stale_hits_total", "Expired profiles served from the cache while being refreshed")
+        self.refreshes = self.counter(
+            "background_refreshes_total", "Cached profiles fetched again in the background, by reason", ("reason",))
+
+    def add_agent_gauges(self, agent):
+        self.gauge("queue_depth", "Fetches waiting in the queue", lambda: len(agent._scheduler))
+        self.gauge("running_fetches", "Fetches being served by an account", lambda: len(agent._running))
+        self.gauge("active_accounts", "LinkedIn accounts in rotation", lambda: len(agent.get_active_accounts()))
+        self.gauge("cache_entries", "Profiles in the in-memory cache", lambda: agent._cache.stats()["entries"])
+        self.gauge("cache_size_bytes", "Approximate size of the in-memory cache", lambda: agent._cache.stats()["size_bytes"])
+        self.callback_counter("cache_lookups_total", "Cache lookups by result", lambda: {("hit",): agent._cache.hits, ("miss",): agent._cache.misses}, ("result",))
+        self.gauge("cache_hit_ratio", "Share of cache lookups that were hits", lambda: agent._cache.stats()["hit_ratio"])
+        self.callback_counter("cache_evictions_total", "Cache entries evicted to stay within limits", lambda: agent._cache.evictions)
@@ -0,0 +1,47 @@
+"""
+Page-by-page fetching of a profile's posts.
+
+linkedin_api's get_profile_posts fetches every page up to the requested count in one call, so it cannot stop at a post
+that is already cached. PostsPager makes the same requests one page at a time through linkedin_api's private `_fetch`.
+It is written against linkedin-api==2.3.1 (pinned in requirements.txt): check the request and the response format
+below against get_profile_posts of any other version before upgrading.
+"""
+from linkedin_api import Linkedin
+from typing import Optional, Tuple
+
+POSTS_URL = "/identity/profileUpdatesV2"
+# LinkedIn serves at most this many posts per page
+MAX_PAGE_SIZE = 100
+
+
+class PostsPager:
+    def __init__(self, client):
+        self.client = client
+
+    @staticmethod
+    def supports(client) -> bool:
+        """
+        Whether the client makes linkedin_api's raw requests: linkedin_api's own client, or a stand-in that declares
+        `makes_raw_requests` (see recording.py). Other clients, e.g. test doubles, fetch the posts with get_profile_posts.
+        """
+        return isinstance(client, Linkedin) or getattr(client, "makes_raw_requests", False)
+
+    def page(self, urn_id: str, start: int, count: int, pagination_token: Optional[str] = None) -> Tuple[list, Optional[str]]:
+        """
+        Fetches one page of a profile's posts, newest first, with the request of get_profile_posts.
+        Returns the posts and the token of the next page, if there is one.
+        """
+        params = {
+            "count": max(1, min(count, MAX_PAGE_SIZE)),
+            "start": start,
+            "q": "memberShareFeed",
+            "moduleKey": "member-shares:phone",
+            "includeLongTermHistory": True,
+            "profileUrn": f"urn:li:fsd_profile:{urn_id}",
+        }
+        if pagination_token:
+            params["paginationToken"] = pagination_token
+        data = self.client._fetch(POSTS_URL, params=params).json()
+        if data and "status" in data and data["status"] != 200:
+            raise Exception(f"Failed to get profile posts: {data.get('message')}")
+        return data.get("elements", []), data.get("metadata", {}).get("paginationToken") or None
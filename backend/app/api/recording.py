@@ -0,0 +1,180 @@
+"""
+Recording of LinkedIn responses, and a client that replays them, to load-test the service without a LinkedIn account.
+
+With `recording.mode: record` in config.yaml, every call the agent makes to LinkedIn (profiles, posts, post pages and
+noise requests) is appended to `recording.path` as a JSON line with its duration and its response or error.
+With `recording.mode: replay`, the accounts are served by ReplayLinkedin from that file instead of logging in.
+"""
+from .posts import PostsPager
+from collections import defaultdict
+import json
+import os
+import random
+import threading
+import time
+import zlib
+from typing import Dict, List, Optional
+
+
+def fetch_key(url: str, params: Optional[dict] = None) -> str:
+    """Identifies a raw request of linkedin_api, leaving out the pagination token, which differs between sessions"""
+    params = {name: value for name, value in (params or {}).items() if name != "paginationToken"}
+    return url + "?" + "&".join(f"{name}={params[name]}" for name in sorted(params))
+
+
+class ResponseRecorder:
+    """Appends recorded calls to a JSONL file, opened on first use"""
+    def __init__(self, path: str):
+        self.path = path
+        self._file = None
+        self._lock = threading.Lock()
+
+    def record(self, method: str, key: str, latency: float, response=None, error: Optional[Exception] = None):
+        record = {"method": method, "key": key, "latency": round(latency, 4), "recorded_at": time.time()}
+        if error is not None:
+            record["error"] = repr(error)
+        else:
+            record["response"] = response
+        line = json.dumps(record, ensure_ascii=False)
+        with self._lock:
+            if self._file is None:
+                os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+                self._file = open(self.path, "a", encoding="utf-8")
+            self._file.write(line + "\n")
+            self._file.flush()
+
+    def close(self):
+        with self._lock:
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+
+
+class RecordingLinkedin:
+    """Wraps a linkedin_api.Linkedin client, recording the calls the agent makes through it"""
+    def __init__(self, client, recorder: ResponseRecorder):
+        self.client = client
+        self.recorder = recorder
+
+    @property
+    def makes_raw_requests(self) -> bool:
+        """Whether the posts can be fetched page by page through _fetch, as with the wrapped client"""
+        return PostsPager.supports(self.client)
+
+    def _call(self, method: str, key: str, func, *args, **kwargs):
+        start = time.perf_counter()
+        try:
+            response = func(*args, **kwargs)
+        except Exception as e:
+            self.recorder.record(method, key, time.perf_counter() - start, error=e)
+            raise
+        self.recorder.record(method, key, time.perf_counter() - start, response)
+        return response
+
+    def get_profile(self, public_id=None, urn_id=None):
+        return self._call("get_profile", public_id or urn_id, self.client.get_profile, public_id, urn_id=urn_id)
+
+    def get_profile_posts(self, public_id=None, urn_id=None, post_count=10):
+        return self._call("get_profile_posts", public_id or urn_id, self.client.get_profile_posts, public_id, urn_id=urn_id, post_count=post_count)
+
+    def get_current_profile_views(self):
+        return self._call("get_current_profile_views", "", self.client.get_current_profile_views)
+
+    def get_invitations(self, start=0, limit=3):
+        return self._call("get_invitations", "", self.client.get_invitations, start=start, limit=limit)
+
+    def get_feed_posts(self, limit=10, exclude_promoted_posts=True):
+        return self._call("get_feed_posts", "", self.client.get_feed_posts, limit=limit, exclude_promoted_posts=exclude_promoted_posts)
+
+    def _fetch(self, url: str, params: Optional[dict] = None, **kwargs):
+        """Raw requests, used to fetch posts page by page. The decoded JSON of the response is recorded."""
+        key = fetch_key(url, params)
+        start = time.perf_counter()
+        try:
+            response = self.client._fetch(url, params=params, **kwargs)
+            data = response.json()
+        except Exception as e:
+            self.recorder.record("_fetch", key, time.perf_counter() - start, error=e)
+            raise
+        self.recorder.record("_fetch", key, time.perf_counter() - start, data)
+        return response
+
+    def __getattr__(self, name):
+        return getattr(self.client, name)
+
+
+class RecordedResponse:
+    """Stands in for the requests.Response returned by linkedin_api's _fetch"""
+    def __init__(self, body: str):
+        self.status_code = 200
+        self.text = body
+
+    def json(self):
+        return json.loads(self.text)
+
+
+class ReplayLinkedin:
+    """
+    Serves recorded responses in place of linkedin_api.Linkedin, each after a latency drawn from the recorded
+    latencies of the same method and multiplied by `latency_scale`. Failed calls are replayed as exceptions.
+    A call that was not recorded is answered with a recording of the same method, picked by its key, so that
+    any number of profile IDs can be requested. With `strict`, it raises instead.
+    """
+    # Recorded post pages are replayed through _fetch, see PostsPager
+    makes_raw_requests = True
+
+    def __init__(self, records: List[dict], latency_scale: float = 1.0, strict: bool = False, seed: Optional[int] = None):
+        self.latency_scale = latency_scale
+        self.strict = strict
+        self.calls: Dict[str, int] = defaultdict(int)
+        self._random = random.Random(seed)
+        # Latest record of every key by method, with its response kept as JSON so that every call decodes a fresh copy
+        self._records: Dict[str, Dict[str, dict]] = defaultdict(dict)
+        self._latencies: Dict[str, List[float]] = defaultdict(list)
+        for record in records:
+            method = record["method"]
+            self._latencies[method].append(record["latency"])
+            if "error" in record:
+                self._records[method][record["key"]] = {"error": record["error"]}
+            else:
+                self._records[method][record["key"]] = {"response": json.dumps(record["response"])}
+        self._keys = {method: sorted(recorded) for method, recorded in self._records.items()}
+
+    @classmethod
+    def from_file(cls, path: str, **kwargs) -> "ReplayLinkedin":
+        with open(path, "r", encoding="utf-8") as f:
+            return cls([json.loads(line) for line in f if line.strip()], **kwargs)
+
+    def _respond(self, method: str, key: str) -> str:
+        self.calls[method] += 1
+        recorded = self._records.get(method)
+        record = recorded.get(key) if recorded else None
+        if record is None:
+            if self.strict or not recorded:
+                raise Exception(f"No recorded response for {method} {key}")
+            keys = self._keys[method]
+            record = recorded[keys[zlib.crc32(key.encode("utf-8")) % len(keys)]]
+        latency = self._random.choice(self._latencies[method]) * self.latency_scale
+        if latency > 0:
+            time.sleep(latency)
+        if "error" in record:
+            raise Exception(record["error"])
+        return record["response"]
+
+    def get_profile(self, public_id=None, urn_id=None):
+        return json.loads(self._respond("get_profile", public_id or urn_id))
+
+    def get_profile_posts(self, public_id=None, urn_id=None, post_count=10):
+        return json.loads(self._respond("get_profile_posts", public_id or urn_id))
+
+    def get_current_profile_views(self):
+        return json.loads(self._respond("get_current_profile_views", ""))
+
+    def get_invitations(self, start=0, limit=3):
+        return json.loads(self._respond("get_invitations", ""))
+
+    def get_feed_posts(self, limit=10, exclude_promoted_posts=True):
+        return json.loads(self._respond("get_feed_posts", ""))
+
+    def _fetch(self, url: str, params: Optional[dict] = None, **kwargs) -> RecordedResponse:
+        return RecordedResponse(self._respond("_fetch", fetch_key(url, params)))
@@ -0,0 +1,108 @@
+from collections import OrderedDict, deque
+from typing import Deque, Dict, List, Optional, TYPE_CHECKING
+import asyncio
+
+if TYPE_CHECKING:
+    from .linkedin import FetchRequest
+
+# Lower values are served first
+PRIORITY_INTERACTIVE = 0
+PRIORITY_BATCH = 1
+PRIORITY_BACKGROUND = 2
+
+PRIORITY_NAMES = {
+    PRIORITY_INTERACTIVE: "interactive",
+    PRIORITY_BATCH: "batch",
+    PRIORITY_BACKGROUND: "background",
+}
+
+
+class FetchScheduler:
+    """
+    Pending fetches, served by priority class. Within a class, clients take turns so that one
+    client queueing many profiles does not hold back the requests of everyone else.
+    Each profile is queued at most once; a request can be promoted to a higher priority when
+    a more urgent caller joins it.
+    """
+    def __init__(self, max_length: int = 0):
+        # 0 means unlimited. The limit is enforced by the caller when it queues a new request, so that requeued requests are never dropped
+        self.max_length = max_length
+        # priority -> client -> the client's requests in submission order, with clients in turn order
+        self._classes: Dict[int, OrderedDict[str, Deque["FetchRequest"]]] = {}
+        self._requests: Dict[str, "FetchRequest"] = {}
+        self._waiters: Deque[asyncio.Future] = deque()
+
+    def __len__(self) -> int:
+        return len(self._requests)
+
+    def __contains__(self, public_id: str) -> bool:
+        return public_id in self._requests
+
+    def put(self, request: "FetchRequest"):
+        clients = self._classes.setdefault(request.priority, OrderedDict())
+        clients.setdefault(request.client, deque()).append(request)
+        self._requests[request.public_id] = request
+        while self._waiters:
+            waiter = self._waiters.popleft()
+            if not waiter.done():
+                waiter.set_result(None)
+                break
+
+    async def get(self) -> "FetchRequest":
+        """Wait for the next request to serve"""
+        while not self._requests:
+            waiter = asyncio.get_running_loop().create_future()
+            self._waiters.append(waiter)
+            await waiter
+        priority = min(self._classes)
+        clients = self._classes[priority]
+        client, requests = next(iter(clients.items()))
+        request = requests.popleft()
+        if requests:
+            # The client goes to the back of the line for its next request
+            clients.move_to_end(client)
+        else:
+            del clients[client]
+        if not clients:
+            del self._classes[priority]
+        del self._requests[request.public_id]
+        return request
+
+    def lookup(self, public_id: str) -> Optional["FetchRequest"]:
+        return self._requests.get(public_id)
+
+    def remove(self, public_id: str) -> Optional["FetchRequest"]:
+        request = self._requests.pop(public_id, None)
+        if request is None:
+            return None
+        clients = self._classes[request.priority]
+        clients[request.client].remove(request)
+        if not clients[request.client]:
+            del clients[request.client]
+        if not clients:
+            del self._classes[request.priority]
+        return request
+
+    def promote(self, public_id: str, priority: int):
+        """Move a queued request up to the given priority, if it is lower"""
+        request = self._requests.get(public_id)
+        if request is not None and priority < request.priority:
+            self.remove(public_id)
+            request.priority = priority
+            self.put(request)
+
+    def ordered(self) -> List["FetchRequest"]:
+        """Queued requests in the order they will be served if nothing else is queued in the meantime"""
+        order = []
+        for priority in sorted(self._classes):
+            queues = list(self._classes[priority].values())
+            for turn in range(max(len(queue) for queue in queues)):
+                order.extend(queue[turn] for queue in queues if turn < len(queue))
+        return order
+
+    def clear(self) -> List["FetchRequest"]:
+        """Remove and return every queued request"""
+        requests = list(self._requests.values())
+        self._classes.clear()
+        self._requests.clear()
+        return requests
@@ -0,0 +1,57 @@
+from collections import deque
+from contextlib import contextmanager
+from typing import Dict, Optional
+import statistics
+import time
+
+PHASES = ("delay", "profile", "posts", "noise", "render")
+
+
+class FetchTimer:
+    """Accumulates the time spent in each phase of a single fetch"""
+    def __init__(self):
+        self.phases: Dict[str, float] = dict.fromkeys(PHASES, 0.0)
+        self.started = time.perf_counter()
+        self.elapsed: Optional[float] = None
+
+    @contextmanager
+    def measure(self, phase: str):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.phases[phase] += time.perf_counter() - start
+
+    def finish(self):
+        self.elapsed = time.perf_counter() - self.started
+
+    @property
+    def total(self) -> float:
+        """Duration of the whole fetch. Phases can overlap, so once finished this is the elapsed time rather than their sum."""
+        if self.elapsed is not None:
+            return self.elapsed
+        return sum(self.phases.values())
+
+
+class PhaseTimings:
+    """Rolling window of the measured phase durations of the most recent fetches"""
+    def __init__(self, window: int = 50):
+        self._phases = {phase: deque(maxlen=window) for phase in PHASES}
+        self._totals = deque(maxlen=window)
+
+    def record(self, timer: FetchTimer):
+        for phase, seconds in timer.phases.items():
+            self._phases[phase].append(seconds)
+        self._totals.append(timer.total)
+
+    def expected_fetch_seconds(self) -> Optional[float]:
+        """Mean duration of a whole fetch, or None before any fetch has been measured"""
+        if not self._totals:
+            return None
+        return statistics.fmean(self._totals)
+
+    def summary(self) -> dict:
+        return {
+            "samples": len(self._totals),
+            "mean_seconds": {phase: statistics.fmean(samples) if samples else None for phase, samples in self._phases.items()},
+        }
@@ -1,13 +1,27 @@
-from fastapi import FastAPI, HTTPException
-from fastapi.staticfiles import StaticFiles
-from fastapi.responses import FileResponse
+from fastapi import FastAPI, HTTPException, Query, Request, Response
+from fastapi.responses import JSONResponse, StreamingResponse, PlainTextResponse
 from fastapi.middleware.cors import CORSMiddleware
-from .api.linkedin import LinkedInAgent, FetchException, ParseException
-from .api.linkedin import ChallengeException
-from .models.profile import ProfileResponse
+from .api.linkedin import LinkedInAgent, FetchException, ParseException, QueueFullException
+from .api.scheduler import PRIORITY_BATCH
+from .api.jobs import JobManager, Job
+from .api.cache import CacheEntry
+from .api.ingest import ProfileIngest
+from .api.budget import CHARS_PER_TOKEN, fit_to_budget
+from .static import CachedFile, PrecompressedStaticFiles, accepted_encodings, etag_matches
+from .models.profile import ProfileResponse, RawData, BatchRequest, JobRequest, JobStatus, TEXT_SECTIONS
+from contextlib import asynccontextmanager
+from typing import List, Literal, Optional
+import json
 import os
 
-app = FastAPI()
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Logging in happens in the background, so static assets and cached profiles are served right away
+    if linkedin_agent is not None:
+        linkedin_agent.start()
+    yield
+
+app = FastAPI(lifespan=lifespan)
 
 # root directory relative to the file is ../..
 root_dir = os.path.abspath(os.path.join(os.path.dirname(__file__), "../.."))
@@ -22,64 +36,260 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-# Mount static assets
-app.mount("/assets", StaticFiles(directory=os.path.join(root_dir, "frontend/dist/assets")), name="assets")
+# Mount static assets, served precompressed when a .br or .gz variant was built. The frontend may not be built yet, e.g. for the API alone.
+app.mount("/assets", PrecompressedStaticFiles(directory=os.path.join(root_dir, "frontend/dist/assets"), check_dir=False), name="assets")
+
+# The SPA shell is served from memory on every page view, and read again when a new build replaces it
+index_page = CachedFile(os.path.join(root_dir, "frontend/dist/index.html"))
+favicon_file = CachedFile(os.path.join(root_dir, "frontend/dist/favicon.ico"), cache_control="public, max-age=86400")
 
 @app.get("/")
-async def read_root():
-    return FileResponse(os.path.join(root_dir, "frontend/dist/index.html"))
+async def read_root(request: Request):
+    return index_page.response(request)
 
 @app.get("/in/{profile_id:path}")
-async def profile_page(profile_id: str):
+async def profile_page(profile_id: str, request: Request):
     # Remove trailing slashes and anything after them
     clean_id = profile_id.split('/')[0]
-    return FileResponse(os.path.join(root_dir, "frontend/dist/index.html"))
+    return index_page.response(request)
 
 # Get favicon
 @app.get("/favicon.ico")
-async def favicon():
-    return FileResponse(os.path.join(root_dir, "frontend/dist/favicon.ico"))
+async def favicon(request: Request):
+    return favicon_file.response(request)
 
 try:
     linkedin_agent = LinkedInAgent()
-except ChallengeException as e:
-    print("LinkedIn login challenge required, you're screwed 💀")
-    linkedin_agent = None
 except Exception as e:
     print(f"Failed to initialize LinkedInAgent: {e}")
     linkedin_agent = None
 
+job_manager = JobManager(linkedin_agent, ttl_minutes=linkedin_agent.JOBS_TTL_MINUTES) if linkedin_agent else None
+
+def response_fields(sections: Optional[str], raw: bool) -> Optional[set]:
+    """
+    Fields to include in a profile response, or None for the full response.
+    `sections` is a comma-separated list of text sections; full_name is always included.
+    """
+    if sections is None and raw:
+        return None
+    if sections is None:
+        selected = set(TEXT_SECTIONS)
+    else:
+        selected = {section.strip() for section in sections.split(",") if section.strip()}
+        unknown = selected - set(TEXT_SECTIONS)
+        if unknown:
+            raise HTTPException(status_code=422, detail=f"Unknown sections: {', '.join(sorted(unknown))}. Valid sections are: {', '.join(TEXT_SECTIONS)}")
+    fields = {"full_name"} | selected
+    if raw:
+        fields.add("raw")
+    return fields
+
+def budget_chars(max_chars: Optional[int], max_tokens: Optional[int]) -> Optional[int]:
+    """The character budget of a response, the smaller of the two if both are given, or None for no budget"""
+    budgets = [budget for budget in (max_chars, max_tokens * CHARS_PER_TOKEN if max_tokens is not None else None) if budget is not None]
+    return min(budgets) if budgets else None
+
+def section_priorities(priorities: Optional[str]) -> Optional[List[str]]:
+    """Parses a comma-separated list of text sections, most important first"""
+    if priorities is None:
+        return None
+    selected = [section.strip() for section in priorities.split(",") if section.strip()]
+    unknown = set(selected) - set(TEXT_SECTIONS)
+    if unknown:
+        raise HTTPException(status_code=422, detail=f"Unknown sections: {', '.join(sorted(unknown))}. Valid sections are: {', '.join(TEXT_SECTIONS)}")
+    return selected
+
+def budget_json(ingest: ProfileIngest, max_chars: int, fields: Optional[set], priorities: Optional[List[str]]) -> str:
+    """JSON of the selected sections of the ingest trimmed to `max_chars`, the raw data is left out"""
+    sections = [name for name in TEXT_SECTIONS if name in fields] if fields is not None else None
+    return json.dumps(fit_to_budget(ingest, max_chars, sections, priorities), ensure_ascii=False)
+
+def encoded_response(entry: CacheEntry, request: Request) -> Response:
+    """
+    Serves the pre-encoded body of a cache entry, compressed if the client accepts it.
+    Answers 304 Not Modified if the client already has this version of the profile.
+    """
+    headers = {"ETag": entry.etag, "Vary": "Accept-Encoding", "Cache-Control": "no-cache"}
+    if etag_matches(request.headers.get("if-none-match"), entry.etag):
+        return Response(status_code=304, headers=headers)
+    encodings = accepted_encodings(request.headers.get("accept-encoding", ""))
+    if entry.brotli is not None and "br" in encodings:
+        body, headers["Content-Encoding"] = entry.brotli, "br"
+    elif "gzip" in encodings:
+        body, headers["Content-Encoding"] = entry.gzip, "gzip"
+    else:
+        body = entry.json
+    return Response(body, media_type="application/json", headers=headers)
+
+def client_id(request: Request) -> str:
+    """Identifies the client for fair scheduling by IP address. Headers such as an API key are not trusted, since any client could vary them to get more turns."""
+    return f"ip:{request.client.host}" if request.client else ""
+
+def agent_unavailable_error() -> HTTPException:
+    return HTTPException(status_code=400, detail="LinkedIn login challenge required, you're screwed 💀 (please contact the maintainer if this issue persists).")
+
+def queue_full_error(e: QueueFullException) -> HTTPException:
+    return HTTPException(status_code=429, detail=str(e), headers={"Retry-After": str(e.retry_after)})
+
+def check_post_count(post_count: Optional[int]):
+    if post_count is not None and linkedin_agent is not None and post_count > linkedin_agent.POSTS_MAX_COUNT:
+        raise HTTPException(status_code=422, detail=f"At most {linkedin_agent.POSTS_MAX_COUNT} posts can be requested")
+
 @app.get("/api/profile/{profile_id}", response_model=ProfileResponse)
-async def get_profile(profile_id: str):
+async def get_profile(profile_id: str, request: Request, sections: Optional[str] = None, raw: bool = True, post_count: Optional[int] = Query(None, ge=1), post_page_size: Optional[int] = Query(None, ge=1, le=100), max_chars: Optional[int] = Query(None, ge=1), max_tokens: Optional[int] = Query(None, ge=1), priorities: Optional[str] = None):
+    """
+    Gets the ingest of a profile. Pass `raw=false` to leave out the raw LinkedIn data, and/or
+    `sections=experience,posts` to only get the selected text sections.
+    `post_count` sets how many of the most recent posts are included, fetched `post_page_size` at a time.
+    `max_chars` or `max_tokens` trims the text sections to fit, the least important first as ordered by
+    `priorities=posts,experience`, and leaves out the raw data.
+    """
+    fields = response_fields(sections, raw)
+    budget = budget_chars(max_chars, max_tokens)
+    order = section_priorities(priorities)
+    check_post_count(post_count)
     try:
         if linkedin_agent is None:
-            raise HTTPException(status_code=400, detail="LinkedIn login challenge required, you're screwed 💀 (please contact the maintainer if this issue persists).")
-        profile_data = await linkedin_agent.get_ingest(profile_id)
-        return profile_data
+            raise agent_unavailable_error()
+        entry = await linkedin_agent.get_ingest_entry(profile_id, client=client_id(request), post_count=post_count, post_page_size=post_page_size)
+        ingest = entry.ingest.with_post_count(post_count or linkedin_agent.POSTS_COUNT)
+        if budget is not None:
+            return Response(budget_json(ingest, budget, fields, order), media_type="application/json")
+        if fields is not None or ingest is not entry.ingest:
+            # Only render and serialize what was asked for, bypassing validation against the full response model
+            return Response(ingest.response_json(fields), media_type="application/json")
+        return encoded_response(entry, request)
+    except HTTPException:
+        raise
+    except QueueFullException as e:
+        raise queue_full_error(e)
     except FetchException:
         raise HTTPException(status_code=400, detail="Failed to fetch profile")
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
+@app.get("/api/profile/{profile_id}/raw", response_model=RawData)
+async def get_profile_raw(profile_id: str, request: Request, post_count: Optional[int] = Query(None, ge=1), post_page_size: Optional[int] = Query(None, ge=1, le=100)):
+    """Gets only the raw LinkedIn profile and posts data of a profile"""
+    check_post_count(post_count)
+    try:
+        if linkedin_agent is None:
+            raise agent_unavailable_error()
+        entry = await linkedin_agent.get_ingest_entry(profile_id, client=client_id(request), post_count=post_count, post_page_size=post_page_size)
+        ingest = entry.ingest.with_post_count(post_count or linkedin_agent.POSTS_COUNT)
+        return Response(ingest.raw.model_dump_json(), media_type="application/json")
+    except HTTPException:
+        raise
+    except QueueFullException as e:
+        raise queue_full_error(e)
+    except FetchException:
+        raise HTTPException(status_code=400, detail="Failed to fetch profile")
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+def error_detail(e: Exception) -> str:
+    if isinstance(e, FetchException):
+        return "Failed to fetch profile"
+    return str(e)
+
+def batch_item(profile_id: str, ingest: Optional[ProfileIngest], error: Optional[Exception], fields: Optional[set] = None, budget: Optional[int] = None, priorities: Optional[List[str]] = None) -> str:
+    """Encodes one result of a batch as JSON, only rendering the selected sections of the profile"""
+    if error is not None:
+        return json.dumps({"profile_id": profile_id, "status": "error", "detail": error_detail(error)})
+    profile = budget_json(ingest, budget, fields, priorities) if budget is not None else ingest.response_json(fields)
+    return f'{{"profile_id": {json.dumps(profile_id)}, "status": "ok", "profile": {profile}}}'
+
+@app.post("/api/profiles/batch")
+async def get_profiles_batch(batch: BatchRequest, request: Request, format: Literal["ndjson", "sse"] = "ndjson", sections: Optional[str] = None, raw: bool = True, post_count: Optional[int] = Query(None, ge=1), max_chars: Optional[int] = Query(None, ge=1), max_tokens: Optional[int] = Query(None, ge=1), priorities: Optional[str] = None):
+    """
+    Streams the ingests of several profiles, each one as soon as it is ready.
+    Cached profiles are sent immediately and the rest are fetched through the queue, after interactive requests.
+    `sections`, `raw` and `post_count` select the fields and posts of each profile, and `max_chars`, `max_tokens`
+    and `priorities` trim each profile to a budget, as for /api/profile.
+    """
+    fields = response_fields(sections, raw)
+    budget = budget_chars(max_chars, max_tokens)
+    order = section_priorities(priorities)
+    check_post_count(post_count)
+    if linkedin_agent is None:
+        raise agent_unavailable_error()
+    if not batch.profile_ids:
+        raise HTTPException(status_code=400, detail="No profile IDs provided")
+    if len(batch.profile_ids) > linkedin_agent.BATCH_MAX_PROFILES:
+        raise HTTPException(status_code=400, detail=f"At most {linkedin_agent.BATCH_MAX_PROFILES} profiles can be requested at once")
+
+    client = client_id(request)
+
+    async def stream():
+        async for profile_id, ingest, error in linkedin_agent.get_ingest_batch(batch.profile_ids, PRIORITY_BATCH, client, post_count):
+            item = batch_item(profile_id, ingest, error, fields, budget, order)
+            if format == "sse":
+                yield f"event: profile\ndata: {item}\n\n"
+            else:
+                yield item + "\n"
+        if format == "sse":
+            yield "event: done\ndata: {}\n\n"
+
+    media_type = "text/event-stream" if format == "sse" else "application/x-ndjson"
+    return StreamingResponse(stream(), media_type=media_type, headers={"Cache-Control": "no-cache"})
+
+async def job_status(job: Job) -> JobStatus:
+    description = await job_manager.describe(job)
+    error = description.pop("error")
+    return JobStatus(**description, detail=error_detail(error) if error is not None else None)
+
+@app.post("/api/jobs", response_model=JobStatus, status_code=202)
+async def submit_job(job_request: JobRequest, request: Request):
+    """Queues a profile ingest and returns a job ID to poll instead of waiting for the result"""
+    check_post_count(job_request.post_count)
+    if job_manager is None:
+        raise agent_unavailable_error()
+    try:
+        job = await job_manager.submit(job_request.profile_id, client_id(request), job_request.post_count)
+    except QueueFullException as e:
+        raise queue_full_error(e)
+    return await job_status(job)
+
+@app.get("/api/jobs/{job_id}", response_model=JobStatus)
+async def get_job(job_id: str):
+    if job_manager is None:
+        raise agent_unavailable_error()
+    job = await job_manager.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return await job_status(job)
+
 @app.get("/api/health")
 async def health_check():
+    """Reports whether a LinkedIn account is logged in to fetch profiles, answering 503 until one is"""
     if linkedin_agent is None:
         raise HTTPException(
             status_code=503, 
-            detail="LinkedIn login challenge required."
+            detail="LinkedIn agent failed to initialize."
         )
-    return {"status": "ok"}
+    readiness = linkedin_agent.get_readiness()
+    if readiness["status"] != "ok":
+        return JSONResponse(readiness, status_code=503)
+    return readiness
 
 @app.get("/api/queue")
-async def waiting_count():
+async def waiting_count(profile_id: Optional[str] = None):
     if linkedin_agent is None:
         raise HTTPException(
             status_code=503, 
             detail="LinkedIn login challenge required."
         )
-    return linkedin_agent.get_queue_status()
+    return await linkedin_agent.get_queue_status(profile_id)
+
+@app.get("/api/metrics", response_class=PlainTextResponse)
+async def metrics():
+    """Metrics in the Prometheus text exposition format"""
+    if linkedin_agent is None or not linkedin_agent.metrics.enabled:
+        raise HTTPException(status_code=404, detail="Metrics are not available")
+    return PlainTextResponse(linkedin_agent.metrics.render(), media_type="text/plain; version=0.0.4")
 
 @app.get("/{full_path:path}")
-async def catch_all(full_path: str):
+async def catch_all(full_path: str, request: Request):
     # 404 will be handled in frontend
-    return FileResponse(os.path.join(root_dir, "frontend/dist/index.html"))
+    return index_page.response(request)
@@ -1,4 +1,6 @@
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
+from datetime import datetime
+from typing import Literal
 
 class RawData(BaseModel):
     profile: dict
@@ -18,3 +20,37 @@ class ProfileResponse(BaseModel):
     languages: str
     posts: str
     raw: RawData
+
+# Text sections of a profile ingest, in display order
+TEXT_SECTIONS = (
+    "summary",
+    "experience",
+    "education",
+    "honors",
+    "certifications",
+    "projects",
+    "publications",
+    "volunteer",
+    "skills",
+    "languages",
+    "posts",
+)
+
+class BatchRequest(BaseModel):
+    profile_ids: list[str]
+
+class JobRequest(BaseModel):
+    profile_id: str
+    post_count: int | None = Field(None, ge=1)
+
+class JobStatus(BaseModel):
+    job_id: str
+    profile_id: str
+    status: Literal["queued", "running", "done", "failed"]
+    created_at: datetime
+    finished_at: datetime | None = None
+    queue_position: int | None = None  # 0 while the profile is being fetched
+    estimated_completion_timestamp: int | None = None
+    result: ProfileResponse | None = None
+    partial: bool = False  # whether result is still missing its posts
+    detail: str | None = None
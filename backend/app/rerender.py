@@ -0,0 +1,147 @@
+"""
+Re-renders stored raw LinkedIn data into profile ingests offline, e.g. after the text format changed or to export digests.
+
+Inputs are directories of .json files, .json files and .jsonl files. Each record is either RawData
+({"profile": ..., "posts": ...}), a profile response or cached ingest holding it under "raw", or a result line
+of /api/profiles/batch. Records are rendered across a pool of processes and written as JSONL in input order,
+in the format of /api/profiles/batch, as soon as they are ready. Nothing is fetched from LinkedIn.
+
+Run from the backend directory:
+    python -m app.rerender profiles/ more.jsonl --output ingests.jsonl --sections experience,posts
+"""
+from .api.ingest import ProfileIngest
+from .models.profile import RawData, TEXT_SECTIONS
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+import argparse
+import json
+import os
+import sys
+import time
+from typing import Iterator, List, Optional, Tuple
+
+# A record to render: its default profile_id, and the path of its file or its JSON text
+Item = Tuple[str, Optional[str], Optional[str]]
+
+
+def iter_items(paths: List[str]) -> Iterator[Item]:
+    """Yields the records of the inputs without parsing them, so that the workers do the parsing"""
+    for path in paths:
+        if os.path.isdir(path):
+            for name in sorted(os.listdir(path)):
+                if name.endswith(".json"):
+                    yield os.path.splitext(name)[0], os.path.join(path, name), None
+        elif path.endswith(".jsonl"):
+            with open(path, "r", encoding="utf-8") as f:
+                for line_number, line in enumerate(f, start=1):
+                    if line.strip():
+                        yield f"{os.path.basename(path)}:{line_number}", None, line
+        else:
+            yield os.path.splitext(os.path.basename(path))[0], path, None
+
+
+def extract_raw(record: dict) -> dict:
+    """The RawData fields of a record, which may hold them under "raw", or under "profile" for a batch result"""
+    if "raw" in record:
+        return record["raw"]
+    if isinstance(record.get("profile"), dict) and "raw" in record["profile"]:
+        return record["profile"]["raw"]
+    return record
+
+
+def render_item(item: Item, fields: set, post_count: Optional[int]) -> Tuple[str, bool]:
+    """Returns the output line of a record and whether it rendered"""
+    profile_id, path, text = item
+    try:
+        if path is not None:
+            with open(path, "r", encoding="utf-8") as f:
+                text = f.read()
+        record = json.loads(text)
+        profile_id = record.get("profile_id") or record.get("public_id") or profile_id
+        ingest = ProfileIngest.from_raw(RawData(**extract_raw(record)))
+        if post_count is not None:
+            ingest = ingest.with_post_count(post_count)
+        return f'{{"profile_id": {json.dumps(profile_id)}, "status": "ok", "profile": {ingest.response_json(fields)}}}', True
+    except Exception as e:
+        return json.dumps({"profile_id": profile_id, "status": "error", "detail": repr(e)}), False
+
+
+def render_chunk(items: List[Item], fields: set, post_count: Optional[int]) -> List[Tuple[str, bool]]:
+    return [render_item(item, fields, post_count) for item in items]
+
+
+def iter_chunks(items: Iterator[Item], size: int) -> Iterator[List[Item]]:
+    chunk = []
+    for item in items:
+        chunk.append(item)
+        if len(chunk) == size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def rerender(paths: List[str], out, fields: set, post_count: Optional[int] = None, workers: Optional[int] = None, chunk_size: int = 64) -> Tuple[int, int]:
+    """
+    Renders every record of the inputs to `out`, returns the number of records rendered and failed.
+    Only a few chunks per worker are in flight at a time, so inputs of any size are streamed.
+    """
+    rendered = failed = 0
+    workers = workers or os.cpu_count() or 1
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        pending = deque()
+        max_pending = workers * 4
+
+        def write(future):
+            nonlocal rendered, failed
+            for line, ok in future.result():
+                out.write(line + "\n")
+                rendered += ok
+                failed += not ok
+
+        for chunk in iter_chunks(iter_items(paths), chunk_size):
+            pending.append(pool.submit(render_chunk, chunk, fields, post_count))
+            if len(pending) >= max_pending:
+                write(pending.popleft())
+        while pending:
+            write(pending.popleft())
+    return rendered, failed
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Re-render stored raw LinkedIn data into profile ingests, without network access")
+    parser.add_argument("inputs", nargs="+", help="directories of .json files, .json files or .jsonl files")
+    parser.add_argument("--output", help="JSONL file to write, standard output by default")
+    parser.add_argument("--sections", help=f"comma-separated text sections to render, all by default ({', '.join(TEXT_SECTIONS)})")
+    parser.add_argument("--raw", action="store_true", help="include the raw data in the output")
+    parser.add_argument("--post-count", type=int, help="only keep this many of the most recent posts")
+    parser.add_argument("--workers", type=int, help="number of worker processes, the number of CPUs by default")
+    parser.add_argument("--chunk-size", type=int, default=64, help="records sent to a worker at a time")
+    args = parser.parse_args()
+    if args.post_count is not None and args.post_count < 1:
+        parser.error("--post-count must be at least 1")
+
+    sections = set(TEXT_SECTIONS)
+    if args.sections is not None:
+        sections = {section.strip() for section in args.sections.split(",") if section.strip()}
+        unknown = sections - set(TEXT_SECTIONS)
+        if unknown:
+            parser.error(f"Unknown sections: {', '.join(sorted(unknown))}. Valid sections are: {', '.join(TEXT_SECTIONS)}")
+    fields = {"full_name"} | sections
+    if args.raw:
+        fields.add("raw")
+
+    start = time.perf_counter()
+    out = open(args.output, "w", encoding="utf-8") if args.output else sys.stdout
+    try:
+        rendered, failed = rerender(args.inputs, out, fields, args.post_count, args.workers, args.chunk_size)
+    finally:
+        if args.output:
+            out.close()
+    elapsed = time.perf_counter() - start
+    total = rendered + failed
+    print(f"Rendered {rendered} of {total} profiles in {elapsed:.1f}s ({total / elapsed * 60 if elapsed else 0:.0f} per minute), {failed} failed", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,182 @@
+"""
+Serving of the frontend build: the SPA shell from memory, and the assets with precompressed variants and cache headers.
+
+To precompress the assets after building the frontend, run from the backend directory:
+    python -m app.static ../frontend/dist
+"""
+from fastapi import Request, Response
+from fastapi.staticfiles import StaticFiles
+from starlette.datastructures import Headers
+from starlette.responses import FileResponse
+from starlette.staticfiles import NotModifiedResponse
+import gzip
+import hashlib
+import mimetypes
+import os
+import re
+import sys
+import time
+from typing import Dict, Optional, Tuple
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+# Vite names built assets "<name>-<8 character hash>.<ext>", their content never changes under the same name
+HASHED_ASSET = re.compile(r"-[A-Za-z0-9_-]{8}\.[A-Za-z0-9]+$")
+IMMUTABLE = "public, max-age=31536000, immutable"
+# Precompressed variants, in order of preference
+PRECOMPRESSED = (("br", ".br"), ("gzip", ".gz"))
+# Files smaller than this are not worth compressing
+MIN_COMPRESS_SIZE = 256
+
+
+def accepted_encodings(accept_encoding: str) -> set:
+    """Content codings listed in an Accept-Encoding header, leaving out those refused with q=0"""
+    encodings = set()
+    for item in accept_encoding.split(","):
+        coding, _, params = item.strip().partition(";")
+        quality = params.strip().replace(" ", "")
+        if coding and quality not in ("q=0", "q=0.0", "q=0.00", "q=0.000"):
+            encodings.add(coding.strip().lower())
+    return encodings
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """Whether an If-None-Match header covers the given ETag"""
+    if not if_none_match:
+        return False
+    return if_none_match.strip() == "*" or etag in [tag.strip() for tag in if_none_match.split(",")]
+
+
+class CachedFile:
+    """
+    A small file served from memory with its gzip and brotli encodings and an ETag, such as the index.html of the SPA.
+    The file is read again when its modification time changes, which is checked at most every `check_interval_seconds`.
+    """
+    def __init__(self, path: str, cache_control: str = "no-cache", check_interval_seconds: float = 1.0):
+        self.path = path
+        self.cache_control = cache_control
+        self.check_interval_seconds = check_interval_seconds
+        self.media_type = mimetypes.guess_type(path)[0] or "application/octet-stream"
+        self._mtime: Optional[float] = None
+        self._checked_at = 0.0
+        self._body: Optional[bytes] = None
+        self._gzip: Optional[bytes] = None
+        self._brotli: Optional[bytes] = None
+        self._etag = ""
+
+    def _refresh(self):
+        now = time.monotonic()
+        if now - self._checked_at < self.check_interval_seconds:
+            return
+        self._checked_at = now
+        try:
+            mtime = os.stat(self.path).st_mtime
+        except OSError:
+            self._mtime, self._body = None, None
+            return
+        if mtime == self._mtime:
+            return
+        with open(self.path, "rb") as f:
+            body = f.read()
+        self._mtime, self._body = mtime, body
+        self._etag = f'W/"{hashlib.blake2b(body, digest_size=16).hexdigest()}"'
+        compress = len(body) >= MIN_COMPRESS_SIZE
+        self._gzip = gzip.compress(body, 9) if compress else None
+        self._brotli = brotli.compress(body) if compress and brotli is not None else None
+
+    def response(self, request: Request) -> Response:
+        self._refresh()
+        if self._body is None:
+            return Response("Frontend not built", status_code=404, media_type="text/plain")
+        headers = {"ETag": self._etag, "Vary": "Accept-Encoding", "Cache-Control": self.cache_control}
+        if etag_matches(request.headers.get("if-none-match"), self._etag):
+            return Response(status_code=304, headers=headers)
+        encodings = accepted_encodings(request.headers.get("accept-encoding", ""))
+        if self._brotli is not None and "br" in encodings:
+            body, headers["Content-Encoding"] = self._brotli, "br"
+        elif self._gzip is not None and "gzip" in encodings:
+            body, headers["Content-Encoding"] = self._gzip, "gzip"
+        else:
+            body = self._body
+        return Response(body, media_type=self.media_type, headers=headers)
+
+
+class PrecompressedStaticFiles(StaticFiles):
+    """
+    Static files that are served from a `.br` or `.gz` variant next to them when the client accepts it.
+    Hashed file names are cached by browsers for a year, other files are revalidated with their ETag.
+    """
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        # Stat results of the variants of a file (None if missing), by file path, valid while the file's mtime is unchanged
+        self._variants: Dict[str, Tuple[float, Dict[str, Optional[os.stat_result]]]] = {}
+
+    def _find_variants(self, full_path: str, stat_result: os.stat_result) -> Dict[str, Optional[os.stat_result]]:
+        cached = self._variants.get(full_path)
+        if cached is not None and cached[0] == stat_result.st_mtime:
+            return cached[1]
+        variants = {}
+        for encoding, suffix in PRECOMPRESSED:
+            try:
+                variants[encoding] = os.stat(full_path + suffix)
+            except OSError:
+                variants[encoding] = None
+        self._variants[full_path] = (stat_result.st_mtime, variants)
+        return variants
+
+    def file_response(self, full_path, stat_result: os.stat_result, scope, status_code: int = 200) -> Response:
+        full_path = str(full_path)
+        request_headers = Headers(scope=scope)
+        encodings = accepted_encodings(request_headers.get("accept-encoding", ""))
+        variants = self._find_variants(full_path, stat_result)
+        response = None
+        for encoding, suffix in PRECOMPRESSED:
+            variant = variants[encoding]
+            if variant is not None and encoding in encodings:
+                response = FileResponse(
+                    full_path + suffix,
+                    status_code=status_code,
+                    stat_result=variant,
+                    media_type=mimetypes.guess_type(full_path)[0] or "text/plain",
+                    headers={"Content-Encoding": encoding},
+                )
+                break
+        if response is None:
+            response = FileResponse(full_path, status_code=status_code, stat_result=stat_result)
+        if any(variants.values()):
+            response.headers["Vary"] = "Accept-Encoding"
+        response.headers["Cache-Control"] = IMMUTABLE if HASHED_ASSET.search(os.path.basename(full_path)) else "no-cache"
+        if self.is_not_modified(response.headers, request_headers):
+            return NotModifiedResponse(response.headers)
+        return response
+
+
+def precompress(directory: str) -> int:
+    """Writes .gz (and .br, if brotli is installed) variants of the text files of a directory, returns the number of files compressed"""
+    count = 0
+    for root, _, names in os.walk(directory):
+        for name in names:
+            path = os.path.join(root, name)
+            media_type = mimetypes.guess_type(path)[0] or ""
+            if name.endswith((".gz", ".br")) or not (media_type.startswith("text/") or media_type in ("application/javascript", "application/json", "image/svg+xml")):
+                continue
+            with open(path, "rb") as f:
+                body = f.read()
+            if len(body) < MIN_COMPRESS_SIZE:
+                continue
+            with open(path + ".gz", "wb") as f:
+                f.write(gzip.compress(body, 9))
+            if brotli is not None:
+                with open(path + ".br", "wb") as f:
+                    f.write(brotli.compress(body))
+            count += 1
+    return count
+
+
+if __name__ == "__main__":
+    if len(sys.argv) != 2:
+        sys.exit("usage: python -m app.static <frontend dist directory>")
+    print(f"Precompressed {precompress(sys.argv[1])} files")
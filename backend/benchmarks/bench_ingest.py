@@ -0,0 +1,154 @@
+"""
+Benchmarks the ingest pipeline of LinkedInAgent against a fake LinkedIn client.
+
+Scenarios:
+    cold_fetch            distinct profiles fetched through the queue (cache misses)
+    warm_cache_hit        the same cached profile requested repeatedly
+    concurrent_duplicates many concurrent requests for one uncached profile
+    large_post_render     rendering a profile with a large number of posts
+
+Anti rate-limiting delays and noise are turned off so that the numbers reflect the service itself.
+With --recording, LinkedIn responses recorded by the agent (recording.mode: record) are replayed instead.
+Results are printed as JSON, and written to --output if given, so runs can be compared across releases.
+
+Run from the backend directory:
+    python -m benchmarks.bench_ingest --latency 0.05 --output bench.json
+"""
+import argparse
+import asyncio
+import contextlib
+import json
+import platform
+import statistics
+import sys
+import time
+from datetime import datetime, timezone
+from typing import List
+
+from app.api.linkedin import LinkedInAgent
+from app.api.formatter import render_profile, render_posts
+from app.api.recording import ReplayLinkedin
+from .fake_linkedin import FakeLinkedin
+from .synthetic import make_profile, make_posts
+
+
+def percentile(samples: List[float], q: float) -> float:
+    ordered = sorted(samples)
+    index = min(len(ordered) - 1, max(0, round(q / 100 * len(ordered)) - 1))
+    return ordered[index]
+
+
+def summarize(latencies: List[float], elapsed: float, **extra) -> dict:
+    return {
+        "requests": len(latencies),
+        "p50_ms": percentile(latencies, 50) * 1000,
+        "p99_ms": percentile(latencies, 99) * 1000,
+        "mean_ms": statistics.fmean(latencies) * 1000,
+        "throughput_rps": len(latencies) / elapsed if elapsed else 0.0,
+        **extra,
+    }
+
+
+def make_agent(args, accounts: int = 1) -> LinkedInAgent:
+    if args.recording:
+        clients = [ReplayLinkedin.from_file(args.recording, latency_scale=args.latency_scale) for _ in range(accounts)]
+    else:
+        clients = [
+            FakeLinkedin(latency=args.latency, post_count=args.posts, entries=args.entries, text_size=args.text_size)
+            for _ in range(accounts)
+        ]
+    agent = LinkedInAgent(clients=clients)
+    agent.DELAY_ON = False
+    agent.NOISE_ON = False
+    agent.CACHE_ENABLED = True
+    return agent
+
+
+async def timed(coro) -> float:
+    start = time.perf_counter()
+    await coro
+    return time.perf_counter() - start
+
+
+async def bench_cold_fetch(args) -> dict:
+    agent = make_agent(args)
+    latencies = []
+    start = time.perf_counter()
+    for i in range(args.requests):
+        latencies.append(await timed(agent.get_ingest(f"cold-{i}")))
+    return summarize(latencies, time.perf_counter() - start)
+
+
+async def bench_warm_cache_hit(args) -> dict:
+    agent = make_agent(args)
+    await agent.get_ingest("warm")
+    latencies = []
+    start = time.perf_counter()
+    for _ in range(args.requests * 10):
+        latencies.append(await timed(agent.get_ingest("warm")))
+    return summarize(latencies, time.perf_counter() - start, cache=agent.get_cache_stats())
+
+
+async def bench_concurrent_duplicates(args) -> dict:
+    agent = make_agent(args)
+    start = time.perf_counter()
+    latencies = await asyncio.gather(*[timed(agent.get_ingest("duplicate")) for _ in range(args.concurrency)])
+    upstream_calls = sum(account.linkedin.calls["get_profile"] for account in agent.accounts)
+    return summarize(list(latencies), time.perf_counter() - start, upstream_profile_calls=upstream_calls)
+
+
+def bench_large_post_render(args) -> dict:
+    profile = make_profile(entries=args.entries, text_size=args.text_size)
+    posts = make_posts(args.render_posts, text_size=args.text_size)
+    latencies = []
+    start = time.perf_counter()
+    for _ in range(args.render_repeat):
+        render_start = time.perf_counter()
+        render_profile(profile)
+        render_posts(posts, profile)
+        latencies.append(time.perf_counter() - render_start)
+    return summarize(latencies, time.perf_counter() - start, posts=args.render_posts)
+
+
+async def run(args) -> dict:
+    return {
+        "cold_fetch": await bench_cold_fetch(args),
+        "warm_cache_hit": await bench_warm_cache_hit(args),
+        "concurrent_duplicates": await bench_concurrent_duplicates(args),
+        "large_post_render": bench_large_post_render(args),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the LinkedIngest ingest pipeline with a fake LinkedIn client")
+    parser.add_argument("--latency", type=float, default=0.05, help="latency of each fake LinkedIn call in seconds")
+    parser.add_argument("--posts", type=int, default=10, help="number of posts returned per profile")
+    parser.add_argument("--entries", type=int, default=5, help="number of entries in each profile section")
+    parser.add_argument("--text-size", type=int, default=200, help="length of each free-text field")
+    parser.add_argument("--requests", type=int, default=50, help="number of requests per scenario")
+    parser.add_argument("--concurrency", type=int, default=100, help="number of concurrent duplicate requests")
+    parser.add_argument("--render-posts", type=int, default=1000, help="number of posts in the large render scenario")
+    parser.add_argument("--render-repeat", type=int, default=50, help="number of renders in the large render scenario")
+    parser.add_argument("--recording", help="replay the LinkedIn responses recorded in this JSONL file instead of synthetic ones")
+    parser.add_argument("--latency-scale", type=float, default=1.0, help="multiplier of the recorded latencies when replaying")
+    parser.add_argument("--output", help="write the JSON report to this file")
+    args = parser.parse_args()
+
+    # Keep the agent's logging out of the JSON report on stdout
+    with contextlib.redirect_stdout(sys.stderr):
+        results = asyncio.run(run(args))
+    report = {
+        "timestamp": datetime.now(timezone.utc).isoformat(),
+        "python": platform.python_version(),
+        "parameters": {key: value for key, value in vars(args).items() if key != "output"},
+        "results": results,
+    }
+    encoded = json.dumps(report, indent=2)
+    print(encoded)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(encoded)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,34 @@
+"""
+Micro-benchmark of profile ingest rendering over synthetic profiles with 10, 100 and 1000 posts.
+
+Run from the backend directory:
+    python -m benchmarks.bench_render
+"""
+import timeit
+
+from app.api.formatter import render_profile, render_posts
+from .synthetic import make_profile, make_posts
+
+
+def bench(post_count: int, repeat: int = 5) -> dict:
+    profile = make_profile()
+    posts = make_posts(post_count)
+    number = max(1, 1000 // post_count)
+
+    def render():
+        render_profile(profile)
+        render_posts(posts, profile)
+
+    best = min(timeit.repeat(render, number=number, repeat=repeat)) / number
+    return {"posts": post_count, "best_ms": best * 1000, "us_per_post": best * 1e6 / post_count}
+
+
+def main():
+    print(f"{'posts':>6} {'best (ms)':>10} {'per post (us)':>14}")
+    for post_count in (10, 100, 1000):
+        result = bench(post_count)
+        print(f"{result['posts']:>6} {result['best_ms']:>10.3f} {result['us_per_post']:>14.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,41 @@
+"""
+A stand-in for linkedin_api.Linkedin that serves synthetic payloads after a configurable latency.
+"""
+import time
+from collections import Counter
+
+from .synthetic import make_profile, make_posts
+
+
+class FakeLinkedin:
+    def __init__(self, latency: float = 0.0, post_count: int = 10, entries: int = 5, text_size: int = 200):
+        self.latency = latency
+        self.post_count = post_count
+        self.entries = entries
+        self.text_size = text_size
+        self.calls = Counter()
+
+    def _respond(self, method: str):
+        self.calls[method] += 1
+        if self.latency:
+            time.sleep(self.latency)
+
+    def get_profile(self, public_id=None, urn_id=None):
+        self._respond("get_profile")
+        return make_profile(public_id, entries=self.entries, text_size=self.text_size)
+
+    def get_profile_posts(self, public_id=None, urn_id=None, post_count=10):
+        self._respond("get_profile_posts")
+        return make_posts(self.post_count, text_size=self.text_size)
+
+    def get_current_profile_views(self):
+        self._respond("get_current_profile_views")
+        return 0
+
+    def get_invitations(self, start=0, limit=3):
+        self._respond("get_invitations")
+        return []
+
+    def get_feed_posts(self, limit=10, exclude_promoted_posts=True):
+        self._respond("get_feed_posts")
+        return []
@@ -0,0 +1,173 @@
+"""
+Load-tests a running LinkedIngest server over HTTP, e.g. one replaying recorded LinkedIn responses.
+
+Each of --concurrency clients sends requests back to back over a keep-alive connection, picking one of:
+    profile  GET /api/profile/<id>?raw=false for a profile drawn from --profiles distinct IDs
+    queue    GET /api/queue
+    batch    POST /api/profiles/batch?raw=false with --batch-size profiles, read until the stream ends
+in the proportions of --mix, for --duration seconds or until --requests requests were sent.
+Throughput, latency percentiles and status codes are reported per kind of request, as JSON.
+
+Start the server in replay mode (recording.mode: replay in backend/config.yaml, with anti_rate_limiting turned off
+to measure the service itself), then run from the backend directory:
+    python -m benchmarks.load_test --url http://localhost:8000 --concurrency 20 --duration 30 --output load.json
+"""
+import argparse
+import http.client
+import json
+import platform
+import random
+import threading
+import time
+from collections import Counter, defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+from typing import Dict, List, Optional, Tuple
+from urllib.parse import quote, urlsplit
+
+from .bench_ingest import summarize
+
+KINDS = ("profile", "queue", "batch")
+
+
+def parse_mix(mix: str) -> Dict[str, float]:
+    """Parses "profile=8,queue=1,batch=1" into the weights of each kind of request"""
+    weights = {}
+    for item in mix.split(","):
+        kind, _, weight = item.partition("=")
+        kind = kind.strip()
+        if kind not in KINDS:
+            raise ValueError(f"Unknown request kind {kind!r}, valid kinds are: {', '.join(KINDS)}")
+        weights[kind] = float(weight or 1)
+    return weights
+
+
+class LoadClient:
+    """One simulated client, sending requests one at a time over its own connection"""
+    def __init__(self, url: str, profile_ids: List[str], batch_size: int, timeout: float, seed: int):
+        parts = urlsplit(url)
+        self.host = parts.hostname
+        self.port = parts.port
+        self.https = parts.scheme == "https"
+        self.base_path = parts.path.rstrip("/")
+        self.profile_ids = profile_ids
+        self.batch_size = batch_size
+        self.timeout = timeout
+        self.random = random.Random(seed)
+        self._conn: Optional[http.client.HTTPConnection] = None
+
+    def _connection(self) -> http.client.HTTPConnection:
+        if self._conn is None:
+            connection_class = http.client.HTTPSConnection if self.https else http.client.HTTPConnection
+            self._conn = connection_class(self.host, self.port, timeout=self.timeout)
+        return self._conn
+
+    def request(self, kind: str) -> Tuple[str, float]:
+        """Sends one request of the given kind, returns its status ("error" if it failed) and latency"""
+        if kind == "profile":
+            method, path, body = "GET", f"/api/profile/{quote(self.random.choice(self.profile_ids))}?raw=false", None
+        elif kind == "queue":
+            method, path, body = "GET", "/api/queue", None
+        else:
+            profile_ids = self.random.sample(self.profile_ids, min(self.batch_size, len(self.profile_ids)))
+            method, path, body = "POST", "/api/profiles/batch?raw=false", json.dumps({"profile_ids": profile_ids})
+        headers = {"Content-Type": "application/json"} if body is not None else {}
+        start = time.perf_counter()
+        try:
+            conn = self._connection()
+            conn.request(method, self.base_path + path, body=body, headers=headers)
+            response = conn.getresponse()
+            response.read()
+            status = str(response.status)
+        except Exception as e:
+            # The connection is opened again for the next request
+            status = f"error: {type(e).__name__}"
+            self.close()
+        return status, time.perf_counter() - start
+
+    def close(self):
+        if self._conn is not None:
+            self._conn.close()
+            self._conn = None
+
+
+def run(args) -> dict:
+    weights = parse_mix(args.mix)
+    kinds, kind_weights = list(weights), list(weights.values())
+    profile_ids = [f"{args.profile_prefix}{i}" for i in range(args.profiles)]
+    latencies: Dict[str, List[float]] = defaultdict(list)
+    statuses: Dict[str, Counter] = defaultdict(Counter)
+    lock = threading.Lock()
+    sent = 0
+    deadline = time.perf_counter() + args.duration
+
+    def next_request() -> bool:
+        nonlocal sent
+        with lock:
+            if time.perf_counter() >= deadline or (args.requests and sent >= args.requests):
+                return False
+            sent += 1
+            return True
+
+    def client_loop(index: int):
+        client = LoadClient(args.url, profile_ids, args.batch_size, args.timeout, seed=args.seed + index)
+        try:
+            while next_request():
+                kind = client.random.choices(kinds, kind_weights)[0]
+                status, latency = client.request(kind)
+                with lock:
+                    statuses[kind][status] += 1
+                    if status.startswith("2"):
+                        latencies[kind].append(latency)
+        finally:
+            client.close()
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.concurrency) as pool:
+        for future in [pool.submit(client_loop, index) for index in range(args.concurrency)]:
+            future.result()
+    elapsed = time.perf_counter() - start
+
+    results = {}
+    for kind in kinds:
+        results[kind] = summarize(latencies[kind], elapsed, statuses=dict(statuses[kind])) if latencies[kind] else {"requests": 0, "statuses": dict(statuses[kind])}
+    successful = [latency for kind in kinds for latency in latencies[kind]]
+    results["total"] = summarize(successful, elapsed, sent=sent) if successful else {"requests": 0, "sent": sent}
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Load-test a running LinkedIngest server over HTTP")
+    parser.add_argument("--url", default="http://localhost:8000", help="base URL of the server")
+    parser.add_argument("--concurrency", type=int, default=10, help="number of clients sending requests at the same time")
+    parser.add_argument("--duration", type=float, default=30, help="seconds to send requests for")
+    parser.add_argument("--requests", type=int, default=0, help="stop after this many requests (0 for no limit)")
+    parser.add_argument("--mix", default="profile=8,queue=1,batch=1", help="relative weights of the kinds of requests")
+    parser.add_argument("--profiles", type=int, default=100, help="number of distinct profile IDs to request, fewer means more cache hits")
+    parser.add_argument("--profile-prefix", default="load-test-", help="prefix of the requested profile IDs")
+    parser.add_argument("--batch-size", type=int, default=5, help="profiles per batch request")
+    parser.add_argument("--timeout", type=float, default=120, help="seconds to wait for a response")
+    parser.add_argument("--seed", type=int, default=0, help="seed of the random choices of the clients")
+    parser.add_argument("--output", help="write the JSON report to this file")
+    args = parser.parse_args()
+    try:
+        parse_mix(args.mix)
+    except ValueError as e:
+        parser.error(str(e))
+
+    results = run(args)
+    report = {
+        "timestamp": datetime.now(timezone.utc).isoformat(),
+        "python": platform.python_version(),
+        "parameters": {key: value for key, value in vars(args).items() if key != "output"},
+        "results": results,
+    }
+    encoded = json.dumps(report, indent=2)
+    print(encoded)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(encoded)
+
+
+if __name__ == "__main__":
+    main()
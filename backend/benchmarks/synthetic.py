@@ -0,0 +1,77 @@
+"""
+Synthetic LinkedIn API payloads shaped like the responses of linkedin_api, for benchmarking without network access.
+"""
+from typing import List
+
+MEMBER_URN = "urn:li:member:1"
+
+
+def make_profile(public_id: str = "john-doe", entries: int = 5, text_size: int = 200) -> dict:
+    text = ("lorem ipsum dolor sit amet " * (text_size // 27 + 1))[:text_size]
+    return {
+        "public_id": public_id,
+        "member_urn": MEMBER_URN,
+        "firstName": "John",
+        "lastName": "Doe",
+        "headline": "Software Engineer",
+        "geoLocationName": "London",
+        "geoCountryName": "United Kingdom",
+        "summary": text,
+        "experience": [
+            {
+                "title": f"Engineer {i}",
+                "companyName": f"Company {i}",
+                "timePeriod": {"startDate": {"year": 2010 + i, "month": 1}, "endDate": {"year": 2011 + i, "month": 6}},
+                "description": text,
+            }
+            for i in range(entries)
+        ],
+        "education": [
+            {
+                "schoolName": f"University {i}",
+                "degreeName": "BSc",
+                "fieldOfStudy": "Computer Science",
+                "timePeriod": {"startDate": {"year": 2005 + i}, "endDate": {"year": 2009 + i}},
+                "description": text,
+            }
+            for i in range(entries)
+        ],
+        "projects": [{"title": f"Project {i}", "members": [1, 2], "description": text} for i in range(entries)],
+        "honors": [{"title": f"Award {i}", "issuer": "Org", "issueDate": {"year": 2020, "month": 1, "day": 1}} for i in range(entries)],
+        "skills": [{"name": f"Skill {i}"} for i in range(entries * 4)],
+        "languages": [{"name": "English", "proficiency": "NATIVE_OR_BILINGUAL"}, {"name": "French"}],
+        "certifications": [{"name": f"Cert {i}", "authority": "Authority", "timePeriod": {"startDate": {"year": 2021, "month": 3}}} for i in range(entries)],
+        "publications": [{"name": f"Paper {i}", "authors": [1, 2, 3], "date": {"year": 2019, "month": 7, "day": 1}, "description": text} for i in range(entries)],
+        "volunteer": [{"role": "Mentor", "companyName": f"Charity {i}", "cause": "EDUCATION", "description": text} for i in range(entries)],
+    }
+
+
+def make_post(index: int, text_size: int = 500) -> dict:
+    text = (f"post {index} " * (text_size // 7 + 1))[:text_size]
+    counts = {
+        "numComments": index % 50,
+        "numShares": index % 7,
+        "reactionTypeCounts": [{"count": index % 300, "reactionType": "LIKE"}, {"count": index % 11, "reactionType": "PRAISE"}],
+    }
+    kind = index % 3
+    if kind == 0:
+        return {"actor": {"urn": MEMBER_URN}, "socialDetail": {"totalSocialActivityCounts": counts}, "commentary": {"text": {"text": text}}}
+    if kind == 1:
+        return {
+            "actor": {"urn": "urn:li:member:2", "image": {"attributes": [{"miniProfile": {"firstName": "Jane", "lastName": "Roe", "occupation": "CEO"}}]}},
+            "socialDetail": {"totalSocialActivityCounts": counts},
+            "commentary": {"text": {"text": text}},
+        }
+    return {
+        "actor": {"urn": MEMBER_URN},
+        "socialDetail": {"totalSocialActivityCounts": counts},
+        "commentary": {"text": {"text": text}},
+        "resharedUpdate": {
+            "commentary": {"text": {"text": text}},
+            "actor": {"image": {"attributes": [{"miniCompany": {"name": "Company"}}]}},
+        },
+    }
+
+
+def make_posts(count: int, text_size: int = 500) -> List[dict]:
+    return [make_post(i, text_size) for i in range(count)]
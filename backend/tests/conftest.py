@@ -0,0 +1,59 @@
+"""
+Shared helpers of the tests, which run against fake LinkedIn clients without credentials or network access.
+
+Run from the backend directory:
+    python -m pytest tests
+"""
+import pytest
+
+from app.api.jobs import JobManager
+from app.api.linkedin import LinkedInAgent
+
+LOAD_CONFIG = LinkedInAgent.load_config
+
+
+@pytest.fixture
+def make_agent(monkeypatch):
+    """
+    Builds agents serving the given clients (or logging in with the given credentials), without anti rate-limiting
+    delays and noise, coordinated through `coordination` if given.
+    Keyword arguments override settings of config.yaml by attribute name, e.g. CACHE_TTL_MINUTES=5.
+    """
+    def make(clients=None, credentials=None, coordination=None, **settings) -> LinkedInAgent:
+        def load_config(self):
+            LOAD_CONFIG(self)
+            self.DELAY_ON = False
+            self.NOISE_ON = False
+            self.CACHE_ENABLED = True
+            self.CACHE_PERSISTENT_ENABLED = False
+            self.COORDINATION_BACKEND = "none"
+            self.RECORDING_MODE = "none"
+            for name, value in settings.items():
+                setattr(self, name, value)
+        monkeypatch.setattr(LinkedInAgent, "load_config", load_config)
+        return LinkedInAgent(credentials=credentials, clients=clients, coordination=coordination)
+    return make
+
+
+@pytest.fixture
+def api(make_agent, monkeypatch):
+    """
+    Serves the API of app.main from an agent built by make_agent with the same arguments,
+    returning a TestClient that runs the app's lifespan until the end of the test.
+    """
+    from starlette.testclient import TestClient
+    from app import main
+
+    opened = []
+
+    def serve(clients=None, **settings) -> TestClient:
+        agent = make_agent(clients, **settings)
+        monkeypatch.setattr(main, "linkedin_agent", agent)
+        monkeypatch.setattr(main, "job_manager", JobManager(agent, ttl_minutes=agent.JOBS_TTL_MINUTES))
+        client = TestClient(main.app)
+        client.__enter__()
+        opened.append(client)
+        return client
+    yield serve
+    for client in opened:
+        client.__exit__(None, None, None)
@@ -0,0 +1,110 @@
+"""
+Fake LinkedIn clients for the tests, built on the synthetic client of the benchmarks.
+"""
+import threading
+import time
+
+from linkedin_api.client import ChallengeException
+
+from benchmarks.fake_linkedin import FakeLinkedin
+from benchmarks.synthetic import make_posts
+
+
+class SlowProfileLinkedin(FakeLinkedin):
+    """A fake client whose profile requests take `profile_latency` seconds"""
+    def __init__(self, profile_latency: float = 0.0, **kwargs):
+        super().__init__(**kwargs)
+        self.profile_latency = profile_latency
+
+    def get_profile(self, public_id=None, urn_id=None):
+        profile = super().get_profile(public_id, urn_id)
+        if self.profile_latency:
+            time.sleep(self.profile_latency)
+        return profile
+
+
+class ChallengedLinkedin(FakeLinkedin):
+    """A fake client whose session hits a login challenge on every profile request"""
+    def get_profile(self, public_id=None, urn_id=None):
+        self._respond("get_profile")
+        raise ChallengeException("CHALLENGE")
+
+
+class TrackingLinkedin(FakeLinkedin):
+    """A fake client recording the order of its calls and the most calls it served at the same time"""
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        self.order = []
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self._lock = threading.Lock()
+
+    def _respond(self, method: str):
+        with self._lock:
+            self.order.append(method)
+            self.in_flight += 1
+            self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        try:
+            super()._respond(method)
+        finally:
+            with self._lock:
+                self.in_flight -= 1
+
+
+class FakeResponse:
+    def __init__(self, data: dict):
+        self.data = data
+
+    def json(self) -> dict:
+        return self.data
+
+
+class PagedLinkedin(FakeLinkedin):
+    """
+    A fake client serving `post_count` posts, newest first, page by page through linkedin_api's raw requests.
+    Every page but the last one links to the next with a pagination token, which the next request must send back.
+    """
+    makes_raw_requests = True
+
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        self.posts = []
+        self.requests = []
+        self.add_posts(self.post_count)
+
+    def add_posts(self, count: int):
+        """Publish `count` new posts, which come before the older ones"""
+        new_posts = make_posts(count, text_size=self.text_size)
+        for index, post in enumerate(new_posts):
+            post["updateMetadata"] = {"urn": f"urn:li:activity:{len(self.posts) + count - index}"}
+        self.posts = new_posts + self.posts
+
+    def get_profile(self, public_id=None, urn_id=None):
+        profile = super().get_profile(public_id, urn_id)
+        profile["profile_urn"] = f"urn:li:fs_miniProfile:{public_id}"
+        return profile
+
+    def _fetch(self, url, params=None, **kwargs):
+        self._respond("_fetch")
+        self.requests.append(dict(params))
+        start, count = params["start"], params["count"]
+        if start and params.get("paginationToken") != f"token-{start}":
+            raise Exception(f"Unexpected pagination token {params.get('paginationToken')!r} at {start}")
+        end = start + count
+        return FakeResponse({
+            "elements": self.posts[start:end],
+            "metadata": {"paginationToken": f"token-{end}" if end < len(self.posts) else ""},
+        })
+
+
+class FailingLinkedin(FakeLinkedin):
+    """A fake client whose profile requests fail after its latency, for all profiles or only the `failing` ones"""
+    def __init__(self, *args, failing=None, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.failing = failing
+
+    def get_profile(self, public_id=None, urn_id=None):
+        if self.failing is not None and public_id not in self.failing:
+            return super().get_profile(public_id, urn_id)
+        self._respond("get_profile")
+        raise Exception("LinkedIn is unavailable")
@@ -0,0 +1,72 @@
+import asyncio
+import time
+
+import pytest
+
+from app.api import linkedin
+from app.api.linkedin import FetchException
+from benchmarks.fake_linkedin import FakeLinkedin
+from .fakes import ChallengedLinkedin
+
+
+def test_two_accounts_fetch_in_parallel(make_agent):
+    async def scenario():
+        clients = [FakeLinkedin(latency=0.2), FakeLinkedin(latency=0.2)]
+        agent = make_agent(clients)
+        start = time.perf_counter()
+        responses = await asyncio.gather(*[agent.get_ingest(f"profile-{i}") for i in range(4)])
+        elapsed = time.perf_counter() - start
+
+        assert [response.raw.profile["public_id"] for response in responses] == [f"profile-{i}" for i in range(4)]
+        assert [account.fetch_count for account in agent.accounts] == [2, 2]
+        # Each fetch makes two calls of 0.2 seconds: four fetches take 1.6 seconds on a single account
+        assert elapsed < 1.2
+
+    asyncio.run(scenario())
+
+
+def test_challenged_account_is_disabled_and_its_request_served_by_another(make_agent):
+    async def scenario():
+        challenged, healthy = ChallengedLinkedin(), FakeLinkedin()
+        agent = make_agent([challenged, healthy])
+        responses = await asyncio.gather(agent.get_ingest("first"), agent.get_ingest("second"))
+
+        assert [response.full_name for response in responses] == ["John Doe", "John Doe"]
+        assert challenged.calls["get_profile"] == 1
+        assert healthy.calls["get_profile"] == 2
+        assert not agent.accounts[0].active
+        assert "ChallengeException" in agent.accounts[0].disabled_reason
+        assert agent.accounts[1].active
+
+    asyncio.run(scenario())
+
+
+def test_requests_fail_once_every_account_is_disabled(make_agent):
+    async def scenario():
+        agent = make_agent([ChallengedLinkedin()])
+        pending = await asyncio.gather(agent.get_ingest("first"), agent.get_ingest("second"), return_exceptions=True)
+
+        assert [type(result) for result in pending] == [FetchException, FetchException]
+        assert agent.get_active_accounts() == []
+        with pytest.raises(FetchException):
+            await agent.get_ingest("third")
+
+    asyncio.run(scenario())
+
+
+def test_accounts_added_by_a_reload_get_threads_of_their_own(make_agent, monkeypatch):
+    async def scenario():
+        monkeypatch.setattr(linkedin, "Linkedin", lambda username, password, debug=False: FakeLinkedin(latency=0.2))
+        credentials = [{"username": f"user{index}@example.com", "password": "secret"} for index in range(3)]
+        agent = make_agent(credentials=credentials[:1], EXECUTOR_MAX_WORKERS=1)
+        agent.start()
+        agent._update_accounts(credentials)
+        while len(agent.get_active_accounts()) < 3:
+            await asyncio.sleep(0.01)
+
+        start = time.perf_counter()
+        await asyncio.gather(*[agent.get_ingest(f"profile-{index}") for index in range(3)])
+        # A profile and its posts take two requests each, one at a time per account
+        assert time.perf_counter() - start < 2 * 2 * 0.2
+
+    asyncio.run(scenario())
@@ -0,0 +1,75 @@
+import time
+
+import pytest
+
+from app.models.profile import TEXT_SECTIONS
+from benchmarks.fake_linkedin import FakeLinkedin
+
+
+def test_profiles_can_be_requested_with_selected_sections(api):
+    client = api([FakeLinkedin()])
+
+    full = client.get("/api/profile/someone").json()
+    assert set(full) == {"full_name", "raw", *TEXT_SECTIONS}
+
+    without_raw = client.get("/api/profile/someone", params={"raw": "false"}).json()
+    assert set(without_raw) == {"full_name", *TEXT_SECTIONS}
+
+    selected = client.get("/api/profile/someone", params={"sections": "experience, posts", "raw": "false"}).json()
+    assert set(selected) == {"full_name", "experience", "posts"}
+    assert selected["experience"] == full["experience"] and selected["posts"] == full["posts"]
+
+
+def test_unknown_sections_are_rejected(api):
+    client = api([FakeLinkedin()])
+    response = client.get("/api/profile/someone", params={"sections": "experience,hobbies"})
+    assert response.status_code == 422
+    assert "hobbies" in response.json()["detail"]
+
+
+def test_cached_profiles_are_revalidated_with_their_etag(api):
+    linkedin = FakeLinkedin()
+    client = api([linkedin])
+    response = client.get("/api/profile/someone")
+    etag = response.headers["etag"]
+    assert response.headers["cache-control"] == "no-cache"
+
+    revalidated = client.get("/api/profile/someone", headers={"If-None-Match": etag})
+    assert revalidated.status_code == 304 and revalidated.content == b""
+    assert revalidated.headers["etag"] == etag
+    assert client.get("/api/profile/someone", headers={"If-None-Match": '"other"'}).status_code == 200
+    assert linkedin.calls["get_profile"] == 1
+
+
+def test_profiles_are_compressed_with_an_accepted_encoding(api):
+    client = api([FakeLinkedin()])
+    identity = client.get("/api/profile/someone", headers={"Accept-Encoding": "identity"})
+    assert "content-encoding" not in identity.headers
+    assert identity.headers["vary"] == "Accept-Encoding"
+
+    gzipped = client.get("/api/profile/someone", headers={"Accept-Encoding": "gzip"})
+    assert gzipped.headers["content-encoding"] == "gzip"
+    assert gzipped.json() == identity.json()
+
+    refused = client.get("/api/profile/someone", headers={"Accept-Encoding": "gzip;q=0, identity"})
+    assert "content-encoding" not in refused.headers
+    assert refused.content == identity.content
+
+
+def test_brotli_is_preferred_when_installed(api):
+    pytest.importorskip("brotli")
+    client = api([FakeLinkedin()])
+    assert client.get("/api/profile/someone", headers={"Accept-Encoding": "gzip, br"}).headers["content-encoding"] == "br"
+    assert client.get("/api/profile/someone", headers={"Accept-Encoding": "gzip, br;q=0"}).headers["content-encoding"] == "gzip"
+
+
+def test_requests_beyond_a_full_queue_are_told_when_to_retry(api):
+    client = api([FakeLinkedin(latency=0.2)], QUEUE_MAX_LENGTH=1)
+    assert client.post("/api/jobs", json={"profile_id": "running"}).status_code == 202
+    time.sleep(0.05)
+    queued = client.post("/api/jobs", json={"profile_id": "queued"})
+    assert queued.status_code == 202 and queued.json()["status"] == "queued"
+
+    for response in [client.post("/api/jobs", json={"profile_id": "rejected"}), client.get("/api/profile/rejected")]:
+        assert response.status_code == 429
+        assert int(response.headers["retry-after"]) >= 1
@@ -0,0 +1,22 @@
+import asyncio
+
+from app.api.linkedin import FetchException
+from .fakes import FailingLinkedin
+
+
+def test_batch_results_stream_in_completion_order_without_duplicates(make_agent):
+    async def scenario():
+        client = FailingLinkedin(latency=0.05, failing={"broken"})
+        agent = make_agent([client])
+        await agent.get_ingest("cached")
+
+        results = [result async for result in agent.get_ingest_batch(["slow", "broken", "cached", "slow"])]
+
+        assert [public_id for public_id, _, _ in results] == ["cached", "slow", "broken"]
+        assert client.calls["get_profile"] == 3
+        (_, cached, _), (_, slow, _), (_, broken, error) = results
+        assert cached.full_name and slow.full_name
+        # A failed profile is reported on its own, the rest of the batch still comes through
+        assert broken is None and isinstance(error, FetchException)
+
+    asyncio.run(scenario())
@@ -0,0 +1,52 @@
+from app.api.budget import fit_to_budget
+from app.api.formatter import join_posts
+from app.api.ingest import ProfileIngest
+from app.models.profile import RawData, TEXT_SECTIONS
+from benchmarks.synthetic import make_profile, make_posts
+
+
+def make_ingest(entries: int = 3, posts: int = 6, text_size: int = 600) -> ProfileIngest:
+    return ProfileIngest.from_raw(RawData(profile=make_profile("john-doe", entries=entries, text_size=text_size), posts=make_posts(posts, text_size=text_size)))
+
+
+def text_size(result: dict) -> int:
+    return len(result["full_name"]) + sum(len(result[name]) for name in TEXT_SECTIONS if name in result)
+
+
+def test_a_profile_within_budget_is_left_untouched():
+    ingest = make_ingest()
+    result = fit_to_budget(ingest, 10 ** 6)
+    assert all(result[name] == ingest.section(name) for name in TEXT_SECTIONS if ingest.section(name))
+    assert result["budget"]["truncated"] is False
+    assert result["budget"]["omitted_sections"] == [] and result["budget"]["dropped_posts"] == 0
+    assert result["budget"]["chars"] == text_size(result)
+
+
+def test_trimmed_profiles_fit_the_budget_and_report_what_was_left_out():
+    ingest = make_ingest()
+    full = text_size(fit_to_budget(ingest, 10 ** 6))
+    for max_chars in [full - 1, full // 2, full // 5, 1500, 300]:
+        result = fit_to_budget(ingest, max_chars)
+        budget = result["budget"]
+        assert budget["chars"] == text_size(result) <= max_chars
+        assert budget["truncated"] is True
+        kept = [name for name in TEXT_SECTIONS if name in result]
+        assert set(budget["omitted_sections"]) == {name for name in TEXT_SECTIONS if ingest.section(name)} - set(kept)
+
+    # The least important sections go first
+    result = fit_to_budget(ingest, 1500)
+    assert "summary" in result and "volunteer" in result["budget"]["omitted_sections"]
+    prioritized = fit_to_budget(ingest, 1500, priorities=["volunteer"])
+    assert "volunteer" in prioritized and "volunteer" not in prioritized["budget"]["omitted_sections"]
+
+
+def test_the_most_engaging_posts_are_kept():
+    ingest = make_ingest(posts=6, text_size=100)
+    entries = ingest.post_entries()
+    # Engagement grows with the index of the synthetic posts
+    max_chars = len(ingest.full_name) + len(join_posts([entries[4], entries[5]])) + 10
+    result = fit_to_budget(ingest, max_chars, sections=["posts"])
+
+    assert result["posts"] == join_posts([entries[4], entries[5]])
+    assert result["budget"]["dropped_posts"] == 4
+    assert result["budget"]["chars"] <= max_chars
@@ -0,0 +1,92 @@
+from app.api.cache import CacheEntry, ProfileCache, SQLiteCacheStore
+from app.api.ingest import MAX_POST_VIEWS, ProfileIngest
+from app.models.profile import RawData
+
+from .fakes import FakeLinkedin
+
+
+def make_ingest(public_id: str, **profile) -> ProfileIngest:
+    client = FakeLinkedin(**profile)
+    return ProfileIngest.from_raw(RawData(profile=client.get_profile(public_id), posts=client.get_profile_posts(public_id)))
+
+
+def test_entry_sizes_are_measured_and_grow_with_the_encoded_response():
+    cache = ProfileCache()
+    ingest = make_ingest("someone")
+    entry = cache.new_entry(ingest)
+    assert entry.size == len(ingest.raw.model_dump_json())
+    cache.put_entry("someone", entry)
+
+    entry.json
+    encoded = len(entry.json) + len(entry.gzip) + len(entry.brotli or b"")
+    sections = sum(len(text) for text in ingest.sections.values())
+    assert entry.size == len(ingest.raw.model_dump_json()) + sections + encoded
+    assert cache.stats()["size_bytes"] == entry.size
+
+
+def test_encoding_an_entry_evicts_beyond_the_byte_budget():
+    first, second = ProfileCache().new_entry(make_ingest("first")), ProfileCache().new_entry(make_ingest("second"))
+    encoded = ProfileCache().new_entry(make_ingest("second"))
+    encoded.json
+    cache = ProfileCache(max_size_mb=(first.size + encoded.size - 1) / (1024 * 1024))
+    cache.put_entry("first", cache.new_entry(first.ingest))
+    cache.put_entry("second", cache.new_entry(second.ingest))
+    assert len(cache) == 2
+
+    cache.get_entry("second").json
+    assert "first" not in cache
+    assert "second" in cache
+    assert cache.stats()["size_bytes"] <= cache.max_bytes
+
+
+def test_an_entry_encoded_past_the_whole_budget_is_dropped_alone():
+    small, large = ProfileCache().new_entry(make_ingest("small")), ProfileCache().new_entry(make_ingest("large", entries=20, text_size=1000))
+    cache = ProfileCache(max_size_mb=(small.size + large.size + 1) / (1024 * 1024))
+    cache.put_entry("small", cache.new_entry(small.ingest))
+    cache.put_entry("large", cache.new_entry(large.ingest))
+
+    entry = cache.get_entry("large")
+    assert entry.json and entry.size > cache.max_bytes
+    assert "large" not in cache
+    assert "small" in cache
+    assert cache.stats()["size_bytes"] == cache.peek("small").size
+
+
+def test_an_entry_too_large_for_memory_is_served_from_the_store(tmp_path):
+    store = SQLiteCacheStore(str(tmp_path / "cache.db"))
+    small, large = ProfileCache().new_entry(make_ingest("small")), ProfileCache().new_entry(make_ingest("large", entries=20, text_size=1000))
+    cache = ProfileCache(max_size_mb=(large.size - 1) / (1024 * 1024), store=store)
+    cache.put_entry("small", cache.new_entry(small.ingest))
+    store.save("large", CacheEntry(large.ingest))
+
+    entry = cache.get_entry("large")
+    assert entry is not None and entry.ingest.full_name == large.ingest.full_name
+    assert "large" not in cache
+    assert "small" in cache
+    assert cache.load_from_store("large") is not None and "small" in cache
+
+
+def test_sections_rendered_after_caching_are_measured():
+    cache = ProfileCache()
+    ingest = make_ingest("someone")
+    entry = cache.new_entry(ingest)
+    cache.put_entry("someone", entry)
+    before = entry.size
+
+    ingest.response_json({"full_name", "experience"})
+    assert entry.size == before + len(ingest.sections["experience"])
+    assert cache.stats()["size_bytes"] == entry.size
+
+
+def test_views_with_fewer_posts_are_bounded_and_measured():
+    cache = ProfileCache()
+    ingest = make_ingest("someone")
+    entry = cache.new_entry(ingest)
+    cache.put_entry("someone", entry)
+
+    for count in range(1, 10):
+        ingest.with_post_count(count).section("posts")
+    assert list(ingest._post_views) == list(range(10 - MAX_POST_VIEWS, 10))
+    views = sum(len(view.sections["posts"]) for view in ingest._post_views.values())
+    assert entry.size == len(ingest.raw.model_dump_json()) + views
+    assert cache.stats()["size_bytes"] == entry.size
@@ -0,0 +1,60 @@
+import asyncio
+
+import pytest
+
+from app.api.linkedin import FetchException
+from benchmarks.fake_linkedin import FakeLinkedin
+from .fakes import FailingLinkedin
+
+
+def test_concurrent_requests_for_a_profile_share_one_fetch(make_agent):
+    async def scenario():
+        client = FakeLinkedin(latency=0.1)
+        agent = make_agent([client])
+        responses = await asyncio.gather(*[agent.get_ingest("shared") for _ in range(5)])
+
+        assert client.calls["get_profile"] == 1
+        assert client.calls["get_profile_posts"] == 1
+        assert all(response == responses[0] for response in responses)
+
+    asyncio.run(scenario())
+
+
+def test_a_failed_fetch_fails_every_caller_sharing_it(make_agent):
+    async def scenario():
+        client = FailingLinkedin(latency=0.1)
+        agent = make_agent([client])
+        results = await asyncio.gather(*[agent.get_ingest("broken") for _ in range(3)], return_exceptions=True)
+
+        assert [type(result) for result in results] == [FetchException] * 3
+        assert client.calls["get_profile"] == 1
+
+    asyncio.run(scenario())
+
+
+def test_a_cancelled_caller_does_not_cancel_the_shared_fetch(make_agent):
+    async def scenario():
+        client = FakeLinkedin(latency=0.1)
+        agent = make_agent([client])
+        leaving = asyncio.ensure_future(agent.get_ingest("shared"))
+        staying = asyncio.ensure_future(agent.get_ingest("shared"))
+        while client.calls["get_profile"] == 0:
+            await asyncio.sleep(0.01)
+        leaving.cancel()
+
+        response = await staying
+        assert response.full_name == "John Doe"
+        with pytest.raises(asyncio.CancelledError):
+            await leaving
+
+        # The fetch of a caller that went away on its own still completes and fills the cache
+        alone = asyncio.ensure_future(agent.get_ingest("alone"))
+        while client.calls["get_profile"] == 1:
+            await asyncio.sleep(0.01)
+        alone.cancel()
+        while "alone" in agent._inflight:
+            await asyncio.sleep(0.01)
+        await agent.get_ingest("alone")
+        assert client.calls["get_profile"] == 2
+
+    asyncio.run(scenario())
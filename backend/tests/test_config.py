@@ -0,0 +1,21 @@
+from app.api import linkedin
+from app.api.linkedin import LinkedInAgent
+
+from .fakes import FakeLinkedin
+
+
+def test_missing_keys_keep_their_defaults_and_a_broken_reload_keeps_the_settings(tmp_path, monkeypatch):
+    config_path = tmp_path / "config.yaml"
+    # A config file from before most settings were added
+    config_path.write_text("cache:\n  ttl_minutes: 5\nanti_rate_limiting:\n  delay: off\n")
+    monkeypatch.setattr(linkedin, "CONFIG_PATH", str(config_path))
+    agent = LinkedInAgent(clients=[FakeLinkedin()])
+    assert agent.CACHE_TTL_MINUTES == 5
+    assert agent.DELAY_ON is False
+    assert agent.MAX_DELAY == 15
+    assert agent.POSTS_COUNT == 10
+
+    config_path.write_text("cache: [ttl_minutes: 10\n")
+    agent.load_config()
+    assert agent.CACHE_TTL_MINUTES == 5
+    assert agent.DELAY_ON is False
@@ -0,0 +1,131 @@
+"""
+Several agents sharing a coordination backend stand in for several processes.
+The tests run against both backends, the redis one through fakeredis, and are skipped for it if fakeredis is missing.
+"""
+import asyncio
+import threading
+import time
+
+import pytest
+
+from app.api import linkedin
+from app.api.coordination import RedisCoordinationBackend, SQLiteCoordinationBackend
+from app.api.jobs import JobManager
+
+from .fakes import FakeLinkedin, SlowProfileLinkedin, TrackingLinkedin
+
+
+@pytest.fixture(params=["sqlite", "redis"])
+def new_backend(request, tmp_path):
+    """Builds backends that share the same storage, one per agent"""
+    if request.param == "sqlite":
+        path = str(tmp_path / "coordination.sqlite3")
+        return lambda: SQLiteCoordinationBackend(path)
+    fakeredis = pytest.importorskip("fakeredis")
+    server = fakeredis.FakeServer()
+    return lambda: RedisCoordinationBackend(fakeredis.FakeRedis(server=server))
+
+
+def make_agents(make_agent, new_backend, clients) -> list:
+    return [make_agent([client], coordination=new_backend(), COORDINATION_POLL_INTERVAL_SECONDS=0.01) for client in clients]
+
+
+class LoginCounter:
+    """Stands in for linkedin_api.Linkedin, counting the logins in progress at the same time"""
+    def __init__(self, latency: float):
+        self.latency = latency
+        self.logins = 0
+        self.in_progress = 0
+        self.max_in_progress = 0
+        self._lock = threading.Lock()
+
+    def __call__(self, username, password, **kwargs) -> FakeLinkedin:
+        with self._lock:
+            self.logins += 1
+            self.in_progress += 1
+            self.max_in_progress = max(self.max_in_progress, self.in_progress)
+        time.sleep(self.latency)
+        with self._lock:
+            self.in_progress -= 1
+        return FakeLinkedin()
+
+
+def test_a_profile_requested_on_two_processes_is_fetched_once(make_agent, new_backend):
+    async def scenario():
+        clients = [FakeLinkedin(latency=0.1), FakeLinkedin(latency=0.1)]
+        agents = make_agents(make_agent, new_backend, clients)
+        results = await asyncio.gather(*(agent.get_ingest("shared") for agent in agents))
+        assert results[0] == results[1]
+        assert sum(client.calls["get_profile"] for client in clients) == 1
+
+    asyncio.run(scenario())
+
+
+def test_a_profile_fetched_by_one_process_is_served_from_the_shared_cache(make_agent, new_backend):
+    async def scenario():
+        clients = [FakeLinkedin(), FakeLinkedin()]
+        fetching, serving = make_agents(make_agent, new_backend, clients)
+        result = await fetching.get_ingest("shared")
+        assert await serving.get_ingest("shared") == result
+        assert clients[0].calls["get_profile"] == 1
+        assert sum(clients[1].calls.values()) == 0
+
+    asyncio.run(scenario())
+
+
+def test_processes_sharing_an_account_fetch_one_profile_at_a_time(make_agent, new_backend):
+    async def scenario():
+        clients = [TrackingLinkedin(latency=0.1), TrackingLinkedin(latency=0.1)]
+        agents = make_agents(make_agent, new_backend, clients)
+        start = time.perf_counter()
+        await asyncio.gather(agents[0].get_ingest("first"), agents[1].get_ingest("second"))
+        elapsed = time.perf_counter() - start
+        # Both agents serve their client as account-1, a profile and its posts take two requests each
+        assert elapsed >= 4 * 0.1
+        assert all(client.max_in_flight == 1 for client in clients)
+
+    asyncio.run(scenario())
+
+
+def test_processes_sharing_an_account_log_in_one_at_a_time(make_agent, monkeypatch, new_backend):
+    async def scenario():
+        login = LoginCounter(latency=0.2)
+        monkeypatch.setattr(linkedin, "Linkedin", login)
+        credentials = [{"username": "shared@example.com", "password": "secret"}]
+        agents = [
+            make_agent(credentials=credentials, coordination=new_backend(), COORDINATION_POLL_INTERVAL_SECONDS=0.01)
+            for _ in range(2)
+        ]
+        for agent in agents:
+            agent.start()
+        while not all(agent.get_active_accounts() for agent in agents):
+            await asyncio.sleep(0.01)
+        assert login.logins == 2
+        assert login.max_in_progress == 1
+
+    asyncio.run(scenario())
+
+
+def test_a_job_can_be_polled_on_another_process(make_agent, new_backend):
+    async def scenario():
+        running, polled = make_agents(make_agent, new_backend, [SlowProfileLinkedin(profile_latency=0.2), FakeLinkedin()])
+        jobs = JobManager(running)
+        other_jobs = JobManager(polled)
+
+        job = await jobs.submit("shared", post_count=3)
+        remote = await other_jobs.get(job.id)
+        while remote is None:
+            await asyncio.sleep(0.01)
+            remote = await other_jobs.get(job.id)
+        assert (await other_jobs.describe(remote))["status"] in ("queued", "running")
+
+        await job.task
+        while not remote.done:
+            await asyncio.sleep(0.01)
+            remote = await other_jobs.get(job.id)
+        description = await other_jobs.describe(remote)
+        assert description["status"] == "done"
+        assert description["result"] == job.result
+        assert await other_jobs.get("unknown") is None
+
+    asyncio.run(scenario())
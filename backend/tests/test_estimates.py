@@ -0,0 +1,32 @@
+import time
+
+from benchmarks.fake_linkedin import FakeLinkedin
+
+
+def test_completion_estimates_simulate_the_queue_over_the_active_accounts(make_agent, monkeypatch):
+    agent = make_agent([FakeLinkedin(), FakeLinkedin()])
+    monkeypatch.setattr(agent, "expected_fetch_seconds", lambda: 10.0)
+    now = 1000.0
+    monkeypatch.setattr(time, "time", lambda: now)
+
+    # "late" has run longer than expected, so its account is assumed to be free now
+    snapshot = ({"started": now - 4, "late": now - 12}, ["first", "second", "third"])
+    running, queued, new_request = agent._estimate_completions(snapshot)
+
+    assert running == {"started": now + 6, "late": now}
+    assert queued == [now + 10, now + 16, now + 20]
+    assert new_request == now + 26
+
+
+def test_completion_estimates_with_one_account_queue_one_behind_another(make_agent, monkeypatch):
+    agent = make_agent([FakeLinkedin(), FakeLinkedin()])
+    agent.accounts[1].active = False
+    monkeypatch.setattr(agent, "expected_fetch_seconds", lambda: 10.0)
+    now = 1000.0
+    monkeypatch.setattr(time, "time", lambda: now)
+
+    running, queued, new_request = agent._estimate_completions(({"started": now - 4}, ["first", "second"]))
+
+    assert running == {"started": now + 6}
+    assert queued == [now + 16, now + 26]
+    assert new_request == now + 36
@@ -0,0 +1,33 @@
+import asyncio
+import time
+
+from .fakes import SlowProfileLinkedin
+
+
+def test_cache_hits_and_queue_status_answer_during_a_slow_fetch(make_agent):
+    async def scenario():
+        client = SlowProfileLinkedin()
+        agent = make_agent([client])
+        await agent.get_ingest("cached")
+
+        client.profile_latency = 1.0
+        cold = asyncio.ensure_future(agent.get_ingest("cold"))
+        # Let the worker pick the fetch up, its profile request then blocks an executor thread for a second
+        while await agent.get_queue_position("cold") != 0:
+            await asyncio.sleep(0.01)
+
+        start = time.perf_counter()
+        await agent.get_ingest("cached")
+        cache_hit_seconds = time.perf_counter() - start
+
+        start = time.perf_counter()
+        status = await agent.get_queue_status("cold")
+        queue_status_seconds = time.perf_counter() - start
+
+        assert not cold.done()
+        assert status["request"]["queue_position"] == 0
+        assert cache_hit_seconds < 0.05
+        assert queue_status_seconds < 0.05
+        await cold
+
+    asyncio.run(scenario())
@@ -0,0 +1,47 @@
+import asyncio
+
+from app.api.jobs import JobManager
+from app.models.profile import TEXT_SECTIONS
+from .fakes import TrackingLinkedin
+
+NOISE_METHODS = {"get_current_profile_views", "get_invitations", "get_feed_posts"}
+
+
+def test_overlap_plan_makes_one_request_at_a_time_in_the_sequential_order(make_agent):
+    async def scenario():
+        client = TrackingLinkedin(latency=0.05)
+        agent = make_agent(
+            [client], FETCH_PLAN="overlap",
+            DELAY_ON=True, MIN_DELAY=0.01, MAX_DELAY=0.01, NOISE_ON=True, NOISE_PROBABILITY=1.0,
+        )
+        entry = await agent.get_ingest_entry("someone")
+
+        assert entry.ingest.raw.posts
+        assert client.max_in_flight == 1
+        assert [method if method not in NOISE_METHODS else "noise" for method in client.order] == ["get_profile", "noise", "get_profile_posts", "noise"]
+        # The sections that do not depend on the posts were rendered while the posts were fetched
+        assert set(entry.ingest.sections) == set(TEXT_SECTIONS) - {"posts"}
+
+    asyncio.run(scenario())
+
+
+def test_overlap_plan_publishes_the_profile_to_jobs_before_its_posts(make_agent):
+    async def scenario():
+        agent = make_agent([TrackingLinkedin(latency=0.1)], FETCH_PLAN="overlap")
+        jobs = JobManager(agent)
+        job = await jobs.submit("someone")
+        while agent.get_partial_ingest("someone") is None:
+            assert not job.done
+            await asyncio.sleep(0.01)
+
+        running = await jobs.describe(job)
+        assert running["status"] == "running" and running["partial"]
+        assert running["result"].experience and running["result"].posts == ""
+        assert running["result"].raw.posts is None
+
+        await job.task
+        done = await jobs.describe(job)
+        assert done["status"] == "done" and not done["partial"]
+        assert done["result"].posts and done["result"].experience == running["result"].experience
+
+    asyncio.run(scenario())
@@ -0,0 +1,15 @@
+import json
+from pathlib import Path
+
+from app.api.ingest import ProfileIngest
+from app.models.profile import RawData
+from benchmarks.synthetic import make_profile, make_posts
+
+# Rendered by the single-pass renderer that LinkedInAgent._get_ingest used before the formatter module existed
+GOLDEN_RESPONSE = Path(__file__).parent / "data" / "golden_response.json"
+
+
+def test_rendered_sections_match_the_golden_output():
+    raw = RawData(profile=make_profile("john-doe", entries=3, text_size=80), posts=make_posts(3, text_size=80))
+    response = ProfileIngest.from_raw(raw).response()
+    assert response.model_dump(exclude={"raw"}) == json.loads(GOLDEN_RESPONSE.read_text())
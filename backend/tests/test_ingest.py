@@ -0,0 +1,44 @@
+import json
+
+from app.api.ingest import ProfileIngest
+from app.models.profile import RawData, TEXT_SECTIONS
+from benchmarks.synthetic import make_profile, make_posts
+
+
+def make_raw(**profile_changes) -> RawData:
+    profile = make_profile("john-doe", entries=3, text_size=80)
+    profile.update(profile_changes)
+    return RawData(profile=profile, posts=make_posts(3, text_size=80))
+
+
+def test_a_section_that_fails_to_render_does_not_affect_the_others():
+    healthy = ProfileIngest.from_raw(make_raw()).response()
+    broken = ProfileIngest.from_raw(make_raw(experience=[{"companyName": "No title"}], certifications=[{}]))
+    response = broken.response()
+
+    assert response.experience == "# EXPERIENCES\nFailed to process experience data\n"
+    assert response.certifications == "# LICENSES AND CERTIFICATIONS\nFailed to process certifications data\n"
+    assert set(broken.errors) == {"experience", "certifications"}
+    for name in set(TEXT_SECTIONS) - {"experience", "certifications"}:
+        assert getattr(response, name) == getattr(healthy, name)
+
+
+def test_only_the_selected_sections_are_rendered():
+    ingest = ProfileIngest.from_raw(make_raw())
+    payload = json.loads(ingest.response_json({"full_name", "experience", "posts"}))
+
+    assert list(payload) == ["full_name", "experience", "posts"]
+    assert set(ingest.sections) == {"experience", "posts"}
+    assert payload["experience"] == ProfileIngest.from_raw(make_raw()).response().experience
+
+
+def test_ingests_load_from_full_responses_stored_before_lazy_rendering():
+    response = ProfileIngest.from_raw(make_raw()).response()
+    ingest = ProfileIngest.from_json(response.model_dump_json().encode())
+
+    assert set(ingest.sections) == set(TEXT_SECTIONS)
+    assert ingest.posts_depth is None
+    assert ingest.response() == response
+
+    reloaded = ProfileIngest.from_json(ingest.to_json().encode())
+    assert reloaded.sections == ingest.sections and reloaded.raw == ingest.raw
@@ -0,0 +1,43 @@
+import asyncio
+
+from app.api.jobs import JobManager
+from app.api.linkedin import FetchException
+from benchmarks.fake_linkedin import FakeLinkedin
+from .fakes import FailingLinkedin
+
+
+def test_jobs_go_from_queued_to_done_or_failed(make_agent):
+    async def scenario():
+        agent = make_agent([FailingLinkedin(latency=0.1, failing={"broken"})])
+        jobs = JobManager(agent)
+        first = await jobs.submit("someone")
+        second = await jobs.submit("broken")
+
+        assert (await jobs.describe(first))["status"] == "running"
+        waiting = await jobs.describe(second)
+        assert waiting["status"] == "queued" and waiting["queue_position"] == 1
+
+        await asyncio.gather(first.task, second.task, return_exceptions=True)
+        done = await jobs.describe(await jobs.get(first.id))
+        assert done["status"] == "done" and done["result"].full_name and done["finished_at"] is not None
+        failed = await jobs.describe(await jobs.get(second.id))
+        assert failed["status"] == "failed" and isinstance(failed["error"], FetchException)
+
+    asyncio.run(scenario())
+
+
+def test_finished_jobs_are_forgotten_after_their_ttl(make_agent):
+    async def scenario():
+        agent = make_agent([FakeLinkedin(latency=0.05)])
+        jobs = JobManager(agent, ttl_minutes=0.001)
+        finished = await jobs.submit("someone")
+        await finished.task
+        await asyncio.sleep(0.1)
+
+        running = await jobs.submit("someone-else")
+        assert await jobs.get(finished.id) is None
+        # Only finished jobs expire
+        assert await jobs.get(running.id) is running
+        await running.task
+
+    asyncio.run(scenario())
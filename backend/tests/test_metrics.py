@@ -0,0 +1,54 @@
+import asyncio
+
+from app.api.metrics import MetricsRegistry
+from benchmarks.fake_linkedin import FakeLinkedin
+
+
+def test_metrics_are_rendered_in_the_prometheus_text_format():
+    registry = MetricsRegistry(prefix="test_")
+    counter = registry.counter("errors_total", "Errors by type", ("type",))
+    histogram = registry.histogram("call_seconds", "Call latency", buckets=(0.1, 1.0))
+    registry.gauge("depth", "Queue depth", lambda: 3)
+    counter.inc(type="FetchException")
+    counter.inc(2, type='say "hi"\n')
+    histogram.observe(0.05)
+    histogram.observe(0.5)
+    histogram.observe(5)
+
+    assert registry.render() == "\n".join([
+        "# HELP test_errors_total Errors by type",
+        "# TYPE test_errors_total counter",
+        'test_errors_total{type="FetchException"} 1',
+        'test_errors_total{type="say \\"hi\\"\\n"} 2',
+        "# HELP test_call_seconds Call latency",
+        "# TYPE test_call_seconds histogram",
+        'test_call_seconds_bucket{le="0.1"} 1',
+        'test_call_seconds_bucket{le="1"} 2',
+        'test_call_seconds_bucket{le="+Inf"} 3',
+        "test_call_seconds_sum 5.55",
+        "test_call_seconds_count 3",
+        "# HELP test_depth Queue depth",
+        "# TYPE test_depth gauge",
+        "test_depth 3",
+    ]) + "\n"
+
+
+def test_a_disabled_registry_records_nothing():
+    registry = MetricsRegistry(enabled=False)
+    counter = registry.counter("errors_total", "Errors")
+    histogram = registry.histogram("call_seconds", "Call latency")
+    counter.inc()
+    with registry.timer(histogram):
+        pass
+    assert "errors_total 1" not in registry.render()
+    assert "call_seconds_count" not in registry.render()
+
+
+def test_agent_metrics_report_fetches(make_agent):
+    agent = make_agent([FakeLinkedin()], METRICS_ENABLED=True)
+    asyncio.run(agent.get_ingest("someone"))
+    rendered = agent.metrics.render()
+
+    assert 'linkedingest_linkedin_call_seconds_count{method="get_profile"} 1' in rendered
+    assert 'linkedingest_cache_lookups_total{result="miss"} 1' in rendered
+    assert "linkedingest_queue_depth 0" in rendered
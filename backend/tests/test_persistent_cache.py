@@ -0,0 +1,33 @@
+import asyncio
+from datetime import datetime, timedelta
+
+from app.api.cache import CacheEntry
+from benchmarks.fake_linkedin import FakeLinkedin
+
+
+def test_restarted_agent_serves_stored_profiles_until_they_expire(make_agent, tmp_path):
+    path = str(tmp_path / "profile_cache.sqlite3")
+    settings = {"CACHE_PERSISTENT_ENABLED": True, "CACHE_PERSISTENT_PATH": path, "CACHE_TTL_MINUTES": 60, "CACHE_STALE_MINUTES": 0}
+
+    async def first_run():
+        agent = make_agent([FakeLinkedin()], **settings)
+        await agent.get_ingest("fresh")
+        await agent.get_ingest("expired")
+        # Stored as if it had been fetched two hours ago
+        expired = agent._cache.peek("expired")
+        store = agent._cache.store
+        store.save("expired", CacheEntry(expired.ingest, created_at=datetime.now() - timedelta(hours=2), expires_at=datetime.now() - timedelta(hours=1)))
+        store.close()
+
+    async def second_run():
+        client = FakeLinkedin()
+        agent = make_agent([client], **settings)
+        response = await agent.get_ingest("fresh")
+        assert response.raw.profile["public_id"] == "fresh"
+        assert sum(client.calls.values()) == 0
+
+        await agent.get_ingest("expired")
+        assert client.calls["get_profile"] == 1
+
+    asyncio.run(first_run())
+    asyncio.run(second_run())
@@ -0,0 +1,31 @@
+import asyncio
+
+from .fakes import PagedLinkedin
+
+
+def test_posts_are_fetched_page_by_page_and_cached_ones_are_reused(make_agent):
+    async def scenario():
+        client = PagedLinkedin(post_count=30)
+        # Every cached profile is stale right away, so the next request refreshes it in the background
+        agent = make_agent([client], CACHE_TTL_MINUTES=0, CACHE_STALE_MINUTES=60)
+
+        first = await agent.get_ingest_entry("someone", post_count=25, post_page_size=10)
+        assert [(request["start"], request["count"], request.get("paginationToken")) for request in client.requests] == [
+            (0, 10, None), (10, 10, "token-10"), (20, 10, "token-20"),
+        ]
+        assert client.requests[0]["profileUrn"] == "urn:li:fsd_profile:someone"
+        assert first.ingest.raw.posts == client.posts[:25]
+
+        client.add_posts(3)
+        client.requests.clear()
+        await agent.get_ingest_entry("someone", post_count=25, post_page_size=10)
+        while client.calls["get_profile"] < 2 or await agent.get_queue_position("someone") is not None:
+            await asyncio.sleep(0.01)
+
+        # The first page reaches the newest cached post, the older ones are reused instead of fetched again
+        assert [request["start"] for request in client.requests] == [0]
+        refreshed = await agent.get_ingest_entry("someone", post_count=25)
+        assert refreshed is not first
+        assert refreshed.ingest.raw.posts == client.posts[:25]
+
+    asyncio.run(scenario())
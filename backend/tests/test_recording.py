@@ -0,0 +1,41 @@
+import asyncio
+import json
+
+from app.api import linkedin
+from .fakes import PagedLinkedin
+
+NOISE_METHODS = {"get_current_profile_views", "get_invitations", "get_feed_posts"}
+NOISE = {"NOISE_ON": True, "NOISE_PROBABILITY": 1.0, "MIN_DELAY": 0, "MAX_DELAY": 0}
+
+
+def test_recorded_responses_replay_the_same_profiles(make_agent, monkeypatch, tmp_path):
+    path = tmp_path / "recordings" / "linkedin.jsonl"
+
+    async def record():
+        monkeypatch.setattr(linkedin, "Linkedin", lambda username, password, debug=False: PagedLinkedin(post_count=25, latency=0.01))
+        agent = make_agent(
+            credentials=[{"username": "user@example.com", "password": "secret"}],
+            RECORDING_MODE="record", RECORDING_PATH=str(path), **NOISE,
+        )
+        response = await agent.get_ingest("someone")
+        agent._recorder.close()
+        return response
+
+    async def replay():
+        agent = make_agent(RECORDING_MODE="replay", RECORDING_PATH=str(path), RECORDING_LATENCY_SCALE=0, **NOISE)
+        return agent, await agent.get_ingest("someone"), await agent.get_ingest("never-recorded")
+
+    recorded = asyncio.run(record())
+    records = [json.loads(line) for line in path.read_text().splitlines()]
+    methods = [record["method"] for record in records]
+    # The profile and a page of posts, each followed by a noise request
+    assert [method if method not in NOISE_METHODS else "noise" for method in methods] == ["get_profile", "noise", "_fetch", "noise"]
+    assert all(record["latency"] >= 0 and "response" in record for record in records)
+
+    agent, replayed, unrecorded = asyncio.run(replay())
+    assert replayed == recorded
+    assert replayed.raw.posts and len(replayed.raw.posts) == 10
+    # Profiles that were not recorded are answered with a recorded one
+    assert unrecorded.full_name == recorded.full_name
+    replay_client = agent.accounts[0].linkedin
+    assert replay_client.calls["get_profile"] == 2
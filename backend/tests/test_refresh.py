@@ -0,0 +1,62 @@
+import asyncio
+import time
+
+from benchmarks.fake_linkedin import FakeLinkedin
+
+
+def test_stale_profiles_are_served_while_they_are_revalidated(make_agent):
+    async def scenario():
+        client = FakeLinkedin(latency=0.1)
+        agent = make_agent([client], CACHE_TTL_MINUTES=0.1 / 60, CACHE_STALE_MINUTES=1)
+        first = await agent.get_ingest_entry("someone")
+        await asyncio.sleep(0.15)
+        assert first.is_stale() and not first.is_expired()
+
+        start = time.perf_counter()
+        stale = await agent.get_ingest_entry("someone")
+        assert stale is first
+        assert time.perf_counter() - start < 0.1
+        assert "someone" in agent._inflight
+
+        await agent._inflight["someone"]
+        fresh = agent._cache.peek("someone")
+        assert fresh is not first and not fresh.is_stale()
+        assert client.calls["get_profile"] == 2
+
+    asyncio.run(scenario())
+
+
+def test_hot_profiles_are_refreshed_ahead_only_while_the_queue_is_idle(make_agent, monkeypatch):
+    async def scenario():
+        agent = make_agent(
+            [FakeLinkedin(latency=0.1)], CACHE_TTL_MINUTES=0.5,
+            REFRESH_AHEAD_ENABLED=True, REFRESH_AHEAD_MIN_HITS=2, REFRESH_AHEAD_BEFORE_MINUTES=1, REFRESH_AHEAD_INTERVAL_SECONDS=0.02,
+        )
+        refreshed = []
+        refresh = agent._refresh
+
+        def record_refresh(public_id, reason):
+            refreshed.append((public_id, reason))
+            return refresh(public_id, reason)
+        monkeypatch.setattr(agent, "_refresh", record_refresh)
+
+        await agent.get_ingest("hot")
+        await agent.get_ingest("cold")
+        busy = asyncio.ensure_future(agent.get_ingest("busy"))
+        await asyncio.sleep(0.05)
+        await agent.get_ingest("hot")
+        await agent.get_ingest("hot")
+
+        await asyncio.sleep(0.1)
+        assert not busy.done()
+        assert refreshed == []
+
+        await busy
+        while not refreshed:
+            await asyncio.sleep(0.01)
+        await agent._inflight["hot"]
+        await asyncio.sleep(0.1)
+        # The refreshed entry starts over without hits, and the profile read once is never refreshed
+        assert refreshed == [("hot", "ahead")]
+
+    asyncio.run(scenario())
@@ -0,0 +1,43 @@
+import json
+import os
+import subprocess
+import sys
+
+from app.api.ingest import ProfileIngest
+from app.models.profile import RawData
+from benchmarks.synthetic import make_profile, make_posts
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def test_the_cli_renders_records_in_input_order_with_bad_records_as_error_lines(tmp_path):
+    raws = [RawData(profile=make_profile(f"person-{index}", entries=2, text_size=40), posts=make_posts(3, text_size=40)) for index in range(5)]
+    directory = tmp_path / "profiles"
+    directory.mkdir()
+    (directory / "b-person.json").write_text(raws[1].model_dump_json())
+    (directory / "a-person.json").write_text(json.dumps({"raw": raws[0].model_dump(), "full_name": "ignored"}))
+    lines = [
+        json.dumps({"profile_id": "batch-person", "status": "ok", "profile": {"raw": raws[2].model_dump()}}),
+        "{not json",
+        json.dumps({"profile": {"firstName": "No"}, "posts": None}),
+        "",
+        raws[3].model_dump_json(),
+    ]
+    (tmp_path / "more.jsonl").write_text("\n".join(lines) + "\n")
+    (tmp_path / "single.json").write_text(raws[4].model_dump_json())
+
+    # In a process of its own, since the tests leave threads running that forked workers would copy
+    output = tmp_path / "ingests.jsonl"
+    completed = subprocess.run(
+        [sys.executable, "-m", "app.rerender", str(directory), str(tmp_path / "more.jsonl"), str(tmp_path / "single.json"),
+         "--output", str(output), "--sections", "experience", "--workers", "2", "--chunk-size", "2"],
+        cwd=BACKEND_DIR, capture_output=True, text=True, check=True,
+    )
+
+    results = [json.loads(line) for line in output.read_text().splitlines()]
+    assert "Rendered 5 of 7 profiles" in completed.stderr and "2 failed" in completed.stderr
+    assert [result["profile_id"] for result in results] == ["a-person", "b-person", "batch-person", "more.jsonl:2", "more.jsonl:3", "more.jsonl:5", "single"]
+    assert [result["status"] for result in results] == ["ok", "ok", "ok", "error", "error", "ok", "ok"]
+    ok = [result for result in results if result["status"] == "ok"]
+    for result, raw in zip(ok, raws):
+        assert result["profile"] == json.loads(ProfileIngest.from_raw(raw).response_json({"full_name", "experience"}))
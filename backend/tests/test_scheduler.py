@@ -0,0 +1,68 @@
+import asyncio
+
+from app.api.linkedin import FetchRequest, QueueFullException
+from app.api.scheduler import FetchScheduler, PRIORITY_BACKGROUND, PRIORITY_BATCH, PRIORITY_INTERACTIVE
+from benchmarks.fake_linkedin import FakeLinkedin
+
+
+def served(scheduler: FetchScheduler) -> list:
+    async def drain():
+        return [(await scheduler.get()).public_id for _ in range(len(scheduler))]
+    return asyncio.run(drain())
+
+
+def test_requests_are_served_by_priority():
+    scheduler = FetchScheduler()
+    scheduler.put(FetchRequest("refresh", None, PRIORITY_BACKGROUND))
+    scheduler.put(FetchRequest("batch", None, PRIORITY_BATCH))
+    scheduler.put(FetchRequest("interactive", None, PRIORITY_INTERACTIVE))
+    assert served(scheduler) == ["interactive", "batch", "refresh"]
+
+
+def test_clients_take_turns_within_a_priority():
+    scheduler = FetchScheduler()
+    for public_id in ["a1", "a2", "a3"]:
+        scheduler.put(FetchRequest(public_id, None, PRIORITY_BATCH, "ip:a"))
+    for public_id in ["b1", "b2"]:
+        scheduler.put(FetchRequest(public_id, None, PRIORITY_BATCH, "ip:b"))
+
+    assert [request.public_id for request in scheduler.ordered()] == ["a1", "b1", "a2", "b2", "a3"]
+    assert served(scheduler) == ["a1", "b1", "a2", "b2", "a3"]
+
+
+def test_an_interactive_request_promotes_the_queued_fetch_it_joins(make_agent):
+    async def scenario():
+        agent = make_agent([FakeLinkedin(latency=0.05)])
+        finished = []
+
+        def start(public_id, priority):
+            task = asyncio.ensure_future(agent.get_ingest(public_id, priority))
+            task.add_done_callback(lambda _: finished.append(public_id))
+            return task
+        tasks = [start("running", PRIORITY_INTERACTIVE)]
+        await asyncio.sleep(0.01)
+        tasks += [start(public_id, PRIORITY_BATCH) for public_id in ["first", "second"]]
+        await asyncio.sleep(0)
+        tasks.append(start("second", PRIORITY_INTERACTIVE))
+        await asyncio.gather(*tasks)
+
+        assert finished[:3] == ["running", "second", "second"]
+        assert finished[3] == "first"
+
+    asyncio.run(scenario())
+
+
+def test_places_are_reserved_for_interactive_requests(make_agent):
+    async def scenario():
+        agent = make_agent([FakeLinkedin(latency=0.05)], QUEUE_MAX_LENGTH=3, QUEUE_RESERVED_FOR_INTERACTIVE=1)
+        tasks = [asyncio.ensure_future(agent.get_ingest("running"))]
+        await asyncio.sleep(0.01)
+        tasks += [asyncio.ensure_future(agent.get_ingest(public_id, PRIORITY_BATCH)) for public_id in ["batch1", "batch2", "batch3"]]
+        tasks += [asyncio.ensure_future(agent.get_ingest(public_id)) for public_id in ["interactive1", "interactive2"]]
+        results = await asyncio.gather(*tasks, return_exceptions=True)
+
+        rejected = [isinstance(result, QueueFullException) for result in results]
+        assert rejected == [False, False, False, True, False, True]
+        assert results[3].retry_after >= 1
+
+    asyncio.run(scenario())
@@ -0,0 +1,59 @@
+import gzip
+
+import pytest
+from starlette.applications import Starlette
+from starlette.routing import Mount, Route
+from starlette.testclient import TestClient
+
+from app.static import CachedFile, IMMUTABLE, PrecompressedStaticFiles, accepted_encodings
+
+SCRIPT = b"console.log('hello');\n" * 40
+
+
+@pytest.fixture
+def client(tmp_path):
+    (tmp_path / "assets").mkdir()
+    (tmp_path / "assets" / "index-AbC123_x.js").write_bytes(SCRIPT)
+    (tmp_path / "assets" / "index-AbC123_x.js.gz").write_bytes(gzip.compress(SCRIPT))
+    (tmp_path / "assets" / "robots.txt").write_bytes(b"User-agent: *\n")
+    (tmp_path / "index.html").write_bytes(b"<!doctype html><div id=root></div>" * 10)
+    index_page = CachedFile(str(tmp_path / "index.html"))
+    app = Starlette(routes=[
+        Route("/", lambda request: index_page.response(request)),
+        Mount("/assets", PrecompressedStaticFiles(directory=str(tmp_path / "assets"))),
+    ])
+    return TestClient(app)
+
+
+def test_hashed_assets_are_immutable_and_served_precompressed(client):
+    response = client.get("/assets/index-AbC123_x.js", headers={"Accept-Encoding": "gzip"})
+    assert response.headers["cache-control"] == IMMUTABLE
+    assert response.headers["content-encoding"] == "gzip"
+    assert response.headers["vary"] == "Accept-Encoding"
+    assert response.headers["content-type"].startswith("text/javascript")
+    assert response.content == SCRIPT
+
+    refused = client.get("/assets/index-AbC123_x.js", headers={"Accept-Encoding": "gzip;q=0"})
+    assert "content-encoding" not in refused.headers
+    assert refused.content == SCRIPT
+
+
+def test_other_files_are_revalidated(client):
+    response = client.get("/assets/robots.txt", headers={"Accept-Encoding": "gzip"})
+    assert response.headers["cache-control"] == "no-cache"
+    assert "content-encoding" not in response.headers and "vary" not in response.headers
+
+    revalidated = client.get("/assets/robots.txt", headers={"If-None-Match": response.headers["etag"]})
+    assert revalidated.status_code == 304
+
+
+def test_the_spa_shell_is_served_from_memory_with_an_etag(client):
+    response = client.get("/", headers={"Accept-Encoding": "gzip"})
+    assert response.headers["content-encoding"] == "gzip"
+    assert response.headers["cache-control"] == "no-cache"
+    assert client.get("/", headers={"If-None-Match": response.headers["etag"]}).status_code == 304
+
+
+def test_accepted_encodings_leave_out_refused_codings():
+    assert accepted_encodings("gzip, br;q=0.5, deflate;q=0") == {"gzip", "br"}
+    assert accepted_encodings("GZIP; q=0.0") == set()